@@ -11,28 +11,20 @@ from alembic import context
 # Add the app directory to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from dotenv import load_dotenv
+from app.config import database_url, load_environment
 from app.models import Order, Product  # Import your models
 from sqlmodel import SQLModel  # Import SQLModel
 
 # Load environment variables from .env file
-load_dotenv()
+load_environment()
 
 # Interpret the config file for Python logging.
 fileConfig(context.config.config_file_name)
 
-# Get the database URL from environment variables
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "test_db")
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
-
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
-
-# Set the sqlalchemy.url option to the DATABASE_URL
+# Migrate the same database the app uses (DATABASE_URL or POSTGRES_*);
+# "%" is escaped because the config file interpolates it
 config = context.config
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+config.set_main_option("sqlalchemy.url", database_url().replace("%", "%%"))
 
 # Set target_metadata to your SQLModel metadata
 target_metadata = SQLModel.metadata
@@ -0,0 +1,65 @@
+"""Snapshot product name and price on order lines
+
+Revision ID: 2e6c8a4f1b93
+Revises: 5b7e9f2c4d10
+Create Date: 2026-10-18 17:25:41.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2e6c8a4f1b93"
+down_revision: Union[str, None] = "5b7e9f2c4d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "productorderlink", sa.Column("unit_price", sa.Float(), nullable=True)
+    )
+    op.add_column(
+        "productorderlink",
+        sa.Column("product_name", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    # Backfill existing lines from the current catalog; the closest record
+    # of the purchase-time values that is still available
+    op.execute(
+        """
+        UPDATE productorderlink
+        SET unit_price = (
+                SELECT product.price FROM product
+                WHERE product.id = productorderlink.product_id
+            ),
+            product_name = (
+                SELECT product.name FROM product
+                WHERE product.id = productorderlink.product_id
+            )
+        """
+    )
+    with op.batch_alter_table("productorderlink") as batch_op:
+        batch_op.alter_column("unit_price", nullable=False)
+        batch_op.alter_column("product_name", nullable=False)
+    # Built without locking writes on Postgres; needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_productorderlink_order_id_product_id",
+            "productorderlink",
+            ["order_id", "product_id"],
+            postgresql_include=["quantity", "unit_price", "product_name"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_productorderlink_order_id_product_id", table_name="productorderlink"
+    )
+    with op.batch_alter_table("productorderlink") as batch_op:
+        batch_op.drop_column("product_name")
+        batch_op.drop_column("unit_price")
@@ -0,0 +1,42 @@
+"""Product catalog filter indexes
+
+Revision ID: 3f1a7c2d9b84
+Revises: c9e80314bba1
+Create Date: 2026-10-18 10:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1a7c2d9b84"
+down_revision: Union[str, None] = "c9e80314bba1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built without locking writes on Postgres; needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_product_price_id",
+            "product",
+            ["price", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_product_in_stock_id",
+            "product",
+            ["id"],
+            postgresql_where=sa.text("stock > 0"),
+            sqlite_where=sa.text("stock > 0"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_in_stock_id", table_name="product")
+    op.drop_index("ix_product_price_id", table_name="product")
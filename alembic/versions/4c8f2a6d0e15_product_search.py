@@ -0,0 +1,111 @@
+"""Full-text search over product name and description
+
+Revision ID: 4c8f2a6d0e15
+Revises: 7a3d5c1e9f26
+Create Date: 2026-10-18 18:41:52.906337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8f2a6d0e15"
+down_revision: Union[str, None] = "7a3d5c1e9f26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# SQLite: an external-content FTS5 table kept in sync by triggers
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE product_fts USING fts5(
+        name, description, content='product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER product_fts_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER product_fts_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts (product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER product_fts_update AFTER UPDATE OF name, description
+    ON product BEGIN
+        INSERT INTO product_fts (product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO product_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    # Index existing rows
+    "INSERT INTO product_fts (product_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER product_fts_update",
+    "DROP TRIGGER product_fts_delete",
+    "DROP TRIGGER product_fts_insert",
+    "DROP TABLE product_fts",
+]
+
+
+def _dialect() -> str:
+    return op.get_context().dialect.name
+
+
+def upgrade() -> None:
+    # SQLite gets the FTS5 table, Postgres a weighted tsvector column kept by
+    # a trigger with a GIN index; other dialects get no search index
+    if _dialect() == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    if _dialect() != "postgresql":
+        return
+    op.execute("ALTER TABLE product ADD COLUMN search_vector tsvector")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION product_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER product_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description ON product
+        FOR EACH ROW EXECUTE FUNCTION product_search_vector_update()
+        """
+    )
+    # Backfill existing rows through the trigger
+    op.execute("UPDATE product SET name = name")
+    # Built without locking writes on Postgres; needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_product_search_vector "
+            "ON product USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    if _dialect() == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    if _dialect() != "postgresql":
+        return
+    op.execute("DROP INDEX ix_product_search_vector")
+    op.execute("DROP TRIGGER product_search_vector_trigger ON product")
+    op.execute("DROP FUNCTION product_search_vector_update()")
+    op.execute("ALTER TABLE product DROP COLUMN search_vector")
@@ -0,0 +1,32 @@
+"""Order write-behind queue
+
+Revision ID: 5b7e9f2c4d10
+Revises: 8d2e4b6a1c37
+Create Date: 2026-10-18 16:40:03.118254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7e9f2c4d10"
+down_revision: Union[str, None] = "8d2e4b6a1c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "orderqueueentry",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["order_id"], ["order.id"]),
+        sa.PrimaryKeyConstraint("order_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("orderqueueentry")
@@ -0,0 +1,92 @@
+"""Sales rollups for the analytics API
+
+Revision ID: 7a3d5c1e9f26
+Revises: 2e6c8a4f1b93
+Create Date: 2026-10-18 18:02:17.550931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3d5c1e9f26"
+down_revision: Union[str, None] = "2e6c8a4f1b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing orders have no recorded time; they are dated to the migration.
+    # Batch mode, so SQLite rebuilds the table instead of altering columns.
+    with op.batch_alter_table("order") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                "sales_recorded",
+                sa.Boolean(),
+                server_default=sa.false(),
+                nullable=False,
+            )
+        )
+    with op.batch_alter_table("order") as batch_op:
+        batch_op.alter_column("created_at", server_default=None)
+    # Built without locking writes on Postgres; needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_unrecorded_sales",
+            "order",
+            ["id"],
+            postgresql_where=sa.text("NOT sales_recorded"),
+            sqlite_where=sa.text("NOT sales_recorded"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_product_stock_id",
+            "product",
+            ["stock", "id"],
+            postgresql_concurrently=True,
+        )
+    op.create_table(
+        "productsales",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"]),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index(
+        "ix_productsales_units_sold", "productsales", ["units_sold", "product_id"]
+    )
+    op.create_index(
+        "ix_productsales_revenue", "productsales", ["revenue", "product_id"]
+    )
+    op.create_table(
+        "dailysales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dailysales")
+    op.drop_index("ix_productsales_revenue", table_name="productsales")
+    op.drop_index("ix_productsales_units_sold", table_name="productsales")
+    op.drop_table("productsales")
+    op.drop_index("ix_product_stock_id", table_name="product")
+    op.drop_index("ix_order_unrecorded_sales", table_name="order")
+    with op.batch_alter_table("order") as batch_op:
+        batch_op.drop_column("sales_recorded")
+        batch_op.drop_column("created_at")
@@ -0,0 +1,41 @@
+"""Idempotency keys
+
+Revision ID: 8d2e4b6a1c37
+Revises: 3f1a7c2d9b84
+Create Date: 2026-10-18 14:02:17.551906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2e4b6a1c37"
+down_revision: Union[str, None] = "3f1a7c2d9b84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotencykey",
+        sa.Column("key", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column(
+            "request_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False
+        ),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response_body", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_idempotencykey_expires_at"), "idempotencykey", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_idempotencykey_expires_at"), table_name="idempotencykey")
+    op.drop_table("idempotencykey")
@@ -0,0 +1,50 @@
+"""Indexes for order lookups by product and by status
+
+Revision ID: 9e1b3d5f7a42
+Revises: 4c8f2a6d0e15
+Create Date: 2026-10-18 19:20:36.731940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e1b3d5f7a42"
+down_revision: Union[str, None] = "4c8f2a6d0e15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built without locking writes on Postgres; needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        # Lines by product (the primary key leads with order_id)
+        op.create_index(
+            "ix_productorderlink_product_id",
+            "productorderlink",
+            ["product_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # GET /orders?status=... pages by id within a status
+        op.create_index(
+            "ix_order_status_id",
+            "order",
+            ["status", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_order_status_id", table_name="order", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_productorderlink_product_id",
+            table_name="productorderlink",
+            postgresql_concurrently=True,
+        )
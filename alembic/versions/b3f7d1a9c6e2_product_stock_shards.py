@@ -0,0 +1,45 @@
+"""Sharded stock counters for hot products
+
+Revision ID: b3f7d1a9c6e2
+Revises: 9e1b3d5f7a42
+Create Date: 2026-10-18 20:41:09.318224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f7d1a9c6e2"
+down_revision: Union[str, None] = "9e1b3d5f7a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product",
+        sa.Column(
+            "stock_sharded", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+    op.create_table(
+        "productstockshard",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("stock", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"]),
+        sa.PrimaryKeyConstraint("product_id", "shard"),
+    )
+
+
+def downgrade() -> None:
+    # Fold sharded stock back into the product before the shards go
+    op.execute(
+        "UPDATE product SET stock = (SELECT COALESCE(SUM(stock), 0) "
+        "FROM productstockshard WHERE product_id = product.id) WHERE stock_sharded"
+    )
+    op.drop_table("productstockshard")
+    op.drop_column("product", "stock_sharded")
@@ -0,0 +1,39 @@
+"""Claim time on idempotency keys, so abandoned claims can be taken over
+
+Revision ID: d5a9e3c7b1f4
+Revises: b3f7d1a9c6e2
+Create Date: 2026-10-18 21:12:44.906517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a9e3c7b1f4"
+down_revision: Union[str, None] = "b3f7d1a9c6e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Claims in flight during the migration are dated to it. Batch mode, so
+    # SQLite rebuilds the table instead of altering the column.
+    with op.batch_alter_table("idempotencykey") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "claimed_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+            )
+        )
+    with op.batch_alter_table("idempotencykey") as batch_op:
+        batch_op.alter_column("claimed_at", server_default=None)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("idempotencykey") as batch_op:
+        batch_op.drop_column("claimed_at")
@@ -0,0 +1,321 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Protocol
+
+from app.schemas import ProductFilter
+
+# memory (in-process LRU), redis, or none. An in-process cache is per worker:
+# a write in one worker leaves other workers' copies stale for up to CACHE_TTL
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Cache-Control sent with catalog reads; no-cache means "revalidate via ETag"
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, no-cache")
+
+_CATALOG_VERSION_KEY = "catalog:version"
+_CATALOG_EPOCH_KEY = "catalog:epoch"
+
+# KEYS: entry, counter; ARGV: value, expected counter, ttl in ms
+_SET_IF_COUNTER_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+return 1
+"""
+
+
+class CacheBackend(Protocol):
+    """
+    Storage used by ProductCache. Counters must never be evicted.
+    `shared` backends are visible to every process; `epoch` changes whenever
+    the counters may have been reset.
+    """
+
+    evictions: int
+    shared: bool
+    epoch: str
+
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    def set_if_counter(
+        self, key: str, value: Any, ttl: float, counter: str, expected: int
+    ) -> bool:
+        """
+        Set `key` only if `counter` still equals `expected`, atomically.
+        """
+        ...
+
+    def delete(self, *keys: str) -> None:
+        ...
+
+    def incr(self, key: str) -> int:
+        ...
+
+    def get_counter(self, key: str) -> int:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class LRUCacheBackend:
+    """
+    In-process, thread-safe LRU cache with per-entry expiry.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def set_if_counter(
+        self, key: str, value: Any, ttl: float, counter: str, expected: int
+    ) -> bool:
+        with self._lock:
+            if self._counters.get(counter, 0) != expected:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def _set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self.epoch = uuid.uuid4().hex[:8]
+
+
+class NullCacheBackend(LRUCacheBackend):
+    """
+    Stores nothing, so every read misses; counters still work.
+    """
+
+    def _set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+
+class RedisCacheBackend:
+    """
+    Cache shared between processes through any client speaking the redis-py
+    API (get/set/delete/incr/scan_iter). Values are stored as JSON.
+    """
+
+    shared = True
+
+    def __init__(self, client: Any, prefix: str = "ecommerce:"):
+        self.client = client
+        self.prefix = prefix
+        # Evictions happen inside Redis and are not observable from here
+        self.evictions = 0
+
+    @property
+    def epoch(self) -> str:
+        key = self.prefix + _CATALOG_EPOCH_KEY
+        self.client.set(key, uuid.uuid4().hex[:8], nx=True)
+        epoch = self.client.get(key)
+        return epoch.decode() if isinstance(epoch, bytes) else epoch
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def set_if_counter(
+        self, key: str, value: Any, ttl: float, counter: str, expected: int
+    ) -> bool:
+        return bool(
+            self.client.eval(
+                _SET_IF_COUNTER_SCRIPT,
+                2,
+                self.prefix + key,
+                self.prefix + counter,
+                json.dumps(value),
+                expected,
+                int(ttl * 1000),
+            )
+        )
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def get_counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ProductCache:
+    """
+    Read-through cache for product pages and single products.
+
+    Page entries are keyed by the catalog version, which every product write
+    bumps, so a write invalidates all pages at once without scanning keys.
+    Single products are deleted by id when they change.
+
+    Readers take the version before querying and pass it to get_page and
+    set_page / set_product, so rows read before a concurrent write are never
+    stored as current: pages land under the old version's key, and a product
+    is only stored if the version is unchanged, checked atomically with the
+    store.
+
+    With a per-process backend each worker has its own version and entries:
+    a write is seen at once by the worker that made it, and by the others
+    once their entries expire, i.e. after up to `ttl` seconds.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def catalog_version(self) -> int:
+        return self.backend.get_counter(_CATALOG_VERSION_KEY)
+
+    def _page_key(self, filters: ProductFilter, version: int) -> str:
+        return f"products:v{version}:{filters.model_dump_json()}"
+
+    def get_page(self, filters: ProductFilter, version: int) -> Optional[list[dict]]:
+        return self._lookup(self._page_key(filters, version))
+
+    def set_page(self, filters: ProductFilter, version: int, rows: list[dict]) -> None:
+        self.backend.set(self._page_key(filters, version), rows, self.ttl)
+
+    def get_product(self, product_id: int) -> Optional[dict]:
+        return self._lookup(f"product:{product_id}")
+
+    def set_product(self, product_id: int, version: int, row: dict) -> None:
+        """
+        Store a product read at catalog `version`, unless a write has landed
+        since then and its row may be stale.
+        """
+        self.backend.set_if_counter(
+            f"product:{product_id}", row, self.ttl, _CATALOG_VERSION_KEY, version
+        )
+
+    def catalog_etag(self) -> str:
+        """
+        Weak ETag for catalog reads, derived from the catalog version so it
+        can be checked without loading any products. A process-local backend
+        cannot see other workers' writes, so its tag also rolls over every
+        TTL, bounding staleness the same way as its cached pages.
+        """
+        tag = f"{self.backend.epoch}-{self.catalog_version()}"
+        if not self.backend.shared:
+            tag += f"-{int(time.time() // max(self.ttl, 1))}"
+        return f'W/"{tag}"'
+
+    def catalog_changed(self, product_ids: Iterable[int] = ()) -> int:
+        """
+        Record a product insert, update or stock change; returns the new
+        catalog version. The version moves first: set_product checks it
+        atomically with its store, so a product read before this write is
+        either stored before the delete below, which removes it, or not at all.
+        """
+        version = self.backend.incr(_CATALOG_VERSION_KEY)
+        self.backend.delete(*(f"product:{product_id}" for product_id in product_ids))
+        return version
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "catalog_version": self.catalog_version(),
+        }
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+
+def _build_backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        # Optional dependency, only needed for the shared backend
+        import redis
+
+        return RedisCacheBackend(redis.Redis.from_url(REDIS_URL))
+    if CACHE_BACKEND == "none":
+        return NullCacheBackend()
+    return LRUCacheBackend()
+
+
+@lru_cache
+def get_product_cache() -> ProductCache:
+    """
+    Process-wide product cache built from the CACHE_* settings.
+    """
+    return ProductCache(_build_backend())
@@ -0,0 +1,38 @@
+"""
+Loading of the .env file into the process environment.
+
+Settings are read with os.getenv by the modules that use them, when they are
+imported. Entry points (create_app and the command-line modules) call
+load_environment() before importing those modules, so values from .env reach
+all of them, while importing a module on its own never touches the disk.
+"""
+
+import os
+from functools import lru_cache
+
+
+@lru_cache
+def load_environment() -> bool:
+    """
+    Fill unset environment variables from .env, once per process. Returns
+    whether a .env file was found.
+    """
+    from dotenv import load_dotenv
+
+    return load_dotenv()
+
+
+def database_url() -> str:
+    """
+    SQLAlchemy URL of the primary database, shared by the app and Alembic:
+    DATABASE_URL when set, otherwise one built from the POSTGRES_* settings.
+    """
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    user = os.getenv("POSTGRES_USER", "postgres")
+    password = os.getenv("POSTGRES_PASSWORD", "postgres")
+    host = os.getenv("POSTGRES_HOST", "localhost")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    name = os.getenv("POSTGRES_DB", "test_db")
+    return f"postgresql://{user}:{password}@{host}:{port}/{name}"
@@ -1,32 +1,138 @@
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-# 1. Load environment variables from .env
-load_dotenv()
+from app.config import database_url
+from app.pool_stats import instrumented_pool_class
 
-# 2. Retrieve the environment variables
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "test_db")
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+# Read at import; entry points load .env first (see app.config). A full
+# SQLAlchemy URL in DATABASE_URL takes precedence over the POSTGRES_* parts
+DATABASE_URL = database_url()
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Connection pool sizing and timeouts (seconds unless noted)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# Server-side statement timeout in milliseconds; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Create missing tables at startup; set to 0 once the schema is managed with
+# `alembic upgrade head`, so boot skips the per-table existence checks
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "1") == "1"
+
+# Serve requests from the async engine and async handlers when set to 1
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+
+# Async drivers used in place of the default sync driver for each backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def engine_options(name: str, url: str, async_driver: bool = False) -> dict:
+    """
+    Pool and timeout keyword arguments shared by the sync and async engines
+    for `url`. The pool reports checkout waits, overflow and churn under
+    `name`.
+    """
+    base_pool = AsyncAdaptedQueuePool if async_driver else QueuePool
+    options = {
+        "poolclass": instrumented_pool_class(base_pool, name),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    # The timeout is passed as a Postgres connection option, which other
+    # drivers would reject
+    if DB_STATEMENT_TIMEOUT_MS and make_url(url).get_backend_name() == "postgresql":
+        timeout = str(DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = (
+            {"server_settings": {"statement_timeout": timeout}}
+            if async_driver
+            else {"options": f"-c statement_timeout={timeout}"}
+        )
+    return options
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the sync driver of a database URL for its async counterpart.
+    """
+    parsed = make_url(url)
+    return parsed.set(
+        drivername=ASYNC_DRIVERS[parsed.get_backend_name()]
+    ).render_as_string(hide_password=False)
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    Build the sync engine on first use rather than at import, so importing
+    the app (or a tool that never queries) loads no database driver.
+    """
+    return create_engine(
+        DATABASE_URL, echo=False, **engine_options("primary", DATABASE_URL)
+    )
 
 
 def get_session():
     """
     Get a new database session.
     """
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    """
+    Build the async engine on first use, so the async driver is only
+    required when the async stack is enabled.
+    """
+    return create_async_engine(
+        to_async_url(DATABASE_URL),
+        echo=False,
+        **engine_options("primary_async", DATABASE_URL, async_driver=True),
+    )
+
+
+async def dispose_engines() -> None:
+    """
+    Close the pooled connections of whichever engines were created.
+    """
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+
+
+async def get_async_session():
+    """
+    Get a new async database session.
+    """
+    async with AsyncSession(get_async_engine()) as session:
+        yield session
+
+
+_schema_initialized = False
+
+
 def init_db():
     """
     Create all tables. This can be run on startup to ensure tables exist.
+    Returns whether it ran; it is skipped when DB_CREATE_ALL is off, and
+    runs at most once per process, so workers forked after the production
+    server ran it skip it too.
     """
-    SQLModel.metadata.create_all(engine)
+    global _schema_initialized
+    if not DB_CREATE_ALL or _schema_initialized:
+        return False
+    SQLModel.metadata.create_all(get_engine())
+    _schema_initialized = True
+    return True
@@ -4,3 +4,19 @@ from enum import Enum
 class StatusEnum(str, Enum):
     pending = "pending"
     completed = "completed"
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class SalesBucketEnum(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class TopSellerSortEnum(str, Enum):
+    units = "units"
+    revenue = "revenue"
@@ -0,0 +1,126 @@
+"""
+Startup and shutdown of the app: schema setup and the background tasks
+(idempotency key sweeps, sales rollup compaction, stock shard rebalancing,
+replica health checks, in-process order workers).
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import dispose_engines, get_engine, init_db
+from app.replicas import REPLICA_HEALTH_INTERVAL, dispose_replicas, get_replica_set
+from app.services.analytics_service import compact_sales
+from app.services.idempotency_service import purge_expired_keys
+from app.services.order_queue_service import (
+    ORDER_WORKERS,
+    queue_enabled,
+    run_order_worker,
+)
+from app.services.stock_service import rebalance_all_stock_shards
+
+# Seconds between sweeps of expired idempotency keys
+IDEMPOTENCY_GC_INTERVAL = float(os.getenv("IDEMPOTENCY_GC_INTERVAL", "3600"))
+# Seconds between sales rollup compactions; 0 leaves them to another process
+SALES_ROLLUP_INTERVAL = float(os.getenv("SALES_ROLLUP_INTERVAL", "60"))
+# Seconds between rebalances of sharded stock; 0 leaves them to another process
+STOCK_REBALANCE_INTERVAL = float(os.getenv("STOCK_REBALANCE_INTERVAL", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_idempotency_keys() -> int:
+    with Session(get_engine()) as session:
+        return purge_expired_keys(session)
+
+
+async def _idempotency_gc():
+    while True:
+        try:
+            await run_in_threadpool(_purge_idempotency_keys)
+        except Exception:
+            logger.exception("Idempotency key sweep failed; retrying next interval")
+        await asyncio.sleep(IDEMPOTENCY_GC_INTERVAL)
+
+
+def _compact_sales() -> int:
+    with Session(get_engine()) as session:
+        return compact_sales(session)
+
+
+async def _sales_compactor():
+    while True:
+        try:
+            recorded = await run_in_threadpool(_compact_sales)
+            if recorded:
+                logger.debug("Compacted sales", extra={"orders": recorded})
+        except Exception:
+            logger.exception("Sales compaction failed; retrying next interval")
+        await asyncio.sleep(SALES_ROLLUP_INTERVAL)
+
+
+def _rebalance_stock_shards() -> int:
+    with Session(get_engine()) as session:
+        return rebalance_all_stock_shards(session)
+
+
+async def _stock_rebalancer():
+    while True:
+        try:
+            await run_in_threadpool(_rebalance_stock_shards)
+        except Exception:
+            logger.exception("Stock shard rebalance failed; retrying next interval")
+        await asyncio.sleep(STOCK_REBALANCE_INTERVAL)
+
+
+async def _replica_health_checks():
+    replicas = get_replica_set()
+    while True:
+        try:
+            await run_in_threadpool(replicas.check)
+        except Exception:
+            logger.exception("Replica health check failed; retrying next interval")
+        await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup logic
+    tasks = []
+    if os.getenv("TESTING") != "1":
+        if init_db():
+            logger.debug(
+                "Database schema ensured", extra={"database": str(get_engine().url)}
+            )
+        tasks.append(asyncio.create_task(_idempotency_gc()))
+        if SALES_ROLLUP_INTERVAL > 0:
+            tasks.append(asyncio.create_task(_sales_compactor()))
+        if STOCK_REBALANCE_INTERVAL > 0:
+            tasks.append(asyncio.create_task(_stock_rebalancer()))
+        if get_replica_set().replicas and REPLICA_HEALTH_INTERVAL > 0:
+            tasks.append(asyncio.create_task(_replica_health_checks()))
+        if queue_enabled():
+            tasks += [
+                asyncio.create_task(run_order_worker(get_engine()))
+                for _ in range(ORDER_WORKERS)
+            ]
+
+    yield
+
+    # Shutdown runs once the server has drained in-flight requests. A batch
+    # already running in the threadpool completes before its task finishes
+    # cancelling, so no order or sales batch is cut short. A task that died
+    # earlier must not keep the engines from being disposed.
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        # CancelledError is not an Exception
+        if isinstance(result, Exception):
+            logger.error("Background task had failed", exc_info=result)
+    await dispose_engines()
+    await dispose_replicas()
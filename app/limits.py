@@ -0,0 +1,295 @@
+"""
+Admission control for POST /orders, applied before the order touches the
+database: a token bucket per client (429 when empty) and an adaptive limit
+on orders in flight (503 when reached), both answered with Retry-After.
+
+The in-flight limit is off unless ORDER_MAX_IN_FLIGHT is set, and starts
+there. While the primary pool's
+recent checkout wait is above ORDER_SHED_POOL_WAIT_MS it shrinks by a quarter,
+at most once a second. Once waits fall below half of that it grows back by
+about one for every `limit` orders completed. Shedding the excess early keeps
+latency steady for the orders that are accepted, and leaves connections for
+catalog reads.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional, Protocol
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import REDIS_URL
+from app.metrics import METRICS
+from app.middleware import route_template
+from app.pool_stats import POOL_STATS
+
+# Orders per second each client may place; 0 disables rate limiting
+ORDER_RATE_LIMIT = float(os.getenv("ORDER_RATE_LIMIT", "0"))
+# Orders a client may place at once before the rate applies
+ORDER_RATE_BURST = int(os.getenv("ORDER_RATE_BURST", "10"))
+# memory (per process) or redis (shared by every process; needs redis)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# Request header naming the client, such as an API key; when it is empty or
+# missing, clients are told apart by address
+RATE_LIMIT_KEY_HEADER = os.getenv("RATE_LIMIT_KEY_HEADER", "")
+# Orders in flight per process before new ones are shed; 0 or unset disables
+# shedding. DB_POOL_SIZE + DB_MAX_OVERFLOW is a good starting point
+ORDER_MAX_IN_FLIGHT = int(os.getenv("ORDER_MAX_IN_FLIGHT") or 0)
+# Recent pool checkout wait (ms) above which the in-flight limit shrinks;
+# 0 keeps the limit fixed
+ORDER_SHED_POOL_WAIT_MS = float(os.getenv("ORDER_SHED_POOL_WAIT_MS", "50"))
+# Retry-After (seconds) sent with 503
+ORDER_SHED_RETRY_AFTER = int(os.getenv("ORDER_SHED_RETRY_AFTER", "1"))
+
+# Clients tracked by the in-process buckets; the least recently seen go first
+_MAX_CLIENTS = 100_000
+# Pools whose waits drive the in-flight limit
+_PRIMARY_POOLS = ("primary", "primary_async")
+# Seconds between two decreases, so one slow spell shrinks the limit once
+_DECREASE_INTERVAL = 1.0
+_DECREASE_FACTOR = 0.75
+
+# Atomic refill-and-take on a hash of (tokens, updated); Redis time keeps
+# every app process on one clock. Returns the wait as a string because Redis
+# truncates Lua numbers to integers.
+_TOKEN_BUCKET_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBuckets(Protocol):
+    """
+    One token bucket per client key, refilled at `rate` tokens per second up
+    to `burst`. `blocking` buckets do network I/O in take, so async callers
+    run it in a thread.
+    """
+
+    blocking: bool
+
+    def take(self, key: str) -> float:
+        """
+        Take a token for `key`. Returns 0 when one was available, otherwise
+        the seconds until there will be one.
+        """
+        ...
+
+
+class MemoryTokenBuckets:
+    """
+    Token buckets held in this process.
+    """
+
+    blocking = False
+
+    def __init__(self, rate: float, burst: int, max_clients: int = _MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets shared by every process through Redis. When Redis cannot
+    be reached, orders are let through rather than refused.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, client: Any, rate: float, burst: int, prefix: str = "ecommerce:rate:"
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key: str) -> float:
+        try:
+            return float(
+                self._script(keys=[self.prefix + key], args=[self.rate, self.burst])
+            )
+        except Exception:
+            logger.warning("Rate limit backend unavailable; letting the order through")
+            return 0.0
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Caps the orders in flight, shrinking the cap while the connection pool
+    is congested (see the module docstring).
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        max_pool_wait_ms: float,
+        pools: tuple[str, ...] = _PRIMARY_POOLS,
+    ):
+        self.max_limit = max_limit
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.pools = pools
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._decreased_at = 0.0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def pool_wait_ms(self) -> float:
+        return max(
+            (
+                POOL_STATS[name].recent_wait_ms
+                for name in self.pools
+                if name in POOL_STATS
+            ),
+            default=0.0,
+        )
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            self._publish()
+            return True
+
+    def release(self) -> None:
+        wait_ms = self.pool_wait_ms()
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if self.max_pool_wait_ms:
+                if wait_ms > self.max_pool_wait_ms:
+                    if now - self._decreased_at >= _DECREASE_INTERVAL:
+                        self.limit = max(1.0, self.limit * _DECREASE_FACTOR)
+                        self._decreased_at = now
+                elif wait_ms < self.max_pool_wait_ms / 2:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._publish()
+
+    def _publish(self) -> None:
+        METRICS.set_admission(
+            order_concurrency_limit=int(self.limit), orders_in_flight=self.in_flight
+        )
+
+
+@lru_cache
+def get_order_rate_limiter() -> Optional[TokenBuckets]:
+    """
+    Per-client order buckets from the ORDER_RATE_* settings, or None when
+    rate limiting is off.
+    """
+    if ORDER_RATE_LIMIT <= 0:
+        return None
+    if RATE_LIMIT_BACKEND == "redis":
+        # Optional dependency, only needed for the shared backend
+        import redis
+
+        return RedisTokenBuckets(
+            redis.Redis.from_url(REDIS_URL), ORDER_RATE_LIMIT, ORDER_RATE_BURST
+        )
+    return MemoryTokenBuckets(ORDER_RATE_LIMIT, ORDER_RATE_BURST)
+
+
+@lru_cache
+def get_order_concurrency_limit() -> Optional[AdaptiveConcurrencyLimit]:
+    """
+    Process-wide in-flight order limit, or None when shedding is off.
+    """
+    if ORDER_MAX_IN_FLIGHT <= 0:
+        return None
+    return AdaptiveConcurrencyLimit(ORDER_MAX_IN_FLIGHT, ORDER_SHED_POOL_WAIT_MS)
+
+
+def client_key(request: Request) -> str:
+    """
+    Identity the rate limit is kept under: RATE_LIMIT_KEY_HEADER when the
+    request sends it, else the client address.
+    """
+    if RATE_LIMIT_KEY_HEADER:
+        key = request.headers.get(RATE_LIMIT_KEY_HEADER)
+        if key:
+            return key
+    return request.client.host if request.client else "unknown"
+
+
+def _reject(request: Request, status_code: int, reason: str, retry_after: float):
+    METRICS.observe_rejection(route_template(request.scope), reason)
+    raise HTTPException(
+        status_code=status_code,
+        detail=(
+            "Too many orders; retry later"
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            else "Too many orders in progress; retry later"
+        ),
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def admit_order(
+    request: Request,
+    buckets: Optional[TokenBuckets] = Depends(get_order_rate_limiter),
+    limit: Optional[AdaptiveConcurrencyLimit] = Depends(get_order_concurrency_limit),
+):
+    """
+    Admit an order request or refuse it with 429 (this client is over its
+    rate) or 503 (too many orders in flight). The in-flight slot is held
+    until the handler finishes.
+    """
+    if buckets is not None:
+        key = client_key(request)
+        if buckets.blocking:
+            wait = await run_in_threadpool(buckets.take, key)
+        else:
+            wait = buckets.take(key)
+        if wait:
+            _reject(request, status.HTTP_429_TOO_MANY_REQUESTS, "rate_limited", wait)
+    if limit is None:
+        yield
+        return
+    if not limit.try_acquire():
+        _reject(
+            request,
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "overloaded",
+            ORDER_SHED_RETRY_AFTER,
+        )
+    try:
+        yield
+    finally:
+        limit.release()
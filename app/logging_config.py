@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+import sys
+
+# DEBUG, INFO, WARNING, ...; records below this level are never formatted
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# json (one object per line) or text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Render a record as one JSON object, including fields passed via `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging() -> None:
+    """
+    Attach a single stderr handler to the "app" logger tree. Safe to call
+    more than once.
+    """
+    logger = logging.getLogger("app")
+    logger.setLevel(LOG_LEVEL)
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+    logger.addHandler(handler)
+    logger.propagate = False
@@ -1,30 +1,45 @@
-import os
-from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import init_db
-from app.routers import products, orders
+from app.config import load_environment
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup logic
-    if os.getenv("TESTING") != "1":
-        init_db()
-        print("DEBUG: init_db() called during startup (lifespan)")
+def create_app(async_db: Optional[bool] = None) -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+    `async_db` selects the async engine and handlers; defaults to ASYNC_DB.
 
-    yield
+    Settings, middleware and routers are imported here rather than at module
+    level: .env is loaded first so every module reads its settings from it,
+    and importing app.main alone stays cheap.
+    """
+    load_environment()
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.middleware.cors import CORSMiddleware
 
-    # Teardown logic (optional)
-    print("DEBUG: No teardown steps currently.")
+    from app.database import ASYNC_DB
+    from app.lifespan import lifespan
+    from app.logging_config import configure_logging
+    from app.metrics import install_sql_hooks
+    from app.middleware import (
+        CompressionMiddleware,
+        InstrumentationMiddleware,
+        ReadYourWritesMiddleware,
+    )
+    from app.replicas import (
+        DATABASE_REPLICA_URLS,
+        READ_PRIMARY_AFTER_WRITE,
+        READ_PRIMARY_COOKIE,
+    )
+    from app.routers import analytics, internal, metrics, products, orders
 
+    if async_db is None:
+        async_db = ASYNC_DB
+
+    configure_logging()
+    install_sql_hooks()
 
-def create_app() -> FastAPI:
-    """
-    Create and configure the FastAPI application.
-    """
     app = FastAPI(
         title="Simple E-Commerce Platform",
         version="1.0.0",
@@ -49,13 +64,45 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
     )
+    if DATABASE_REPLICA_URLS and READ_PRIMARY_AFTER_WRITE:
+        app.add_middleware(
+            ReadYourWritesMiddleware,
+            cookie=READ_PRIMARY_COOKIE,
+            max_age=READ_PRIMARY_AFTER_WRITE,
+        )
+    app.add_middleware(CompressionMiddleware)
+    # Outermost, so its timings cover every other middleware and it sees
+    # the compressed response size
+    app.add_middleware(InstrumentationMiddleware)
 
     # Include Routers
-    app.include_router(products.router)
-    app.include_router(orders.router)
+    if async_db:
+        app.include_router(products.async_router)
+        app.include_router(orders.async_router)
+        app.include_router(analytics.async_router)
+    else:
+        app.include_router(products.router)
+        app.include_router(orders.router)
+        app.include_router(analytics.router)
+    app.include_router(internal.router)
+    app.include_router(metrics.router)
 
     return app
 
 
-app = create_app()
+@lru_cache
+def get_app() -> FastAPI:
+    """
+    The default application, created on first use.
+    """
+    return create_app()
+
+
+def __getattr__(name: str):
+    # `app.main:app` (uvicorn) and `from app.main import app` build the app
+    # on first access instead of at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,311 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.cache import get_product_cache
+from app.pool_stats import snapshot_all
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Upper bounds (bytes) of the response size histogram buckets
+SIZE_BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Upper bounds of the compressed/uncompressed size ratio histogram buckets
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense.
+    """
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if value <= bound),
+            len(self.bounds),
+        )
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        buckets, total = [], 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            total += count
+            buckets.append((str(bound), total))
+        return buckets
+
+
+class QueryStats:
+    """
+    SQL statements and database time spent by one request.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries", '
+            f"app;dur={total_seconds * 1000:.2f}"
+        )
+
+
+# Stats of the request being served; copied into threadpool workers and
+# greenlets, so statements run by sync handlers are counted as well
+_current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def start_query_stats() -> tuple[QueryStats, object]:
+    stats = QueryStats()
+    return stats, _current_query_stats.set(stats)
+
+
+def stop_query_stats(token) -> None:
+    _current_query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if _current_query_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    stats = _current_query_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started.pop()
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if _current_query_stats.get() is not None and conn is not None:
+        started = conn.info.get("query_started")
+        if started:
+            started.pop()
+
+
+_sql_hooks_installed = False
+
+
+def install_sql_hooks() -> None:
+    """
+    Count statements on every engine, sync or async, for the current request.
+    Listening on the Engine class covers engines created later too.
+    """
+    global _sql_hooks_installed
+    if _sql_hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _sql_hooks_installed = True
+
+
+class RequestMetrics:
+    """
+    Per-route request counters, latency and size histograms, and in-flight
+    gauge. Routes are path templates, so series stay bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency: dict[tuple[str, str, str], Histogram] = {}
+        self.response_size: dict[tuple[str, str], Histogram] = {}
+        self.statements: dict[tuple[str, str], int] = {}
+        self.db_seconds: dict[tuple[str, str], float] = {}
+        self.compression_ratio: dict[tuple[str, str, str], Histogram] = {}
+        self.uncompressed_bytes: dict[tuple[str, str, str], int] = {}
+        self.compressed_bytes: dict[tuple[str, str, str], int] = {}
+        # Requests refused before reaching the handler, by (route, reason)
+        self.rejected: dict[tuple[str, str], int] = {}
+        # Current admission control limits and usage, by gauge name
+        self.admission: dict[str, float] = {}
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        size: int,
+        query_stats: QueryStats,
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.setdefault(
+                (method, route, str(status_code)), Histogram(LATENCY_BUCKETS_S)
+            ).observe(seconds)
+            self.response_size.setdefault(key, Histogram(SIZE_BUCKETS_BYTES)).observe(
+                size
+            )
+            self.statements[key] = self.statements.get(key, 0) + query_stats.statements
+            self.db_seconds[key] = (
+                self.db_seconds.get(key, 0.0) + query_stats.db_seconds
+            )
+
+    def observe_compression(
+        self, method: str, route: str, encoding: str, raw: int, compressed: int
+    ) -> None:
+        key = (method, route, encoding)
+        with self._lock:
+            if raw:
+                self.compression_ratio.setdefault(
+                    key, Histogram(RATIO_BUCKETS)
+                ).observe(compressed / raw)
+            self.uncompressed_bytes[key] = self.uncompressed_bytes.get(key, 0) + raw
+            self.compressed_bytes[key] = self.compressed_bytes.get(key, 0) + compressed
+
+    def observe_rejection(self, route: str, reason: str) -> None:
+        key = (route, reason)
+        with self._lock:
+            self.rejected[key] = self.rejected.get(key, 0) + 1
+
+    def set_admission(self, **gauges: float) -> None:
+        with self._lock:
+            self.admission.update(gauges)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency.clear()
+            self.response_size.clear()
+            self.statements.clear()
+            self.db_seconds.clear()
+            self.compression_ratio.clear()
+            self.uncompressed_bytes.clear()
+            self.compressed_bytes.clear()
+            self.rejected.clear()
+
+
+METRICS = RequestMetrics()
+
+
+def _labels(**labels) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _histogram_lines(name: str, series: dict, label_names: Iterable[str]):
+    for key, histogram in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        for bound, count in histogram.cumulative():
+            yield f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+        yield f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}"
+        yield f"{name}_count{_labels(**labels)} {histogram.count}"
+
+
+def render_prometheus(metrics: RequestMetrics = METRICS) -> str:
+    """
+    Request, connection pool and cache metrics in the Prometheus text format.
+    """
+    lines = [
+        "# HELP http_requests_in_flight Requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {metrics.in_flight}",
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    with metrics._lock:
+        lines += _histogram_lines(
+            "http_request_duration_seconds",
+            metrics.latency,
+            ("method", "route", "status"),
+        )
+        lines += [
+            "# HELP http_response_size_bytes Response body size by route.",
+            "# TYPE http_response_size_bytes histogram",
+        ]
+        lines += _histogram_lines(
+            "http_response_size_bytes", metrics.response_size, ("method", "route")
+        )
+        lines += [
+            "# HELP http_request_sql_statements_total SQL statements run by route.",
+            "# TYPE http_request_sql_statements_total counter",
+        ]
+        lines += [
+            f"http_request_sql_statements_total{_labels(method=m, route=r)} {count}"
+            for (m, r), count in sorted(metrics.statements.items())
+        ]
+        lines += [
+            "# HELP http_request_db_seconds_total Database time spent by route.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        lines += [
+            f"http_request_db_seconds_total{_labels(method=m, route=r)} {seconds:.6f}"
+            for (m, r), seconds in sorted(metrics.db_seconds.items())
+        ]
+        lines += [
+            "# HELP http_response_compression_ratio Compressed / uncompressed size.",
+            "# TYPE http_response_compression_ratio histogram",
+        ]
+        lines += _histogram_lines(
+            "http_response_compression_ratio",
+            metrics.compression_ratio,
+            ("method", "route", "encoding"),
+        )
+        for name, series in (
+            ("http_response_uncompressed_bytes_total", metrics.uncompressed_bytes),
+            ("http_response_compressed_bytes_total", metrics.compressed_bytes),
+        ):
+            lines.append(f"# TYPE {name} counter")
+            lines += [
+                f"{name}{_labels(method=m, route=r, encoding=e)} {count}"
+                for (m, r, e), count in sorted(series.items())
+            ]
+        lines += [
+            "# HELP http_requests_rejected_total Requests refused by rate limiting "
+            "or load shedding.",
+            "# TYPE http_requests_rejected_total counter",
+        ]
+        lines += [
+            f"http_requests_rejected_total{_labels(route=r, reason=reason)} {count}"
+            for (r, reason), count in sorted(metrics.rejected.items())
+        ]
+        for name, value in sorted(metrics.admission.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+
+    pools = snapshot_all()
+    for field, kind in (
+        ("checked_out", "gauge"),
+        ("overflow", "gauge"),
+        ("checkouts", "counter"),
+        ("timeouts", "counter"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        lines.append(f"# TYPE db_pool_{field}{suffix} {kind}")
+        lines += [
+            f"db_pool_{field}{suffix}{_labels(pool=name)} {snapshot[field]}"
+            for name, snapshot in sorted(pools.items())
+        ]
+
+    cache = get_product_cache().stats()
+    for field in ("hits", "misses", "evictions"):
+        lines.append(f"# TYPE product_cache_{field}_total counter")
+        lines.append(f"product_cache_{field}_total {cache[field]}")
+
+    return "\n".join(lines) + "\n"
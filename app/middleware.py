@@ -0,0 +1,281 @@
+import os
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import METRICS, RequestMetrics, start_query_stats, stop_query_stats
+
+try:
+    # Optional: better ratios than gzip for JSON at similar CPU cost
+    import brotli
+except ImportError:  # pragma: no cover - exercised when brotli is missing
+    brotli = None
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Responses smaller than this (bytes) are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# 1 (fastest) .. 9 (smallest)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 0 (fastest) .. 11 (smallest)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Comma-separated path prefixes that are never compressed
+COMPRESSION_EXCLUDED_PATHS = tuple(
+    prefix.strip()
+    for prefix in os.getenv("COMPRESSION_EXCLUDED_PATHS", "/static").split(",")
+    if prefix.strip()
+)
+
+_COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route, so metric series stay bounded.
+    """
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+class InstrumentationMiddleware:
+    """
+    Records latency, response size and SQL statements per route, and sends
+    the request's database time as a Server-Timing header.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses pass through unbuffered.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = METRICS):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_stats, token = start_query_stats()
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    query_stats.server_timing(time.perf_counter() - start),
+                )
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.request_started()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_query_stats(token)
+            self.metrics.request_finished(
+                scope["method"],
+                route_template(scope),
+                status_code,
+                time.perf_counter() - start,
+                size,
+                query_stats,
+            )
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def _quality(params: str) -> float:
+    """
+    The q-value of an Accept-Encoding item; a malformed one counts as q=0.
+    """
+    params = params.strip()
+    if not params.startswith("q="):
+        return 1.0
+    try:
+        return float(params[2:])
+    except ValueError:
+        return 0.0
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not _quality(params) > 0:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli (when installed) or gzip, according to
+    Accept-Encoding. Bodies under `minimum_size` and paths under
+    `excluded_paths` are sent as is. Streaming responses are compressed
+    chunk by chunk and flushed after each one, so nothing is buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+        excluded_paths: tuple[str, ...] = COMPRESSION_EXCLUDED_PATHS,
+        metrics: RequestMetrics = METRICS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_paths = excluded_paths
+        self.metrics = metrics
+
+    def _encoding_for(self, scope: Scope) -> Optional[str]:
+        if scope["path"].startswith(self.excluded_paths):
+            return None
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    def _should_compress(
+        self, headers: MutableHeaders, status: int, body: bytes, more_body: bool
+    ) -> bool:
+        if status in (204, 304) or "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES):
+            return False
+        if more_body:
+            length = headers.get("content-length")
+            return length is None or int(length) >= self.minimum_size
+        return len(body) >= self.minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._encoding_for(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        encoder = None
+        raw = compressed = 0
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, encoder, raw, compressed
+            if message["type"] == "http.response.start":
+                # Headers depend on the first body chunk; hold them until then
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(scope=start)
+                if not self._should_compress(headers, start["status"], body, more_body):
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = self._encoder(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    data = encoder.encode(body, final=True)
+                    headers["Content-Length"] = str(len(data))
+                    raw, compressed = len(body), len(data)
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send(start)
+
+            if encoder is None:
+                await send(message)
+                return
+            data = encoder.encode(body, final=not more_body)
+            raw += len(body)
+            compressed += len(data)
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+        if encoder is not None:
+            self.metrics.observe_compression(
+                scope["method"], route_template(scope), encoding, raw, compressed
+            )
+
+
+# Methods that never write, so never need to pin the client to the primary
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadYourWritesMiddleware:
+    """
+    After a successful write, set a short-lived cookie that routes the
+    client's reads to the primary until replicas have caught up (see
+    app.replicas.reads_primary).
+    """
+
+    def __init__(self, app: ASGIApp, cookie: str, max_age: int):
+        self.app = app
+        self.cookie = cookie
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{self.cookie}=1; Max-Age={self.max_age}; Path=/; "
+                    "HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,4 +1,6 @@
+from datetime import date, datetime, timezone
 from typing import Optional, List
+from sqlalchemy import DDL, DateTime, Index, event, false, text
 from sqlmodel import Field, SQLModel, Relationship
 from .enums import StatusEnum
 
@@ -6,9 +8,24 @@ from .enums import StatusEnum
 class ProductOrderLink(SQLModel, table=True):
     """
     Association table for many-to-many relationship between Order and Product.
-    Includes quantity field to store how many of each product are in an order.
+    Includes quantity field to store how many of each product are in an order,
+    and the product's name and price at purchase time, so order history is
+    read from this table alone and is unaffected by later catalog edits.
     """
 
+    # Order lines are read by order id; on Postgres the index also carries
+    # the line columns so history reads are index-only scans
+    __table_args__ = (
+        Index(
+            "ix_productorderlink_order_id_product_id",
+            "order_id",
+            "product_id",
+            postgresql_include=["quantity", "unit_price", "product_name"],
+        ),
+        # Lines by product; the primary key leads with order_id
+        Index("ix_productorderlink_product_id", "product_id"),
+    )
+
     order_id: Optional[int] = Field(
         default=None, foreign_key="order.id", primary_key=True
     )
@@ -16,14 +33,37 @@ class ProductOrderLink(SQLModel, table=True):
         default=None, foreign_key="product.id", primary_key=True
     )
     quantity: int = Field(default=1)
+    unit_price: float
+    product_name: str
+
+    # Read-only navigation to the live product, when its current state matters
+    product: "Product" = Relationship(sa_relationship_kwargs={"viewonly": True})
 
 
 class Product(SQLModel, table=True):
+    # Indexes backing the keyset-paginated catalog filters (GET /products)
+    __table_args__ = (
+        Index("ix_product_price_id", "price", "id"),
+        # Low-stock report (GET /analytics/low-stock)
+        Index("ix_product_stock_id", "stock", "id"),
+        Index(
+            "ix_product_in_stock_id",
+            "id",
+            postgresql_where=text("stock > 0"),
+            sqlite_where=text("stock > 0"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True)
     name: str
     description: str
     price: float
     stock: int
+    # Stock kept in ProductStockShard rows; `stock` is then their total as of
+    # the last rebalance
+    stock_sharded: bool = Field(
+        default=False, sa_column_kwargs={"server_default": false()}
+    )
 
     # Relationship back to Order via the link table
     orders: List["Order"] = Relationship(
@@ -31,12 +71,187 @@ class Product(SQLModel, table=True):
     )
 
 
+class ProductStockShard(SQLModel, table=True):
+    """
+    One of the counters holding the stock of a product in sharded mode.
+    Orders decrement a single shard, so concurrent orders for the same
+    product rarely wait on the same row; the product's stock is the sum of
+    its shards.
+    """
+
+    product_id: Optional[int] = Field(
+        default=None, foreign_key="product.id", primary_key=True
+    )
+    shard: int = Field(primary_key=True)
+    stock: int
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Full-text search over product name and description, kept outside the
+# model's columns because each backend indexes it differently. Postgres: a
+# weighted tsvector column maintained by a trigger, with a GIN index.
+# SQLite: an external-content FTS5 table kept in sync by triggers. Triggers
+# fire only when name or description change, so stock updates skip them.
+PRODUCT_SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE product ADD COLUMN search_vector tsvector",
+        """
+        CREATE OR REPLACE FUNCTION product_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER product_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description ON product
+        FOR EACH ROW EXECUTE FUNCTION product_search_vector_update()
+        """,
+        "CREATE INDEX ix_product_search_vector ON product USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE product_fts USING fts5(
+            name, description, content='product', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER product_fts_insert AFTER INSERT ON product BEGIN
+            INSERT INTO product_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER product_fts_delete AFTER DELETE ON product BEGIN
+            INSERT INTO product_fts (product_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER product_fts_update AFTER UPDATE OF name, description
+        ON product BEGIN
+            INSERT INTO product_fts (product_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO product_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in PRODUCT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Product.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+# The FTS5 table outlives a dropped product table otherwise
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS product_fts").execute_if(dialect="sqlite"),
+)
+
+
 class Order(SQLModel, table=True):
+    # Orders not yet folded into the sales rollups, found without a scan
+    __table_args__ = (
+        Index(
+            "ix_order_unrecorded_sales",
+            "id",
+            postgresql_where=text("NOT sales_recorded"),
+            sqlite_where=text("NOT sales_recorded"),
+        ),
+        # GET /orders?status=... pages by id within a status
+        Index("ix_order_status_id", "status", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True)
     total_price: float = Field(default=0.0)
     status: StatusEnum = Field(default=StatusEnum.pending)
+    created_at: datetime = Field(
+        default_factory=_utcnow, sa_type=DateTime(timezone=True)
+    )
+    # Set once the sales compactor has added the order to the rollups
+    sales_recorded: bool = Field(default=False)
 
     # Relationship to Product via the link table
     products: List[Product] = Relationship(
         back_populates="orders", link_model=ProductOrderLink
     )
+    # Order lines with their quantities; read-only, links are written directly
+    lines: List[ProductOrderLink] = Relationship(
+        sa_relationship_kwargs={
+            "viewonly": True,
+            "order_by": "ProductOrderLink.product_id",
+        }
+    )
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Outcome of a POST /orders request sent with an Idempotency-Key header,
+    replayed for retries of the same request until it expires. A row with
+    no status_code is a request still in flight; once its claim is older
+    than the lease, a retry takes it over.
+    """
+
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    status_code: Optional[int] = None
+    response_body: Optional[str] = None
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    claimed_at: datetime = Field(
+        default_factory=_utcnow, sa_type=DateTime(timezone=True)
+    )
+
+
+class OrderQueueEntry(SQLModel, table=True):
+    """
+    Write-behind queue of pending orders. An entry is written in the same
+    transaction as its order and deleted in the one that finalizes it, so
+    an order can be neither lost nor finalized twice.
+    """
+
+    order_id: Optional[int] = Field(
+        default=None, foreign_key="order.id", primary_key=True
+    )
+    enqueued_at: datetime = Field(sa_type=DateTime(timezone=True))
+
+
+class ProductSales(SQLModel, table=True):
+    """
+    Running totals of units sold and revenue per product, maintained by the
+    sales compactor from order lines.
+    """
+
+    # Top sellers by either measure are read straight off an index
+    __table_args__ = (
+        Index("ix_productsales_units_sold", "units_sold", "product_id"),
+        Index("ix_productsales_revenue", "revenue", "product_id"),
+    )
+
+    product_id: Optional[int] = Field(
+        default=None, foreign_key="product.id", primary_key=True
+    )
+    units_sold: int = Field(default=0)
+    revenue: float = Field(default=0.0)
+
+
+class DailySales(SQLModel, table=True):
+    """
+    Orders, units and revenue per UTC day, maintained by the sales compactor.
+    """
+
+    day: date = Field(primary_key=True)
+    orders: int = Field(default=0)
+    units_sold: int = Field(default=0)
+    revenue: float = Field(default=0.0)
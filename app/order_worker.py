@@ -0,0 +1,50 @@
+"""
+Standalone order queue worker, for running finalization outside the web
+processes (set ORDER_WORKERS=0 there).
+
+Usage:
+    python -m app.order_worker
+"""
+
+import logging
+import signal
+import threading
+
+from app.config import load_environment
+
+# Named explicitly: run with -m, __name__ is "__main__"
+logger = logging.getLogger("app.order_worker")
+
+
+def main() -> None:
+    load_environment()
+    from app.database import get_engine
+    from app.logging_config import configure_logging
+    from app.services.order_queue_service import (
+        ORDER_BATCH_SIZE,
+        ORDER_POLL_INTERVAL,
+        drain_order_queue,
+    )
+
+    configure_logging()
+    stopping = threading.Event()
+    # Finish the batch in progress, then exit
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stopping.set())
+
+    logger.info("Order worker started", extra={"batch_size": ORDER_BATCH_SIZE})
+    while not stopping.is_set():
+        try:
+            processed = drain_order_queue(
+                get_engine(), ORDER_BATCH_SIZE, stopping.is_set
+            )
+            if processed:
+                logger.debug("Finalized queued orders", extra={"orders": processed})
+        except Exception:
+            logger.exception("Order worker failed; retrying after the poll interval")
+        stopping.wait(ORDER_POLL_INTERVAL)
+    logger.info("Order worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds (milliseconds) of the pool checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+# Weight of each checkout in the moving average of recent waits
+RECENT_WAIT_WEIGHT = 0.2
+
+
+class PoolStats:
+    """
+    Counters and a checkout wait histogram for one connection pool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[QueuePool] = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_hits = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_sum_ms = 0.0
+        # Exponentially weighted average of recent checkout waits
+        self.recent_wait_ms = 0.0
+
+    def _observe_wait(self, wait_ms: float) -> None:
+        self.recent_wait_ms += RECENT_WAIT_WEIGHT * (wait_ms - self.recent_wait_ms)
+
+    def observe_checkout(self, wait_seconds: float, overflowed: bool) -> None:
+        wait_ms = wait_seconds * 1000
+        index = next(
+            (i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound),
+            len(WAIT_BUCKETS_MS),
+        )
+        with self._lock:
+            self.checkouts += 1
+            self.overflow_hits += overflowed
+            self.wait_buckets[index] += 1
+            self.wait_sum_ms += wait_ms
+            self._observe_wait(wait_ms)
+
+    def observe_timeout(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self._observe_wait(wait_seconds * 1000)
+
+    def observe_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def observe_close(self) -> None:
+        with self._lock:
+            self.connections_closed += 1
+
+    def snapshot(self) -> dict:
+        """
+        Point-in-time view of the pool gauges and cumulative counters.
+        """
+        pool = self.pool
+        with self._lock:
+            buckets, cumulative = {}, 0
+            for bound, count in zip(WAIT_BUCKETS_MS + ("+Inf",), self.wait_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "pool_size": pool.size() if pool else 0,
+                "checked_out": pool.checkedout() if pool else 0,
+                "checked_in": pool.checkedin() if pool else 0,
+                "overflow": max(pool.overflow(), 0) if pool else 0,
+                "checkouts": self.checkouts,
+                "overflow_hits": self.overflow_hits,
+                "timeouts": self.timeouts,
+                "recent_wait_ms": round(self.recent_wait_ms, 3),
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "wait_ms": {
+                    "buckets": buckets,
+                    "count": self.checkouts,
+                    "sum": round(self.wait_sum_ms, 3),
+                },
+            }
+
+
+# One entry per instrumented engine, e.g. "primary" and "primary_async"
+POOL_STATS: dict[str, PoolStats] = {}
+
+
+class _TimedCheckoutMixin:
+    """
+    Times how long each checkout waits on the pool queue and records whether
+    it had to open an overflow connection.
+    """
+
+    stats: PoolStats
+
+    def _do_get(self):
+        self.stats.pool = self
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe_timeout(time.perf_counter() - start)
+            raise
+        overflowed = self._overflow > max(overflow_before, 0)
+        self.stats.observe_checkout(time.perf_counter() - start, overflowed)
+        return connection
+
+
+def instrumented_pool_class(base: type[QueuePool], name: str) -> type[Pool]:
+    """
+    Build a subclass of a queue pool that reports into POOL_STATS[name].
+    The stats live on the class, so they survive Pool.recreate().
+    """
+    stats = POOL_STATS.setdefault(name, PoolStats(name))
+    pool_class = type(
+        f"Instrumented{base.__name__}", (_TimedCheckoutMixin, base), {"stats": stats}
+    )
+    event.listen(pool_class, "connect", lambda *args: stats.observe_connect())
+    event.listen(pool_class, "close", lambda *args: stats.observe_close())
+    return pool_class
+
+
+def snapshot_all() -> dict:
+    """
+    Snapshot of every instrumented pool, keyed by engine name.
+    """
+    return {name: stats.snapshot() for name, stats in POOL_STATS.items()}
@@ -0,0 +1,32 @@
+"""
+Recompute the sales rollups (ProductSales, DailySales) from every order line
+and print the totals before and after, to verify the incremental ones.
+Pending orders are compacted first, so any difference is drift.
+
+Usage:
+    python -m app.rebuild_sales
+"""
+
+import json
+
+from app.config import load_environment
+
+
+def main() -> None:
+    load_environment()
+    from sqlmodel import Session
+
+    from app.database import get_engine
+    from app.logging_config import configure_logging
+    from app.services.analytics_service import compact_sales, rebuild_sales_rollups
+
+    configure_logging()
+    with Session(get_engine()) as session:
+        compact_sales(session)
+        result = rebuild_sales_rollups(session)
+    result["matched"] = result["before"] == result["after"]
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
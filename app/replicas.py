@@ -0,0 +1,239 @@
+"""
+Read/write session routing across the primary and its read replicas.
+
+Read-only endpoints take their session from get_read_session (or
+get_async_read_session), which balances round-robin over the healthy
+replicas listed in DATABASE_REPLICA_URLS. Writes, and reads that must see a
+just-committed write, use the primary through get_session: a request goes to
+the primary when it sends `X-Read-Primary: 1` or carries the cookie set by
+ReadYourWritesMiddleware after the client's last write. With no replicas
+configured every read uses the primary.
+
+A replica is taken out of rotation for REPLICA_RETRY_INTERVAL seconds when
+a connection to it fails or when the periodic health check finds it down or
+lagging by more than REPLICA_MAX_LAG seconds.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from functools import cached_property, lru_cache
+from typing import Optional
+
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import engine_options, get_async_session, get_session, to_async_url
+
+# Comma-separated SQLAlchemy URLs of read replicas; empty reads the primary
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# Seconds a failed replica stays out of rotation before it is tried again
+REPLICA_RETRY_INTERVAL = float(os.getenv("REPLICA_RETRY_INTERVAL", "30"))
+# Seconds between replica health checks; 0 disables them
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+# Replication lag (seconds, Postgres only) above which a replica is skipped;
+# 0 ignores lag
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "0"))
+# Seconds a client's reads stick to the primary after it writes; 0 disables
+READ_PRIMARY_AFTER_WRITE = int(os.getenv("READ_PRIMARY_AFTER_WRITE", "5"))
+
+READ_PRIMARY_HEADER = "x-read-primary"
+READ_PRIMARY_COOKIE = "read_primary"
+# Session.info key naming the replica a read session is bound to
+REPLICA_INFO_KEY = "replica"
+
+_LAG_QUERY = text(
+    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """
+    One read replica: its engines (the async one built on first use) and
+    when it may be used again after a failure.
+    """
+
+    def __init__(self, url: str, name: str):
+        self.url = url
+        self.name = name
+        self.engine: Engine = create_engine(
+            url, echo=False, **engine_options(name, url)
+        )
+        self.retry_at = 0.0
+
+    @cached_property
+    def async_engine(self) -> AsyncEngine:
+        return create_async_engine(
+            to_async_url(self.url),
+            echo=False,
+            **engine_options(f"{self.name}_async", self.url, async_driver=True),
+        )
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def mark_down(self, reason: str) -> None:
+        if self.healthy:
+            logger.warning(
+                "Replica out of rotation",
+                extra={
+                    "replica": self.name,
+                    "reason": reason,
+                    "retry_in": REPLICA_RETRY_INTERVAL,
+                },
+            )
+        self.retry_at = time.monotonic() + REPLICA_RETRY_INTERVAL
+
+    def mark_up(self) -> None:
+        if not self.healthy:
+            logger.info("Replica back in rotation", extra={"replica": self.name})
+        self.retry_at = 0.0
+
+    def check(self) -> None:
+        """
+        Ping the replica and, on Postgres, compare its replay lag with
+        REPLICA_MAX_LAG; update its health either way.
+        """
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                if REPLICA_MAX_LAG and self.engine.dialect.name == "postgresql":
+                    lag = connection.execute(_LAG_QUERY).scalar_one()
+                    if lag > REPLICA_MAX_LAG:
+                        self.mark_down(f"lagging {lag:.1f}s")
+                        return
+        except DBAPIError as exc:
+            self.mark_down(type(exc.orig).__name__)
+            return
+        self.mark_up()
+
+
+class ReplicaSet:
+    """
+    The configured replicas, handed out round-robin while healthy.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.replicas = [
+            Replica(url, f"replica{index}") for index, url in enumerate(urls, 1)
+        ]
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self) -> Optional[Replica]:
+        """
+        The next healthy replica, or None when the primary must serve the read.
+        """
+        if not self.replicas:
+            return None
+        with self._lock:
+            start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            replica.check()
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            if "async_engine" in vars(replica):
+                await replica.async_engine.dispose()
+
+
+@lru_cache
+def get_replica_set() -> ReplicaSet:
+    """
+    Replicas from DATABASE_REPLICA_URLS, connected on first use.
+    """
+    return ReplicaSet(DATABASE_REPLICA_URLS)
+
+
+def reads_primary(request: Request) -> bool:
+    """
+    Whether this request asked, or recently wrote and so needs, to read the
+    primary.
+    """
+    return (
+        request.headers.get(READ_PRIMARY_HEADER) == "1"
+        or READ_PRIMARY_COOKIE in request.cookies
+    )
+
+
+def reads_replica(session: Session | AsyncSession) -> bool:
+    """
+    Whether the session reads a replica, whose rows may lag the primary.
+    """
+    return REPLICA_INFO_KEY in session.info
+
+
+def get_read_session(
+    request: Request,
+    session: Session = Depends(get_session),
+    replicas: ReplicaSet = Depends(get_replica_set),
+):
+    """
+    Session for read-only endpoints: a healthy replica, or the primary
+    session when there is none or the request must read the primary. The
+    primary session connects only if it is used.
+    """
+    replica = None if reads_primary(request) else replicas.choose()
+    if replica is None:
+        yield session
+        return
+    with Session(replica.engine, info={REPLICA_INFO_KEY: replica.name}) as read_session:
+        try:
+            yield read_session
+        except DBAPIError:
+            # Only a failed ping takes the replica out; a bad query does not
+            replica.check()
+            raise
+
+
+async def get_async_read_session(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    replicas: ReplicaSet = Depends(get_replica_set),
+):
+    """
+    Async counterpart of get_read_session.
+    """
+    replica = None if reads_primary(request) else replicas.choose()
+    if replica is None:
+        yield session
+        return
+    async with AsyncSession(
+        replica.async_engine, info={REPLICA_INFO_KEY: replica.name}
+    ) as read_session:
+        try:
+            yield read_session
+        except DBAPIError:
+            await run_in_threadpool(replica.check)
+            raise
+
+
+async def dispose_replicas() -> None:
+    """
+    Close the replicas' pooled connections, if the replica set was created.
+    """
+    if get_replica_set.cache_info().currsize:
+        await get_replica_set().dispose()
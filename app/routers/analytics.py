@@ -0,0 +1,104 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.replicas import get_async_read_session, get_read_session
+from app.enums import SalesBucketEnum, TopSellerSortEnum
+from app.schemas import LowStockRead, RevenueBucketRead, TopSellerRead
+from app.services.analytics_service import (
+    LOW_STOCK_THRESHOLD,
+    low_stock,
+    low_stock_async,
+    revenue_by_bucket,
+    revenue_by_bucket_async,
+    top_sellers,
+    top_sellers_async,
+)
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Same routes served by async handlers on the async engine (ASYNC_DB=1)
+async_router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/top-sellers", response_model=list[TopSellerRead])
+def read_top_sellers(
+    limit: int = Query(default=10, ge=1, le=100),
+    sort: TopSellerSortEnum = TopSellerSortEnum.units,
+    session: Session = Depends(get_read_session),
+):
+    """
+    Best-selling products by units sold or revenue.
+    Served from the sales rollups, so recent orders appear after the next
+    compaction.
+    """
+    return top_sellers(session, limit, sort)
+
+
+@router.get("/revenue", response_model=list[RevenueBucketRead])
+def read_revenue(
+    bucket: SalesBucketEnum = SalesBucketEnum.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    session: Session = Depends(get_read_session),
+):
+    """
+    Orders, units and revenue per day, week or month (UTC), from `start` to
+    `end` inclusive; the last 30 days by default.
+    """
+    return revenue_by_bucket(session, bucket, start, end)
+
+
+@router.get("/low-stock", response_model=list[LowStockRead])
+def read_low_stock(
+    threshold: int = Query(default=LOW_STOCK_THRESHOLD, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Products with stock at or below `threshold`, emptiest first.
+    """
+    return low_stock(session, threshold, limit)
+
+
+@async_router.get("/top-sellers", response_model=list[TopSellerRead])
+async def read_top_sellers_async(
+    limit: int = Query(default=10, ge=1, le=100),
+    sort: TopSellerSortEnum = TopSellerSortEnum.units,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Best-selling products by units sold or revenue.
+    Served from the sales rollups, so recent orders appear after the next
+    compaction.
+    """
+    return await top_sellers_async(session, limit, sort)
+
+
+@async_router.get("/revenue", response_model=list[RevenueBucketRead])
+async def read_revenue_async(
+    bucket: SalesBucketEnum = SalesBucketEnum.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Orders, units and revenue per day, week or month (UTC), from `start` to
+    `end` inclusive; the last 30 days by default.
+    """
+    return await revenue_by_bucket_async(session, bucket, start, end)
+
+
+@async_router.get("/low-stock", response_model=list[LowStockRead])
+async def read_low_stock_async(
+    threshold: int = Query(default=LOW_STOCK_THRESHOLD, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Products with stock at or below `threshold`, emptiest first.
+    """
+    return await low_stock_async(session, threshold, limit)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app.cache import get_product_cache
+from app.database import get_session
+from app.pool_stats import snapshot_all
+from app.services.order_queue_service import queue_depth
+
+# Operational endpoints; kept out of the public OpenAPI schema
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
+
+
+@router.get("/pool")
+def read_pool_stats():
+    """
+    Connection pool gauges, counters and checkout wait histogram per engine
+    created so far (engines are built on first use).
+    """
+    return snapshot_all()
+
+
+@router.get("/cache")
+def read_cache_stats():
+    """
+    Product cache hit, miss and eviction counters.
+    """
+    return get_product_cache().stats()
+
+
+@router.get("/order-queue")
+def read_order_queue(session: Session = Depends(get_session)):
+    """
+    Depth of the order write-behind queue and age of its oldest entry.
+    """
+    return queue_depth(session)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import PROMETHEUS_MEDIA_TYPE, render_prometheus
+
+# Prometheus scrape endpoint; kept out of the public OpenAPI schema
+router = APIRouter(tags=["internal"], include_in_schema=False)
+
+
+@router.get("/metrics")
+def read_metrics():
+    """
+    Request, connection pool and cache metrics in Prometheus text format.
+    """
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_MEDIA_TYPE)
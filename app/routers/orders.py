@@ -1,17 +1,223 @@
-from fastapi import APIRouter, Depends, status
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
-from app.schemas import OrderCreate, OrderRead
+from app.database import get_async_session, get_session
+from app.replicas import get_async_read_session, get_read_session
+from app.enums import StatusEnum
+from app.limits import admit_order
+from app.schemas import OrderCreate, OrderFilter, OrderRead, OrderStatusRead
 from app.services.order_service import create_order as create_order_service
+from app.services.order_service import (
+    create_order_async,
+    get_order,
+    get_order_async,
+    list_orders,
+    list_orders_async,
+)
+from app.services.idempotency_service import idempotent_call, idempotent_call_async
+from app.services.order_queue_service import (
+    get_order_status,
+    get_order_status_async,
+    queue_enabled,
+)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Same routes served by async handlers on the async engine (ASYNC_DB=1)
+async_router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+IdempotencyKeyHeader = Annotated[
+    Optional[str],
+    Header(
+        max_length=255,
+        description="Retries with the same key replay the first response.",
+    ),
+]
+
+
+def _serialize_order(order) -> dict:
+    return OrderRead.model_validate(order).model_dump(mode="json")
+
+
+# Documents the 202 answered instead of 201 when the order queue is enabled
+_QUEUED_RESPONSE = {
+    status.HTTP_202_ACCEPTED: {
+        "model": OrderRead,
+        "description": "Order accepted as pending; poll its status URL "
+        "(Location header) until it is completed.",
+    }
+}
 
-@router.post("", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
-def create_new_order(order_data: OrderCreate, session: Session = Depends(get_session)):
+_ADMISSION_RESPONSES = {
+    status.HTTP_429_TOO_MANY_REQUESTS: {
+        "description": "This client is over its order rate; retry after "
+        "Retry-After seconds."
+    },
+    status.HTTP_503_SERVICE_UNAVAILABLE: {
+        "description": "Too many orders in progress; retry after Retry-After "
+        "seconds."
+    },
+}
+
+
+def _created_status() -> int:
+    return status.HTTP_202_ACCEPTED if queue_enabled() else status.HTTP_201_CREATED
+
+
+def _created_response(order, response: Response):
+    """
+    Answer a queued (pending) order with 202 and where to poll its status.
+    """
+    if order.status == StatusEnum.pending:
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = f"/orders/{order.id}/status"
+    return order
+
+
+def _status_location(status_code: int, body: dict) -> dict[str, str]:
+    """
+    Where to poll a queued order, for idempotent responses and their replays.
+    """
+    if status_code == status.HTTP_202_ACCEPTED:
+        return {"Location": f"/orders/{body['id']}/status"}
+    return {}
+
+
+def _page_response(orders: list, filters: OrderFilter, response: Response):
+    """
+    Advertise the next keyset cursor when the page is full.
+    """
+    if len(orders) == filters.limit:
+        response.headers["X-Next-Cursor"] = str(orders[-1].id)
+    return orders
+
+
+@router.post(
+    "",
+    response_model=OrderRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={**_QUEUED_RESPONSE, **_ADMISSION_RESPONSES},
+    dependencies=[Depends(admit_order)],
+)
+def create_new_order(
+    order_data: OrderCreate,
+    response: Response,
+    session: Session = Depends(get_session),
+    idempotency_key: IdempotencyKeyHeader = None,
+):
     """
     Place an order for a list of selected products.
     Validation, stock checks, and creation happen in the service layer.
+    Send an Idempotency-Key header to make retries safe.
+    With the order queue enabled the order is answered with 202 as pending.
+    """
+    if idempotency_key is None:
+        return _created_response(create_order_service(session, order_data), response)
+    return idempotent_call(
+        session,
+        idempotency_key,
+        order_data,
+        lambda record: create_order_service(session, order_data, record),
+        _serialize_order,
+        _created_status(),
+        _status_location,
+    )
+
+
+@router.get("", response_model=list[OrderRead])
+def read_orders(
+    response: Response,
+    filters: Annotated[OrderFilter, Query()],
+    session: Session = Depends(get_read_session),
+):
+    """
+    Retrieve a page of orders with their line items.
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
+    return _page_response(list_orders(session, filters), filters, response)
+
+
+@router.get("/{order_id}", response_model=OrderRead)
+def read_order(order_id: int, session: Session = Depends(get_read_session)):
+    """
+    Retrieve a single order with its line items.
+    """
+    return get_order(session, order_id)
+
+
+@router.get("/{order_id}/status", response_model=OrderStatusRead)
+def read_order_status(order_id: int, session: Session = Depends(get_read_session)):
+    """
+    Poll the processing status of an order accepted with 202.
+    """
+    return get_order_status(session, order_id)
+
+
+@async_router.post(
+    "",
+    response_model=OrderRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={**_QUEUED_RESPONSE, **_ADMISSION_RESPONSES},
+    dependencies=[Depends(admit_order)],
+)
+async def create_new_order_async(
+    order_data: OrderCreate,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    idempotency_key: IdempotencyKeyHeader = None,
+):
+    """
+    Place an order for a list of selected products.
+    Validation, stock checks, and creation happen in the service layer.
+    Send an Idempotency-Key header to make retries safe.
+    With the order queue enabled the order is answered with 202 as pending.
+    """
+    if idempotency_key is None:
+        order = await create_order_async(session, order_data)
+        return _created_response(order, response)
+    return await idempotent_call_async(
+        session,
+        idempotency_key,
+        order_data,
+        lambda record: create_order_async(session, order_data, record),
+        _serialize_order,
+        _created_status(),
+        _status_location,
+    )
+
+
+@async_router.get("", response_model=list[OrderRead])
+async def read_orders_async(
+    response: Response,
+    filters: Annotated[OrderFilter, Query()],
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Retrieve a page of orders with their line items.
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
+    return _page_response(await list_orders_async(session, filters), filters, response)
+
+
+@async_router.get("/{order_id}", response_model=OrderRead)
+async def read_order_async(
+    order_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Retrieve a single order with its line items.
+    """
+    return await get_order_async(session, order_id)
+
+
+@async_router.get("/{order_id}/status", response_model=OrderStatusRead)
+async def read_order_status_async(
+    order_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Poll the processing status of an order accepted with 202.
     """
-    return create_order_service(session, order_data)
+    return await get_order_status_async(session, order_id)
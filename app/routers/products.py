@@ -1,20 +1,131 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
-from app.schemas import ProductCreate, ProductRead
-from app.services.product_service import list_products, create_product
+from app.cache import CATALOG_CACHE_CONTROL, get_product_cache
+from app.database import get_async_session, get_session
+from app.replicas import get_async_read_session, get_read_session
+from app.enums import ExportFormatEnum
+from app.schemas import (
+    BulkProductResult,
+    ProductCreate,
+    ProductFilter,
+    ProductRead,
+    ProductSearch,
+)
+from app.serialization import FastJSONResponse
+from app.services.bulk_service import (
+    NDJSON_MEDIA_TYPE,
+    ingest_products,
+    ingest_products_async,
+    iter_bulk_payload,
+)
+from app.services.export_service import (
+    EXPORT_MEDIA_TYPES,
+    export_products,
+    export_products_async,
+)
+from app.services.product_service import (
+    create_product,
+    create_product_async,
+    get_product,
+    get_product_async,
+    list_products,
+    list_products_async,
+)
+from app.services.search_service import search_products, search_products_async
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Same routes served by async handlers on the async engine (ASYNC_DB=1)
+async_router = APIRouter(prefix="/products", tags=["products"])
+
+
+def _not_modified(request: Request, response: Response) -> Optional[Response]:
+    """
+    Set catalog caching headers and answer If-None-Match with 304 from the
+    catalog version alone, before any product is loaded.
+    """
+    etag = get_product_cache().catalog_etag()
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+
+def _page_response(
+    products: list, filters: ProductFilter, response: Response
+) -> FastJSONResponse:
+    """
+    Advertise the next keyset cursor when the page is full. Rows come
+    straight from the database (or the cache) as plain dicts, so they are
+    encoded directly instead of being validated against ProductRead again;
+    this also lets sparse field selections through.
+    """
+    if len(products) == filters.limit:
+        response.headers["X-Next-Cursor"] = str(products[-1]["id"])
+    return FastJSONResponse(products, headers=dict(response.headers))
+
+
+def _search_response(
+    products: list, search: ProductSearch, response: Response
+) -> FastJSONResponse:
+    """
+    Advertise the position of the next page of ranked results when the page
+    is full.
+    """
+    if len(products) == search.limit:
+        response.headers["X-Next-Cursor"] = str((search.cursor or 0) + search.limit)
+    return FastJSONResponse(products, headers=dict(response.headers))
+
+
+# The body is parsed by the service so invalid rows become per-row errors
+# instead of failing the whole request; document it for OpenAPI by hand.
+_BULK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": ProductCreate.model_json_schema()}
+            },
+            NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+        },
+    }
+}
+
+
+def _export_response(chunks, fmt: ExportFormatEnum) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="products.{fmt.value}"'},
+    )
+
 
 @router.get("", response_model=list[ProductRead])
-def read_products(session: Session = Depends(get_session)):
+def read_products(
+    request: Request,
+    response: Response,
+    filters: Annotated[ProductFilter, Query()],
+    session: Session = Depends(get_read_session),
+):
     """
-    Retrieve a list of all available products.
+    Retrieve a page of products, optionally filtered by price and stock.
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    Send the ETag back as If-None-Match to get 304 when nothing changed.
     """
-    print("DEBUG: Using DB:", session.bind.url)
-    return list_products(session)
+    not_modified = _not_modified(request, response)
+    if not_modified:
+        return not_modified
+    return _page_response(list_products(session, filters), filters, response)
 
 
 @router.post("", response_model=ProductRead, status_code=201)
@@ -23,3 +134,131 @@ def add_product(product_data: ProductCreate, session: Session = Depends(get_sess
     Add a new product to the platform.
     """
     return create_product(session, product_data)
+
+
+@router.post(
+    "/bulk", response_model=BulkProductResult, openapi_extra=_BULK_REQUEST_BODY
+)
+async def add_products_bulk(request: Request, session: Session = Depends(get_session)):
+    """
+    Add many products from a JSON array or an NDJSON stream.
+    Rows are validated with the same rules as POST /products and inserted in
+    chunks; rejected rows are reported by index without aborting the batch.
+    """
+    return await ingest_products(session, iter_bulk_payload(request))
+
+
+@router.get("/export")
+def export_catalog(
+    fmt: ExportFormatEnum = Query(ExportFormatEnum.ndjson, alias="format"),
+    after: Optional[int] = Query(
+        None, description="Resume the export after this product id."
+    ),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Stream the full product catalog as NDJSON or CSV, ordered by id.
+    """
+    return _export_response(export_products(session.get_bind(), fmt, after), fmt)
+
+
+@router.get("/search", response_model=list[ProductRead])
+def search_catalog(
+    response: Response,
+    search: Annotated[ProductSearch, Query()],
+    session: Session = Depends(get_read_session),
+):
+    """
+    Full-text search over product names and descriptions, best match first.
+    Every word must match; pass X-Next-Cursor as `cursor` for the next page.
+    """
+    return _search_response(search_products(session, search), search, response)
+
+
+@router.get("/{product_id}", response_model=ProductRead)
+def read_product(product_id: int, session: Session = Depends(get_read_session)):
+    """
+    Retrieve a single product by id.
+    """
+    return get_product(session, product_id)
+
+
+@async_router.get("", response_model=list[ProductRead])
+async def read_products_async(
+    request: Request,
+    response: Response,
+    filters: Annotated[ProductFilter, Query()],
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Retrieve a page of products, optionally filtered by price and stock.
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    Send the ETag back as If-None-Match to get 304 when nothing changed.
+    """
+    not_modified = _not_modified(request, response)
+    if not_modified:
+        return not_modified
+    products = await list_products_async(session, filters)
+    return _page_response(products, filters, response)
+
+
+@async_router.post("", response_model=ProductRead, status_code=201)
+async def add_product_async(
+    product_data: ProductCreate, session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Add a new product to the platform.
+    """
+    return await create_product_async(session, product_data)
+
+
+@async_router.post(
+    "/bulk", response_model=BulkProductResult, openapi_extra=_BULK_REQUEST_BODY
+)
+async def add_products_bulk_async(
+    request: Request, session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Add many products from a JSON array or an NDJSON stream.
+    Rows are validated with the same rules as POST /products and inserted in
+    chunks; rejected rows are reported by index without aborting the batch.
+    """
+    return await ingest_products_async(session, iter_bulk_payload(request))
+
+
+@async_router.get("/export")
+async def export_catalog_async(
+    fmt: ExportFormatEnum = Query(ExportFormatEnum.ndjson, alias="format"),
+    after: Optional[int] = Query(
+        None, description="Resume the export after this product id."
+    ),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Stream the full product catalog as NDJSON or CSV, ordered by id.
+    """
+    return _export_response(export_products_async(session.bind, fmt, after), fmt)
+
+
+@async_router.get("/search", response_model=list[ProductRead])
+async def search_catalog_async(
+    response: Response,
+    search: Annotated[ProductSearch, Query()],
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Full-text search over product names and descriptions, best match first.
+    Every word must match; pass X-Next-Cursor as `cursor` for the next page.
+    """
+    products = await search_products_async(session, search)
+    return _search_response(products, search, response)
+
+
+@async_router.get("/{product_id}", response_model=ProductRead)
+async def read_product_async(
+    product_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Retrieve a single product by id.
+    """
+    return await get_product_async(session, product_id)
@@ -1,8 +1,20 @@
-from typing import List
-from pydantic import BaseModel, ConfigDict
+from datetime import date
+from typing import List, Optional
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    computed_field,
+    field_validator,
+)
 from app.enums import StatusEnum
 
 
+# Largest stock the product.stock INTEGER column holds
+MAX_STOCK = 2**31 - 1
+
+
 class ProductCreate(BaseModel):
     """
     Schema for creating a new product.
@@ -10,8 +22,8 @@ class ProductCreate(BaseModel):
 
     name: str
     description: str
-    price: float
-    stock: int
+    price: float = Field(allow_inf_nan=False)
+    stock: int = Field(le=MAX_STOCK)
 
 
 class ProductRead(BaseModel):
@@ -24,6 +36,83 @@ class ProductRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkRowError(BaseModel):
+    """
+    A rejected row of a bulk product upload, by zero-based position.
+    """
+
+    index: int
+    detail: str
+
+
+class BulkProductResult(BaseModel):
+    """
+    Outcome of a bulk product upload; valid rows are inserted even when
+    others are rejected.
+    """
+
+    inserted: int = 0
+    errors: List[BulkRowError] = []
+
+
+class ProductFilter(BaseModel):
+    """
+    Query parameters for listing products: keyset pagination on id,
+    price and stock filters, and sparse field selection.
+    """
+
+    cursor: Optional[int] = Field(
+        default=None,
+        description="Return products with an id greater than this value "
+        "(the X-Next-Cursor header of the previous page).",
+    )
+    limit: int = Field(default=100, ge=1, le=1000)
+    min_price: Optional[float] = Field(default=None, ge=0)
+    max_price: Optional[float] = Field(default=None, ge=0)
+    in_stock: Optional[bool] = None
+    fields: Optional[str] = Field(
+        default=None,
+        description="Comma-separated product fields to return, e.g. id,name,price.",
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
+        unknown = set(value.split(",")) - set(ProductRead.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown product fields: {', '.join(sorted(unknown))}")
+        return value
+
+    def field_names(self) -> List[str]:
+        """
+        Selected fields in ProductRead order (all of them when `fields` is
+        unset); id is always included because it is the pagination cursor.
+        """
+        if not self.fields:
+            return list(ProductRead.model_fields)
+        requested = set(self.fields.split(",")) | {"id"}
+        return [name for name in ProductRead.model_fields if name in requested]
+
+
+class ProductSearch(BaseModel):
+    """
+    Query parameters for full-text product search. Results are ranked, so
+    pages are addressed by position rather than by id.
+    """
+
+    q: str = Field(min_length=1, max_length=200, description="Words to search for.")
+    cursor: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=10_000,
+        description="Number of ranked results to skip "
+        "(the X-Next-Cursor header of the previous page).",
+    )
+    limit: int = Field(default=20, ge=1, le=100)
+
+
 class OrderItem(BaseModel):
     """
     Schema representing an item in an order.
@@ -41,6 +130,56 @@ class OrderCreate(BaseModel):
     products: List[OrderItem]
 
 
+class OrderFilter(BaseModel):
+    """
+    Query parameters for listing orders: keyset pagination on id and status.
+    """
+
+    cursor: Optional[int] = Field(
+        default=None,
+        description="Return orders with an id greater than this value "
+        "(the X-Next-Cursor header of the previous page).",
+    )
+    limit: int = Field(default=50, ge=1, le=500)
+    status: Optional[StatusEnum] = None
+
+
+class OrderedProductRead(BaseModel):
+    """
+    A product as it was when the order was placed.
+    """
+
+    id: int
+    name: str
+    price: float
+
+
+class OrderLineRead(BaseModel):
+    """
+    Schema for one line of an order: the product snapshot and how many were
+    ordered.
+    """
+
+    product_id: int
+    quantity: int
+    product_name: str
+    unit_price: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def line_total(self) -> float:
+        return self.unit_price * self.quantity
+
+    @computed_field
+    @property
+    def product(self) -> OrderedProductRead:
+        return OrderedProductRead(
+            id=self.product_id, name=self.product_name, price=self.unit_price
+        )
+
+
 class OrderRead(BaseModel):
     """
     Schema for reading order information.
@@ -49,6 +188,59 @@ class OrderRead(BaseModel):
     id: int
     total_price: float
     status: StatusEnum
-    products: List[ProductRead]
+    # Read from Order.lines on ORM objects
+    items: List[OrderLineRead] = Field(validation_alias=AliasChoices("items", "lines"))
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def products(self) -> List[OrderedProductRead]:
+        """
+        The ordered products without quantities, kept for existing clients.
+        """
+        return [item.product for item in self.items]
+
+
+class OrderStatusRead(BaseModel):
+    """
+    Processing status of an order accepted through the order queue.
+    """
+
+    id: int
+    status: StatusEnum
+    # Orders still queued ahead of this one; None once it left the queue
+    queued_ahead: Optional[int] = None
+
+
+class TopSellerRead(BaseModel):
+    """
+    A product's sales totals, as ranked by GET /analytics/top-sellers.
+    """
+
+    product_id: int
+    name: str
+    units_sold: int
+    revenue: float
+
+
+class RevenueBucketRead(BaseModel):
+    """
+    Sales totals for one day, week (starting Monday) or month.
+    """
+
+    start: date
+    orders: int
+    units_sold: int
+    revenue: float
+
+
+class LowStockRead(BaseModel):
+    """
+    A product at or below the low-stock threshold, with its units sold.
+    """
+
+    product_id: int
+    name: str
+    stock: int
+    units_sold: int
@@ -0,0 +1,31 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    # Optional: several times faster than the standard library encoder
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is missing
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode plain JSON data (dicts, lists, str, int, float, bool, None) to
+    compact UTF-8 bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse for trusted, already-plain data such as rows read from the
+    database. Returning it from a route skips response_model validation and
+    jsonable_encoder; the route's response_model still documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
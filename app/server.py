@@ -0,0 +1,169 @@
+"""
+Production server: pre-forked uvicorn workers sharing one listening socket.
+
+The parent process imports the app once (preload), creates the schema once,
+closes its database connections and forks WEB_WORKERS workers, so every
+worker opens its own pools after the fork. Workers that die are replaced.
+On SIGTERM each worker stops accepting connections, finishes in-flight
+requests (up to GRACEFUL_TIMEOUT seconds) and runs the lifespan teardown.
+
+Usage:
+    python -m app.server
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+from contextlib import suppress
+
+# Taken before the app is imported, so startup timings include the preload
+_STARTED = time.perf_counter()
+
+import uvicorn
+
+from app.config import load_environment
+
+# Named explicitly: run with -m, __name__ is "__main__"
+logger = logging.getLogger("app.server")
+
+
+def worker_count(workers: int) -> int:
+    return workers or os.cpu_count() or 1
+
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, graceful_timeout: int, backlog: int) -> None:
+    """
+    Body of a forked worker; never returns.
+    """
+    # uvicorn installs its own handlers and re-raises the signal once it has
+    # shut down; ignoring it then lets the worker exit with status 0
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    status = 0
+    try:
+        config = uvicorn.Config(
+            app,
+            lifespan="on",
+            timeout_graceful_shutdown=graceful_timeout,
+            backlog=backlog,
+            log_config=None,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker crashed")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+class Supervisor:
+    """
+    Forks the workers, replaces any that die, and forwards SIGTERM to them.
+    """
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout: int,
+        backlog: int,
+    ):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.children: set[int] = set()
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.app, self.sock, self.graceful_timeout, self.backlog)
+        self.children.add(pid)
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        # Ctrl+C already reached the whole process group
+        if signum == signal.SIGTERM:
+            for pid in self.children:
+                with suppress(ProcessLookupError):
+                    os.kill(pid, signal.SIGTERM)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            pid, status = os.wait()
+            self.children.discard(pid)
+            if not self.stopping:
+                logger.warning(
+                    "Worker exited; replacing it",
+                    extra={"pid": pid, "status": os.waitstatus_to_exitcode(status)},
+                )
+                time.sleep(0.1)
+                self.spawn()
+
+
+def main() -> None:
+    # Settings are read only now, so values from .env apply
+    load_environment()
+    # Worker processes; 0 starts one per CPU
+    web_workers = int(os.getenv("WEB_WORKERS", "0"))
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8000"))
+    # Seconds a worker waits for in-flight requests after SIGTERM
+    graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+    # Pending connections queued by the kernel before accept
+    backlog = int(os.getenv("BACKLOG", "2048"))
+
+    from app.database import get_engine, init_db
+    from app.logging_config import configure_logging
+    from app.main import get_app
+
+    configure_logging()
+    app = get_app()
+
+    preloaded = _elapsed_ms(_STARTED)
+    schema_started = time.perf_counter()
+    init_db()
+    # Connections must not be shared with the workers
+    get_engine().dispose()
+    schema_ms = _elapsed_ms(schema_started)
+
+    sock = _bind(host, port, backlog)
+    workers = worker_count(web_workers)
+    logger.info(
+        "Starting workers",
+        extra={
+            "workers": workers,
+            "address": f"{host}:{port}",
+            "preload_ms": preloaded,
+            "schema_ms": schema_ms,
+            "startup_ms": _elapsed_ms(_STARTED),
+        },
+    )
+    Supervisor(app, sock, workers, graceful_timeout, backlog).run()
+    logger.info("Server stopped")
+
+
+if __name__ == "__main__":
+    main()
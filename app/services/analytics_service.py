@@ -0,0 +1,312 @@
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.enums import SalesBucketEnum, TopSellerSortEnum
+from app.models import DailySales, Order, Product, ProductOrderLink, ProductSales
+from app.schemas import LowStockRead, RevenueBucketRead, TopSellerRead
+
+# Orders folded into the rollups per compactor transaction
+SALES_ROLLUP_BATCH = int(os.getenv("SALES_ROLLUP_BATCH", "1000"))
+# Default stock level at or below which a product is reported as low
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "10"))
+# Longest date range GET /analytics/revenue answers, in days
+REVENUE_MAX_DAYS = int(os.getenv("REVENUE_MAX_DAYS", "366"))
+
+
+def _upsert_totals(session: Session, model, key: str, rows: list[dict]) -> None:
+    """
+    Insert rollup rows, or add their counts to the existing rows, in one
+    atomic statement, so concurrent compactors never lose an increment.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    statement = insert(model).values(rows)
+    counters = [column for column in rows[0] if column != key]
+    statement = statement.on_conflict_do_update(
+        index_elements=[key],
+        set_={
+            column: getattr(model, column) + getattr(statement.excluded, column)
+            for column in counters
+        },
+    )
+    session.exec(statement)
+
+
+def _order_day(created_at: datetime) -> date:
+    # SQLite hands back naive datetimes; they were stored as UTC
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _record_sales_batch(session: Session, batch_size: int) -> int:
+    """
+    Add up to `batch_size` unrecorded orders to the rollups and flag them as
+    recorded, without committing. Concurrent compactors skip each other's
+    locked orders on Postgres. Returns how many orders were recorded.
+    """
+    orders = session.exec(
+        select(Order.id, Order.created_at)
+        .where(Order.sales_recorded == False)  # noqa: E712
+        .order_by(Order.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not orders:
+        return 0
+    order_days = {order_id: _order_day(created_at) for order_id, created_at in orders}
+    lines = session.exec(
+        select(
+            ProductOrderLink.order_id,
+            ProductOrderLink.product_id,
+            ProductOrderLink.quantity,
+            ProductOrderLink.unit_price,
+        ).where(ProductOrderLink.order_id.in_(order_days))
+    ).all()
+
+    products = defaultdict(lambda: {"units_sold": 0, "revenue": 0.0})
+    days = defaultdict(lambda: {"orders": 0, "units_sold": 0, "revenue": 0.0})
+    for day in order_days.values():
+        days[day]["orders"] += 1
+    for order_id, product_id, quantity, unit_price in lines:
+        revenue = quantity * unit_price
+        for totals in (products[product_id], days[order_days[order_id]]):
+            totals["units_sold"] += quantity
+            totals["revenue"] += revenue
+
+    _upsert_totals(
+        session,
+        ProductSales,
+        "product_id",
+        [{"product_id": key, **totals} for key, totals in products.items()],
+    )
+    _upsert_totals(
+        session,
+        DailySales,
+        "day",
+        [{"day": key, **totals} for key, totals in days.items()],
+    )
+    session.exec(
+        update(Order).where(Order.id.in_(order_days)).values(sales_recorded=True)
+    )
+    return len(orders)
+
+
+def compact_sales(session: Session, batch_size: int = SALES_ROLLUP_BATCH) -> int:
+    """
+    Fold every order placed since the last run into the sales rollups, one
+    committed batch at a time. Returns how many orders were recorded.
+    """
+    total = 0
+    while recorded := _record_sales_batch(session, batch_size):
+        session.commit()
+        total += recorded
+    session.rollback()
+    return total
+
+
+def sales_totals(session: Session) -> dict:
+    """
+    Grand totals held in the rollups, for comparing before and after a
+    rebuild.
+    """
+    units, revenue = session.exec(
+        select(
+            func.coalesce(func.sum(ProductSales.units_sold), 0),
+            func.coalesce(func.sum(ProductSales.revenue), 0.0),
+        )
+    ).one()
+    days, orders = session.exec(
+        select(func.count(), func.coalesce(func.sum(DailySales.orders), 0))
+    ).one()
+    return {
+        "orders": orders,
+        "units_sold": units,
+        "revenue": round(revenue, 2),
+        "days": days,
+    }
+
+
+def rebuild_sales_rollups(
+    session: Session, batch_size: int = SALES_ROLLUP_BATCH
+) -> dict:
+    """
+    Recompute the rollups from every order line in a single transaction and
+    return the totals before and after.
+    """
+    before = sales_totals(session)
+    session.exec(delete(ProductSales))
+    session.exec(delete(DailySales))
+    session.exec(update(Order).values(sales_recorded=False))
+    while _record_sales_batch(session, batch_size):
+        pass
+    session.commit()
+    return {"before": before, "after": sales_totals(session)}
+
+
+def _top_sellers_query(limit: int, sort: TopSellerSortEnum):
+    measure = (
+        ProductSales.revenue
+        if sort == TopSellerSortEnum.revenue
+        else ProductSales.units_sold
+    )
+    return (
+        select(
+            ProductSales.product_id,
+            Product.name,
+            ProductSales.units_sold,
+            ProductSales.revenue,
+        )
+        .join(Product, Product.id == ProductSales.product_id)
+        .order_by(measure.desc(), ProductSales.product_id)
+        .limit(limit)
+    )
+
+
+def _top_sellers(rows) -> list[TopSellerRead]:
+    return [
+        TopSellerRead(product_id=product_id, name=name, units_sold=units, revenue=rev)
+        for product_id, name, units, rev in rows
+    ]
+
+
+def top_sellers(
+    session: Session, limit: int, sort: TopSellerSortEnum = TopSellerSortEnum.units
+) -> list[TopSellerRead]:
+    """
+    The `limit` best-selling products by units or revenue, read from the
+    product rollup index.
+    """
+    return _top_sellers(session.exec(_top_sellers_query(limit, sort)).all())
+
+
+async def top_sellers_async(
+    session: AsyncSession,
+    limit: int,
+    sort: TopSellerSortEnum = TopSellerSortEnum.units,
+) -> list[TopSellerRead]:
+    """
+    Async counterpart of top_sellers.
+    """
+    return _top_sellers((await session.exec(_top_sellers_query(limit, sort))).all())
+
+
+def _revenue_range(start: Optional[date], end: Optional[date]) -> tuple[date, date]:
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= REVENUE_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be ordered and at most {REVENUE_MAX_DAYS} days.",
+        )
+    return start, end
+
+
+def _revenue_query(start: date, end: date):
+    return (
+        select(DailySales)
+        .where(DailySales.day >= start, DailySales.day <= end)
+        .order_by(DailySales.day)
+    )
+
+
+def _bucket_start(day: date, bucket: SalesBucketEnum) -> date:
+    if bucket == SalesBucketEnum.week:
+        return day - timedelta(days=day.weekday())
+    if bucket == SalesBucketEnum.month:
+        return day.replace(day=1)
+    return day
+
+
+def _revenue_buckets(days, bucket: SalesBucketEnum) -> list[RevenueBucketRead]:
+    buckets: dict[date, RevenueBucketRead] = {}
+    for row in days:
+        start = _bucket_start(row.day, bucket)
+        totals = buckets.setdefault(
+            start, RevenueBucketRead(start=start, orders=0, units_sold=0, revenue=0.0)
+        )
+        totals.orders += row.orders
+        totals.units_sold += row.units_sold
+        totals.revenue += row.revenue
+    return list(buckets.values())
+
+
+def revenue_by_bucket(
+    session: Session,
+    bucket: SalesBucketEnum = SalesBucketEnum.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list[RevenueBucketRead]:
+    """
+    Sales per day, week or month between `start` and `end` (inclusive; the
+    last 30 days by default), summed from the daily rollup. Buckets without
+    sales are omitted.
+    """
+    start, end = _revenue_range(start, end)
+    return _revenue_buckets(session.exec(_revenue_query(start, end)).all(), bucket)
+
+
+async def revenue_by_bucket_async(
+    session: AsyncSession,
+    bucket: SalesBucketEnum = SalesBucketEnum.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list[RevenueBucketRead]:
+    """
+    Async counterpart of revenue_by_bucket.
+    """
+    start, end = _revenue_range(start, end)
+    days = (await session.exec(_revenue_query(start, end))).all()
+    return _revenue_buckets(days, bucket)
+
+
+def _low_stock_query(threshold: int, limit: int):
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.stock,
+            func.coalesce(ProductSales.units_sold, 0),
+        )
+        .outerjoin(ProductSales, ProductSales.product_id == Product.id)
+        .where(Product.stock <= threshold)
+        .order_by(Product.stock, Product.id)
+        .limit(limit)
+    )
+
+
+def _low_stock(rows) -> list[LowStockRead]:
+    return [
+        LowStockRead(product_id=product_id, name=name, stock=stock, units_sold=units)
+        for product_id, name, stock, units in rows
+    ]
+
+
+def low_stock(
+    session: Session, threshold: int = LOW_STOCK_THRESHOLD, limit: int = 50
+) -> list[LowStockRead]:
+    """
+    Products with stock at or below `threshold`, emptiest first, read from
+    the (stock, id) index.
+    """
+    return _low_stock(session.exec(_low_stock_query(threshold, limit)).all())
+
+
+async def low_stock_async(
+    session: AsyncSession, threshold: int = LOW_STOCK_THRESHOLD, limit: int = 50
+) -> list[LowStockRead]:
+    """
+    Async counterpart of low_stock.
+    """
+    return _low_stock((await session.exec(_low_stock_query(threshold, limit))).all())
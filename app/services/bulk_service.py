@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import os
+from typing import Any, AsyncIterator, Union
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import get_product_cache
+from app.models import Product
+from app.schemas import BulkProductResult, BulkRowError, ProductCreate
+from app.services.product_service import product_data_error
+
+# Rows validated and written per transaction
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_COLUMNS = ("name", "description", "price", "stock")
+
+
+class _InvalidRow:
+    """
+    Placeholder for an NDJSON line that is not valid JSON.
+    """
+
+    def __init__(self, detail: str):
+        self.detail = detail
+
+
+async def iter_bulk_payload(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield raw product rows from a JSON array body or, for NDJSON, line by
+    line as the body streams in.
+    """
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _decode_line(line)
+        if buffer.strip():
+            yield _decode_line(buffer)
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of products or an NDJSON body.",
+        )
+    for row in rows:
+        yield row
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return _InvalidRow(f"Invalid JSON: {exc}")
+
+
+def _validate_row(raw: Any) -> Union[dict, str]:
+    """
+    Apply the same rules as create_product; returns column values or an error.
+    """
+    if isinstance(raw, _InvalidRow):
+        return raw.detail
+    try:
+        product_data = ProductCreate.model_validate(raw)
+    except ValidationError as exc:
+        first = exc.errors()[0]
+        location = ".".join(str(part) for part in first["loc"])
+        return f"{location}: {first['msg']}" if location else first["msg"]
+    return product_data_error(product_data) or product_data.model_dump()
+
+
+async def _validated_chunks(
+    rows: AsyncIterator[Any], result: BulkProductResult, chunk_size: int
+) -> AsyncIterator[list[tuple[int, dict]]]:
+    """
+    Group valid rows into chunks, recording invalid ones on the result.
+    """
+    chunk: list[tuple[int, dict]] = []
+    index = 0
+    async for raw in rows:
+        validated = _validate_row(raw)
+        if isinstance(validated, str):
+            result.errors.append(BulkRowError(index=index, detail=validated))
+        else:
+            chunk.append((index, validated))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        index += 1
+    if chunk:
+        yield chunk
+
+
+def _copy_rows(session: Session, values: list[dict]) -> None:
+    """
+    Load rows with COPY ... FROM STDIN (psycopg2 only).
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([row[name] for name in _COLUMNS] for row in values)
+    buffer.seek(0)
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY product ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _row_errors(session: Session) -> tuple[type[Exception], ...]:
+    """
+    Errors a bad row can cause: wrapped by SQLAlchemy, raised by the driver
+    itself (COPY runs on the raw cursor), or raised binding a parameter
+    (sqlite3 raises OverflowError for integers over 64 bits).
+    """
+    dbapi = session.get_bind().dialect.loaded_dbapi
+    return (DBAPIError, dbapi.Error, OverflowError, ValueError)
+
+
+def _error_detail(exc: Exception) -> str:
+    return str(exc.orig) if isinstance(exc, DBAPIError) else str(exc)
+
+
+def insert_product_rows(
+    session: Session, chunk: list[tuple[int, dict]], errors: list[BulkRowError]
+) -> int:
+    """
+    Insert one chunk in a single transaction using COPY on Postgres/psycopg2
+    and executemany elsewhere. If the chunk fails, it is retried row by row
+    so a single bad row only rejects itself. Returns the rows inserted.
+    """
+    values = [row for _, row in chunk]
+    row_errors = _row_errors(session)
+    try:
+        if session.get_bind().dialect.driver == "psycopg2":
+            _copy_rows(session, values)
+        else:
+            session.exec(insert(Product), params=values)
+        session.commit()
+        return len(values)
+    except row_errors:
+        session.rollback()
+
+    inserted = 0
+    for index, row in chunk:
+        try:
+            session.exec(insert(Product).values(**row))
+            session.commit()
+            inserted += 1
+        except row_errors as exc:
+            session.rollback()
+            errors.append(BulkRowError(index=index, detail=_error_detail(exc)))
+    return inserted
+
+
+async def ingest_products(
+    session: Session, rows: AsyncIterator[Any], chunk_size: int = BULK_CHUNK_SIZE
+) -> BulkProductResult:
+    """
+    Validate and insert a stream of products chunk by chunk; database work
+    runs in the threadpool so it does not block the event loop.
+    """
+    result = BulkProductResult()
+    async for chunk in _validated_chunks(rows, result, chunk_size):
+        inserted = await run_in_threadpool(
+            insert_product_rows, session, chunk, result.errors
+        )
+        if inserted:
+            get_product_cache().catalog_changed()
+        result.inserted += inserted
+    result.errors.sort(key=lambda error: error.index)
+    return result
+
+
+async def ingest_products_async(
+    session: AsyncSession, rows: AsyncIterator[Any], chunk_size: int = BULK_CHUNK_SIZE
+) -> BulkProductResult:
+    """
+    Async counterpart of ingest_products.
+    """
+    result = BulkProductResult()
+    async for chunk in _validated_chunks(rows, result, chunk_size):
+        inserted = await session.run_sync(insert_product_rows, chunk, result.errors)
+        if inserted:
+            get_product_cache().catalog_changed()
+        result.inserted += inserted
+    result.errors.sort(key=lambda error: error.index)
+    return result
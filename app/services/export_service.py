@@ -0,0 +1,78 @@
+import csv
+import io
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+from sqlalchemy import Engine, Select, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.enums import ExportFormatEnum
+from app.models import Product
+from app.schemas import ProductRead
+from app.serialization import dumps
+
+# Rows fetched from the server-side cursor and encoded per chunk
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = list(ProductRead.model_fields)
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+}
+
+
+def _export_query(after: Optional[int]) -> Select:
+    """
+    Plain column tuples in id order, resuming after the given id.
+    """
+    statement = select(*(getattr(Product, name) for name in EXPORT_COLUMNS))
+    if after is not None:
+        statement = statement.where(Product.id > after)
+    return statement.order_by(Product.id)
+
+
+def _encode_rows(rows: Sequence[Sequence], fmt: ExportFormatEnum) -> bytes:
+    if fmt is ExportFormatEnum.ndjson:
+        return b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _csv_header() -> bytes:
+    return _encode_rows([EXPORT_COLUMNS], ExportFormatEnum.csv)
+
+
+def export_products(
+    engine: Engine, fmt: ExportFormatEnum, after: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Stream the product table as NDJSON or CSV chunks of UTF-8 bytes.
+    Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE, so
+    memory stays bounded however large the catalog is. The export runs on its
+    own connection so it can outlive the request's session.
+    """
+    if fmt is ExportFormatEnum.csv:
+        yield _csv_header()
+    with engine.connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(
+            _export_query(after)
+        )
+        for rows in result.partitions():
+            yield _encode_rows(rows, fmt)
+
+
+async def export_products_async(
+    engine: AsyncEngine, fmt: ExportFormatEnum, after: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Async counterpart of export_products.
+    """
+    if fmt is ExportFormatEnum.csv:
+        yield _csv_header()
+    async with engine.connect() as connection:
+        result = await connection.stream(
+            _export_query(after).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield _encode_rows(rows, fmt)
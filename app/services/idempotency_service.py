@@ -0,0 +1,354 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import IdempotencyKey
+
+# How long a stored response is replayed for, in seconds
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+# How long a duplicate waits for the first request to finish, in seconds
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "5"))
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+# Seconds after which a claim with no stored response is taken to belong to
+# a crashed request and may be taken over; keep it above the longest request
+IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", "60"))
+# Expired keys deleted per transaction by purge_expired_keys
+IDEMPOTENCY_GC_BATCH = int(os.getenv("IDEMPOTENCY_GC_BATCH", "1000"))
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """
+    Stable hash of a request body, to detect a key reused for another request.
+    """
+    canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def claim_key(
+    session: Session,
+    key: str,
+    request_hash: str,
+    claimed_at: Optional[datetime] = None,
+) -> Optional[IdempotencyKey]:
+    """
+    Try to claim the key for this request. Returns None when claimed, or the
+    existing record when another request holds it. Expired records, and
+    claims left without a response for longer than IDEMPOTENCY_LEASE, are
+    replaced. `claimed_at` identifies the claim when the response is stored.
+    """
+    while True:
+        now = _utcnow()
+        try:
+            session.exec(
+                insert(IdempotencyKey).values(
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL),
+                    claimed_at=claimed_at or now,
+                )
+            )
+            session.commit()
+            return None
+        except IntegrityError:
+            session.rollback()
+
+        # Drop the existing record only if it has expired or its claim was
+        # abandoned, then claim again
+        expired = session.exec(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at < now,
+                    and_(
+                        IdempotencyKey.status_code.is_(None),
+                        IdempotencyKey.claimed_at
+                        < now - timedelta(seconds=IDEMPOTENCY_LEASE),
+                    ),
+                ),
+            )
+        )
+        session.commit()
+        if expired.rowcount:
+            continue
+
+        record = session.exec(
+            select(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        if record is not None:
+            return record
+
+
+def _own_claim(key: str, claimed_at: datetime):
+    """
+    The key's row while it is still this request's claim; a retry that took
+    the claim over after its lease wrote a new claimed_at.
+    """
+    return and_(IdempotencyKey.key == key, IdempotencyKey.claimed_at == claimed_at)
+
+
+def _write_response(
+    session: Session, key: str, claimed_at: datetime, status_code: int, body: Any
+) -> bool:
+    result = session.exec(
+        update(IdempotencyKey)
+        .where(_own_claim(key, claimed_at), IdempotencyKey.status_code.is_(None))
+        .values(status_code=status_code, response_body=json.dumps(body))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def stage_response(
+    session: Session, key: str, claimed_at: datetime, status_code: int, body: Any
+) -> None:
+    """
+    Write the response onto this request's claim inside the caller's
+    transaction, so it commits together with the work it describes and a
+    crash can never leave that work done but unrecorded. Raises 409 when
+    the claim was taken over, so the work is rolled back rather than done
+    twice.
+    """
+    if not _write_response(session, key, claimed_at, status_code, body):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This Idempotency-Key was taken over by a retry; "
+            "retry to get its response.",
+        )
+
+
+def store_response(
+    session: Session, key: str, claimed_at: datetime, status_code: int, body: Any
+) -> None:
+    """
+    Store a response in its own transaction, if the claim is still ours.
+    """
+    session.rollback()
+    _write_response(session, key, claimed_at, status_code, body)
+    session.commit()
+
+
+def release_key(session: Session, key: str, claimed_at: datetime) -> None:
+    """
+    Forget a claim whose request failed transiently, so a retry can run it.
+    A response already committed with the work is kept.
+    """
+    session.rollback()
+    session.exec(
+        delete(IdempotencyKey).where(
+            _own_claim(key, claimed_at), IdempotencyKey.status_code.is_(None)
+        )
+    )
+    session.commit()
+
+
+def _no_headers(status_code: int, body: Any) -> dict[str, str]:
+    return {}
+
+
+def _check_record(
+    record: IdempotencyKey,
+    request_hash: str,
+    response_headers: Callable[[int, Any], dict[str, str]] = _no_headers,
+) -> Optional[JSONResponse]:
+    """
+    Replay a finished record; None means it is still in flight.
+    """
+    if record.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used for a different request.",
+        )
+    if record.status_code is None:
+        return None
+    body = json.loads(record.response_body)
+    return JSONResponse(
+        body,
+        status_code=record.status_code,
+        headers={
+            **response_headers(record.status_code, body),
+            REPLAYED_HEADER: "true",
+        },
+    )
+
+
+def _still_in_flight() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress.",
+    )
+
+
+class _Recorder:
+    """
+    The `record` callback handed to an idempotent operation.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        claimed_at: datetime,
+        status_code: int,
+        serialize: Callable[[Any], Any],
+    ):
+        self.key = key
+        self.claimed_at = claimed_at
+        self.status_code = status_code
+        self.serialize = serialize
+        self.staged = False
+
+    def __call__(self, session: Session, result: Any) -> None:
+        stage_response(
+            session, self.key, self.claimed_at, self.status_code, self.serialize(result)
+        )
+        self.staged = True
+
+
+def _is_final(status_code: int) -> bool:
+    """
+    Client errors are replayed; conflicts and server errors may succeed later.
+    """
+    return status_code < 500 and status_code != status.HTTP_409_CONFLICT
+
+
+def idempotent_call(
+    session: Session,
+    key: str,
+    payload: BaseModel,
+    operation: Callable[[Callable[[Session, Any], None]], Any],
+    serialize: Callable[[Any], Any],
+    status_code: int,
+    response_headers: Callable[[int, Any], dict[str, str]] = _no_headers,
+) -> JSONResponse:
+    """
+    Run `operation` at most once per key. Retries with the same key and body
+    get the stored response without running it again; a retry arriving while
+    the first is still running waits up to IDEMPOTENCY_WAIT for its result.
+    `operation` is passed a `record(session, result)` callback to call just
+    before it commits, which stores the response in the same transaction.
+    `response_headers(status_code, body)` adds headers to the response and
+    to its replays.
+    """
+    request_hash = request_fingerprint(payload)
+    claimed_at = _utcnow()
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT
+    while (record := claim_key(session, key, request_hash, claimed_at)) is not None:
+        replay = _check_record(record, request_hash, response_headers)
+        if replay is not None:
+            return replay
+        if time.monotonic() >= deadline:
+            raise _still_in_flight()
+        time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    recorder = _Recorder(key, claimed_at, status_code, serialize)
+    try:
+        body = serialize(operation(recorder))
+    except HTTPException as exc:
+        if _is_final(exc.status_code):
+            store_response(
+                session, key, claimed_at, exc.status_code, {"detail": exc.detail}
+            )
+        else:
+            release_key(session, key, claimed_at)
+        raise
+    except Exception:
+        release_key(session, key, claimed_at)
+        raise
+
+    if not recorder.staged:
+        store_response(session, key, claimed_at, status_code, body)
+    return JSONResponse(
+        body,
+        status_code=status_code,
+        headers=response_headers(status_code, body),
+    )
+
+
+async def idempotent_call_async(
+    session: AsyncSession,
+    key: str,
+    payload: BaseModel,
+    operation: Callable[[Callable[[Session, Any], None]], Awaitable[Any]],
+    serialize: Callable[[Any], Any],
+    status_code: int,
+    response_headers: Callable[[int, Any], dict[str, str]] = _no_headers,
+) -> JSONResponse:
+    """
+    Async counterpart of idempotent_call; waits without blocking the loop.
+    `record` is called with the sync session the operation runs on.
+    """
+    request_hash = request_fingerprint(payload)
+    claimed_at = _utcnow()
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT
+    while (
+        record := await session.run_sync(claim_key, key, request_hash, claimed_at)
+    ) is not None:
+        replay = _check_record(record, request_hash, response_headers)
+        if replay is not None:
+            return replay
+        if time.monotonic() >= deadline:
+            raise _still_in_flight()
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    recorder = _Recorder(key, claimed_at, status_code, serialize)
+    try:
+        body = serialize(await operation(recorder))
+    except HTTPException as exc:
+        if _is_final(exc.status_code):
+            await session.run_sync(
+                store_response, key, claimed_at, exc.status_code, {"detail": exc.detail}
+            )
+        else:
+            await session.run_sync(release_key, key, claimed_at)
+        raise
+    except Exception:
+        await session.run_sync(release_key, key, claimed_at)
+        raise
+
+    if not recorder.staged:
+        await session.run_sync(store_response, key, claimed_at, status_code, body)
+    return JSONResponse(
+        body,
+        status_code=status_code,
+        headers=response_headers(status_code, body),
+    )
+
+
+def purge_expired_keys(session: Session, batch_size: int = IDEMPOTENCY_GC_BATCH) -> int:
+    """
+    Delete expired keys in batches of `batch_size`, one transaction each, so
+    the purge never holds long locks. Returns how many keys were deleted.
+    """
+    deleted = 0
+    while True:
+        keys = session.exec(
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at < _utcnow())
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            return deleted
+        session.exec(delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys)))
+        session.commit()
+        deleted += len(keys)
+        if len(keys) < batch_size:
+            return deleted
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import Engine, delete, func, update
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.enums import StatusEnum
+from app.models import Order, OrderQueueEntry
+from app.schemas import OrderStatusRead
+
+# Accept orders as pending (202) and finalize them in the background
+ORDER_QUEUE = os.getenv("ORDER_QUEUE", "0") == "1"
+# In-process workers per app process; 0 when a separate worker process runs
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "1"))
+# Orders finalized per worker transaction
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", "100"))
+# Seconds an idle worker waits before polling the queue again
+ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+
+def queue_enabled() -> bool:
+    return ORDER_QUEUE
+
+
+def enqueue_order(session: Session, order_id: int) -> None:
+    """
+    Add an order to the queue as part of the caller's transaction.
+    """
+    session.add(
+        OrderQueueEntry(order_id=order_id, enqueued_at=datetime.now(timezone.utc))
+    )
+
+
+def finalize_orders(session: Session, order_ids: list[int]) -> None:
+    """
+    Downstream processing for a batch of pending orders; runs inside the
+    batch transaction. Payment or fulfillment steps belong here.
+    """
+    session.exec(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status == StatusEnum.pending)
+        .values(status=StatusEnum.completed)
+    )
+
+
+def process_order_batch(session: Session, batch_size: int = ORDER_BATCH_SIZE) -> int:
+    """
+    Finalize up to `batch_size` queued orders in one transaction and remove
+    them from the queue. Concurrent workers skip each other's locked rows on
+    Postgres. Returns how many orders were finalized.
+    """
+    order_ids = session.exec(
+        select(OrderQueueEntry.order_id)
+        .order_by(OrderQueueEntry.order_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not order_ids:
+        session.rollback()
+        return 0
+    finalize_orders(session, list(order_ids))
+    session.exec(delete(OrderQueueEntry).where(OrderQueueEntry.order_id.in_(order_ids)))
+    session.commit()
+    return len(order_ids)
+
+
+def drain_order_queue(
+    engine: Engine,
+    batch_size: int = ORDER_BATCH_SIZE,
+    stopping: Callable[[], bool] = lambda: False,
+) -> int:
+    """
+    Process batches until the queue is empty, or `stopping()` is true between
+    two batches; returns the orders finalized.
+    """
+    total = 0
+    with Session(engine) as session:
+        while not stopping() and (
+            processed := process_order_batch(session, batch_size)
+        ):
+            total += processed
+    return total
+
+
+async def run_order_worker(
+    engine: Engine,
+    batch_size: int = ORDER_BATCH_SIZE,
+    poll_interval: float = ORDER_POLL_INTERVAL,
+) -> None:
+    """
+    In-process worker: drain the queue in the threadpool, then sleep until
+    the next poll. Runs until cancelled.
+    """
+    while True:
+        try:
+            processed = await run_in_threadpool(drain_order_queue, engine, batch_size)
+            if processed:
+                logger.debug("Finalized queued orders", extra={"orders": processed})
+        except Exception:
+            logger.exception("Order worker failed; retrying after the poll interval")
+        await asyncio.sleep(poll_interval)
+
+
+def _order_status_query(order_id: int):
+    ahead = (
+        select(func.count())
+        .select_from(OrderQueueEntry)
+        .where(OrderQueueEntry.order_id < order_id)
+        .scalar_subquery()
+    )
+    queued = (
+        select(OrderQueueEntry.order_id)
+        .where(OrderQueueEntry.order_id == order_id)
+        .exists()
+    )
+    return select(Order.id, Order.status, queued, ahead).where(Order.id == order_id)
+
+
+def _order_status(row, order_id: int) -> OrderStatusRead:
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with ID {order_id} not found.",
+        )
+    order_id, order_status, queued, ahead = row
+    return OrderStatusRead(
+        id=order_id, status=order_status, queued_ahead=ahead if queued else None
+    )
+
+
+def get_order_status(session: Session, order_id: int) -> OrderStatusRead:
+    """
+    Status of one order and, while it is queued, how many orders are ahead
+    of it. One statement, without loading the order's lines.
+    """
+    row = session.exec(_order_status_query(order_id)).one_or_none()
+    return _order_status(row, order_id)
+
+
+async def get_order_status_async(
+    session: AsyncSession, order_id: int
+) -> OrderStatusRead:
+    """
+    Async counterpart of get_order_status.
+    """
+    row = (await session.exec(_order_status_query(order_id))).one_or_none()
+    return _order_status(row, order_id)
+
+
+def queue_depth(session: Session) -> dict:
+    """
+    Number of queued orders and when the oldest one was enqueued.
+    """
+    depth, oldest = session.exec(
+        select(func.count(), func.min(OrderQueueEntry.enqueued_at)).select_from(
+            OrderQueueEntry
+        )
+    ).one()
+    return {"depth": depth, "oldest_enqueued_at": oldest}
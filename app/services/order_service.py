@@ -1,69 +1,231 @@
+from typing import Callable, Optional
+
 from fastapi import HTTPException, status
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.cache import get_product_cache
 from app.enums import StatusEnum
 
-from app.models import Order, Product, ProductOrderLink
-from app.schemas import OrderCreate
+from app.models import Order, ProductOrderLink
+from app.schemas import OrderCreate, OrderFilter
+from app.services.order_queue_service import enqueue_order, queue_enabled
+from app.services.stock_service import (
+    lock_products,
+    reserve_sharded_stock,
+    reserve_stock,
+    run_with_retry,
+    run_with_retry_async,
+)
+
+
+def _aggregate_items(order_data: OrderCreate) -> dict[int, int]:
+    """
+    Validate item quantities and merge repeated products into a single line.
+    Preserves the order in which products first appear in the request.
+    """
+    quantities: dict[int, int] = {}
+    for item in order_data.products:
+        if item.quantity <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Quantity must be greater than zero.",
+            )
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
 
 
-def create_order(session: Session, order_data: OrderCreate):
+def create_order(
+    session: Session,
+    order_data: OrderCreate,
+    before_commit: Optional[Callable[[Session, Order], None]] = None,
+):
     """
     Place an order for a list of selected products.
-    Validate sufficient stock for each item and create the order.
+    All requested products are loaded in one query and the whole cart is
+    validated in memory before anything is written, so a rejected order
+    leaves no trace in the database. The order, its line items and the
+    stock decrements are then committed in a single transaction, retried
+    if a concurrent order wins the race for the same stock.
+    With the order queue enabled the order is committed as pending, with its
+    stock reserved, and a background worker completes it.
+    `before_commit(session, order)` runs inside the order's transaction just
+    before it commits, e.g. to record an idempotent response with it.
     """
-    # Initialize the order
-    order = Order(status=StatusEnum.pending, total_price=0.0)
-    session.add(order)
-    session.commit()
-    session.refresh(order)
+    quantities = _aggregate_items(order_data)
+    queued = queue_enabled()
+    return run_with_retry(
+        session, lambda: _place_order(session, quantities, queued, before_commit)
+    )
 
-    total_price = 0.0
 
-    # Process each product item in the order
-    for item in order_data.products:
-        # Fetch the product from the database
-        product = session.exec(
-            select(Product).where(Product.id == item.product_id)
-        ).one_or_none()
+async def create_order_async(
+    session: AsyncSession,
+    order_data: OrderCreate,
+    before_commit: Optional[Callable[[Session, Order], None]] = None,
+):
+    """
+    Async counterpart of create_order. The transaction body is shared with
+    the sync path through AsyncSession.run_sync.
+    """
+    quantities = _aggregate_items(order_data)
+    queued = queue_enabled()
+    return await run_with_retry_async(
+        session,
+        lambda: session.run_sync(_place_order, quantities, queued, before_commit),
+    )
+
+
+def _place_order(
+    session: Session,
+    quantities: dict[int, int],
+    queued: bool = False,
+    before_commit: Optional[Callable[[Session, Order], None]] = None,
+) -> Order:
+    """
+    One attempt at writing the order; raises StockConflict on a lost race.
+    """
+    # Fetch (and lock, where supported) every requested product in one round
+    # trip; a second one reads products with sharded stock
+    products = lock_products(session, quantities.keys()) if quantities else {}
 
+    total_price = 0.0
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
         if not product:
+            session.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID {item.product_id} not found.",
+                detail=f"Product with ID {product_id} not found.",
             )
-        if item.quantity <= 0:
+        # Check stock availability; sharded stock is checked as it is reserved
+        if not product.stock_sharded and product.stock < quantity:
+            session.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Quantity must be greater than zero.",
+                detail=f"Insufficient stock for product {product.name}.",
             )
-        # Check stock availability
-        if product.stock < item.quantity:
-            session.rollback()  # Rollback if any product fails
+        total_price += product.price * quantity
+
+    # Queued orders are completed by a worker; otherwise complete them now
+    order_status = StatusEnum.pending if queued else StatusEnum.completed
+    order = Order(status=order_status, total_price=total_price)
+    session.add(order)
+    # Flush (not commit) so the order gets its id inside the same transaction
+    session.flush()
+    if queued:
+        enqueue_order(session, order.id)
+
+    # Deduct stock with a conditional decrement that cannot oversell
+    sharded = {
+        product_id: quantity
+        for product_id, quantity in quantities.items()
+        if products[product_id].stock_sharded
+    }
+    reserve_stock(
+        session,
+        {
+            product_id: quantity
+            for product_id, quantity in quantities.items()
+            if product_id not in sharded
+        },
+    )
+    for product_id in sorted(sharded):
+        name = products[product_id].name
+        if not reserve_sharded_stock(session, product_id, sharded[product_id]):
+            session.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for product {product.name}.",
+                detail=f"Insufficient stock for product {name}.",
+            )
+    for product_id, quantity in quantities.items():
+        # Create the association in the link table, snapshotting the product
+        product = products[product_id]
+        session.add(
+            ProductOrderLink(
+                order_id=order.id,
+                product_id=product_id,
+                quantity=quantity,
+                unit_price=product.price,
+                product_name=product.name,
             )
+        )
 
-        # Deduct stock
-        product.stock -= item.quantity
+    if before_commit is not None:
+        before_commit(
+            session, session.exec(_order_query().where(Order.id == order.id)).one()
+        )
+    session.commit()
+    # Stock changed: drop cached copies of these products and their pages.
+    # Sharded stock is published by the rebalancer instead.
+    unsharded = [product_id for product_id in quantities if product_id not in sharded]
+    if unsharded:
+        get_product_cache().catalog_changed(unsharded)
 
-        # Calculate cost
-        cost = product.price * item.quantity
-        total_price += cost
+    return session.exec(_order_query().where(Order.id == order.id)).one()
 
-        # Create the association in the link table
-        link = ProductOrderLink(
-            order_id=order.id, product_id=product.id, quantity=item.quantity
-        )
-        session.add(link)
 
-    order.total_price = total_price
+def _order_query():
+    """
+    Orders with their lines eager-loaded: one statement for the orders and
+    one for all of their lines, however many lines there are. Lines carry
+    their product snapshot, so Product is not joined.
+    """
+    return (
+        select(Order)
+        .options(selectinload(Order.lines))
+        .execution_options(populate_existing=True)
+    )
+
 
-    # For simplicity, assume we complete the order immediately
-    order.status = StatusEnum.completed
+def _order_page_query(filters: OrderFilter):
+    statement = _order_query()
+    if filters.cursor is not None:
+        statement = statement.where(Order.id > filters.cursor)
+    if filters.status is not None:
+        statement = statement.where(Order.status == filters.status)
+    return statement.order_by(Order.id).limit(filters.limit)
+
+
+def _order_not_found(order_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Order with ID {order_id} not found.",
+    )
+
+
+def get_order(session: Session, order_id: int) -> Order:
+    """
+    Fetch one order with its lines and products.
+    """
+    order = session.exec(_order_query().where(Order.id == order_id)).one_or_none()
+    if not order:
+        raise _order_not_found(order_id)
+    return order
 
-    session.add(order)
-    session.commit()
-    session.refresh(order)
 
+async def get_order_async(session: AsyncSession, order_id: int) -> Order:
+    """
+    Async counterpart of get_order.
+    """
+    result = await session.exec(_order_query().where(Order.id == order_id))
+    order = result.one_or_none()
+    if not order:
+        raise _order_not_found(order_id)
     return order
+
+
+def list_orders(session: Session, filters: Optional[OrderFilter] = None):
+    """
+    Fetch one keyset-paginated page of orders with their lines and products.
+    """
+    return session.exec(_order_page_query(filters or OrderFilter())).all()
+
+
+async def list_orders_async(
+    session: AsyncSession, filters: Optional[OrderFilter] = None
+):
+    """
+    Async counterpart of list_orders.
+    """
+    return (await session.exec(_order_page_query(filters or OrderFilter()))).all()
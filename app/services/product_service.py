@@ -1,41 +1,161 @@
-from sqlmodel import select, Session
+from typing import Optional
+
+from sqlalchemy import Select, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 
+from app.cache import get_product_cache
 from app.models import Product
-from app.schemas import ProductCreate
+from app.replicas import reads_replica
+from app.schemas import ProductCreate, ProductFilter, ProductRead
 
 
-def list_products(session: Session):
+def _product_page_query(filters: ProductFilter) -> Select:
     """
-    Fetch all products from the database.
+    Build a keyset-paginated, filtered query ordered by id.
+    Only the selected columns are loaded, as plain rows rather than entities.
     """
-    return session.exec(select(Product)).all()
+    statement = select(*(getattr(Product, name) for name in filters.field_names()))
+    if filters.cursor is not None:
+        statement = statement.where(Product.id > filters.cursor)
+    if filters.min_price is not None:
+        statement = statement.where(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        statement = statement.where(Product.price <= filters.max_price)
+    if filters.in_stock is True:
+        statement = statement.where(Product.stock > 0)
+    elif filters.in_stock is False:
+        statement = statement.where(Product.stock <= 0)
 
+    return statement.order_by(Product.id).limit(filters.limit)
 
-def create_product(session: Session, product_data: ProductCreate):
+
+def list_products(session: Session, filters: Optional[ProductFilter] = None):
     """
-    Validate and create a new product in the database.
+    Fetch one page of products as dicts, through the product cache.
+    Rows read from a replica may lag the catalog version and are not cached.
+    """
+    filters = filters or ProductFilter()
+    cache = get_product_cache()
+    # Taken before the query, so rows read before a concurrent write are
+    # cached under the version that write retires
+    version = cache.catalog_version()
+    products = cache.get_page(filters, version)
+    if products is None:
+        result = session.exec(_product_page_query(filters))
+        products = [dict(row) for row in result.mappings()]
+        if not reads_replica(session):
+            cache.set_page(filters, version, products)
+    return products
+
+
+async def list_products_async(
+    session: AsyncSession, filters: Optional[ProductFilter] = None
+):
+    """
+    Async counterpart of list_products.
+    """
+    filters = filters or ProductFilter()
+    cache = get_product_cache()
+    version = cache.catalog_version()
+    products = cache.get_page(filters, version)
+    if products is None:
+        result = await session.exec(_product_page_query(filters))
+        products = [dict(row) for row in result.mappings()]
+        if not reads_replica(session):
+            cache.set_page(filters, version, products)
+    return products
+
+
+def _product_not_found(product_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Product with ID {product_id} not found.",
+    )
+
+
+def get_product(session: Session, product_id: int) -> dict:
+    """
+    Fetch a single product as a dict, through the product cache.
+    Rows read from a replica may lag the catalog version and are not cached.
+    """
+    cache = get_product_cache()
+    version = cache.catalog_version()
+    product = cache.get_product(product_id)
+    if product is None:
+        found = session.get(Product, product_id)
+        if not found:
+            raise _product_not_found(product_id)
+        product = ProductRead.model_validate(found).model_dump()
+        if not reads_replica(session):
+            cache.set_product(product_id, version, product)
+    return product
+
+
+async def get_product_async(session: AsyncSession, product_id: int) -> dict:
+    """
+    Async counterpart of get_product.
+    """
+    cache = get_product_cache()
+    version = cache.catalog_version()
+    product = cache.get_product(product_id)
+    if product is None:
+        found = await session.get(Product, product_id)
+        if not found:
+            raise _product_not_found(product_id)
+        product = ProductRead.model_validate(found).model_dump()
+        if not reads_replica(session):
+            cache.set_product(product_id, version, product)
+    return product
+
+
+def product_data_error(product_data: ProductCreate) -> Optional[str]:
+    """
+    Check basic constraints; returns the error message, or None if valid.
     """
-    # Validate basic constraints
     if product_data.price <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Price cannot be negative or zero.",
-        )
+        return "Price cannot be negative or zero."
     if product_data.stock < 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Stock quantity cannot be negative.",
-        )
+        return "Stock quantity cannot be negative."
+    return None
+
+
+def _build_product(product_data: ProductCreate) -> Product:
+    """
+    Validate basic constraints and build (but do not persist) a product.
+    """
+    error = product_data_error(product_data)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
-    # Create the product
-    new_product = Product(
+    return Product(
         name=product_data.name,
         description=product_data.description,
         price=product_data.price,
         stock=product_data.stock,
     )
+
+
+def create_product(session: Session, product_data: ProductCreate):
+    """
+    Validate and create a new product in the database.
+    """
+    new_product = _build_product(product_data)
     session.add(new_product)
     session.commit()
     session.refresh(new_product)
+    get_product_cache().catalog_changed()
+    return new_product
+
+
+async def create_product_async(session: AsyncSession, product_data: ProductCreate):
+    """
+    Async counterpart of create_product.
+    """
+    new_product = _build_product(product_data)
+    session.add(new_product)
+    await session.commit()
+    await session.refresh(new_product)
+    get_product_cache().catalog_changed()
     return new_product
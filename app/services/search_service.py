@@ -0,0 +1,116 @@
+import os
+import re
+
+from sqlalchemy import Select, column, func, literal_column, select, table
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Product
+from app.schemas import ProductSearch
+
+# Best matches kept per search, so the sort is a bounded top-N even for
+# common words. Searches return at most this many results (0 keeps all)
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "1000"))
+
+_WORD = re.compile(r"\w+")
+
+_PRODUCT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.stock,
+)
+
+# Name matches outrank description matches (setweight A/B on Postgres)
+_NAME_WEIGHT, _DESCRIPTION_WEIGHT = 10.0, 1.0
+
+
+def _search_terms(text: str) -> list[str]:
+    """
+    Plain words of the query; operators and punctuation are dropped so user
+    input can never be a query syntax error.
+    """
+    return _WORD.findall(text.lower())
+
+
+def _ranked_page(candidates, search: ProductSearch) -> Select:
+    """
+    Rank the candidate (id, score) rows, lowest score first, and read only
+    the page's product rows. The window keeps the best-scored candidates,
+    never just the first ones the index produces.
+    """
+    if SEARCH_RANK_WINDOW:
+        candidates = candidates.order_by(
+            candidates.selected_columns.score, candidates.selected_columns.id
+        ).limit(SEARCH_RANK_WINDOW)
+    candidates = candidates.subquery()
+    page = (
+        select(candidates)
+        .order_by(candidates.c.score, candidates.c.id)
+        .offset(search.cursor or 0)
+        .limit(search.limit)
+        .subquery()
+    )
+    return (
+        select(*_PRODUCT_COLUMNS)
+        .join_from(page, Product, Product.id == page.c.id)
+        .order_by(page.c.score, page.c.id)
+    )
+
+
+def _postgres_candidates(terms: list[str]) -> Select:
+    """
+    Matches from the GIN-indexed tsvector column, scored by negated ts_rank.
+    """
+    query = func.plainto_tsquery("english", " ".join(terms))
+    vector = literal_column("product.search_vector")
+    score = (-func.ts_rank(vector, query)).label("score")
+    return select(Product.id, score).where(vector.op("@@")(query))
+
+
+def _sqlite_candidates(terms: list[str]) -> Select:
+    """
+    Matches from the FTS5 table, scored by bm25 (lower is better).
+    """
+    fts = table("product_fts", column("rowid"))
+    match = " ".join(f'"{term}"' for term in terms)
+    # Labelled "score" because FTS5 reserves "rank" for its own column
+    score = func.bm25(
+        literal_column("product_fts"), _NAME_WEIGHT, _DESCRIPTION_WEIGHT
+    ).label("score")
+    return select(fts.c.rowid.label("id"), score).where(
+        literal_column("product_fts").op("MATCH")(match)
+    )
+
+
+def _search_query(dialect: str, terms: list[str], search: ProductSearch) -> Select:
+    candidates = _postgres_candidates if dialect == "postgresql" else _sqlite_candidates
+    return _ranked_page(candidates(terms), search)
+
+
+def search_products(session: Session, search: ProductSearch) -> list[dict]:
+    """
+    One page of products matching every word of `search.q` in their name or
+    description, best match first, as dicts.
+    """
+    terms = _search_terms(search.q)
+    if not terms:
+        return []
+    dialect = session.get_bind().dialect.name
+    result = session.exec(_search_query(dialect, terms, search))
+    return [dict(row) for row in result.mappings()]
+
+
+async def search_products_async(
+    session: AsyncSession, search: ProductSearch
+) -> list[dict]:
+    """
+    Async counterpart of search_products.
+    """
+    terms = _search_terms(search.q)
+    if not terms:
+        return []
+    dialect = session.get_bind().dialect.name
+    result = await session.exec(_search_query(dialect, terms, search))
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,334 @@
+import asyncio
+import itertools
+import os
+import random
+import time
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache import get_product_cache
+from app.models import Product, ProductStockShard
+
+T = TypeVar("T")
+
+# Bounded retry policy for write-write conflicts between concurrent orders
+STOCK_RETRY_ATTEMPTS = int(os.getenv("STOCK_RETRY_ATTEMPTS", "5"))
+STOCK_RETRY_BACKOFF = float(os.getenv("STOCK_RETRY_BACKOFF", "0.01"))
+STOCK_RETRY_BACKOFF_MAX = float(os.getenv("STOCK_RETRY_BACKOFF_MAX", "0.25"))
+# Counters a product's stock is split across when sharding is turned on
+STOCK_SHARDS = int(os.getenv("STOCK_SHARDS", "8"))
+
+# Postgres SQLSTATEs: serialization_failure, deadlock_detected, lock_not_available
+_CONFLICT_SQLSTATES = {"40001", "40P01", "55P03"}
+
+
+class StockConflict(Exception):
+    """
+    Raised when a conditional stock decrement matched fewer rows than
+    requested, meaning a concurrent order consumed the stock first.
+    """
+
+
+def lock_products(session: Session, product_ids: Iterable[int]) -> dict[int, Product]:
+    """
+    Load the given products in one query, taking row locks in ascending id
+    order where the backend supports SELECT ... FOR UPDATE. A deterministic
+    lock order means two orders sharing products cannot deadlock.
+    Products with sharded stock are left unlocked, as orders never write
+    their row; they are read by a second query.
+    """
+    product_ids = list(product_ids)
+    statement = (
+        select(Product)
+        .where(Product.id.in_(product_ids), ~Product.stock_sharded)
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    products = {product.id: product for product in session.exec(statement)}
+    missing = [product_id for product_id in product_ids if product_id not in products]
+    if missing:
+        statement = select(Product).where(Product.id.in_(missing))
+        products.update((product.id, product) for product in session.exec(statement))
+    return products
+
+
+def reserve_stock(session: Session, quantities: dict[int, int]) -> None:
+    """
+    Atomically decrement stock for every product in one conditional UPDATE:
+
+        UPDATE product SET stock = stock - :q WHERE id = :id AND stock >= :q
+
+    Raises StockConflict unless every row was decremented, so stock can never
+    go negative even on backends without row locks.
+    """
+    if not quantities:
+        return
+    requested = case(quantities, value=Product.id)
+    result = session.exec(
+        update(Product)
+        .where(Product.id.in_(sorted(quantities)), Product.stock >= requested)
+        .values(stock=Product.stock - requested)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        raise StockConflict()
+
+
+def _take_from_one_shard(
+    session: Session, product_id: int, quantity: int, skip_locked: bool
+) -> bool:
+    """
+    Decrement a random shard of the product holding at least `quantity`.
+    With skip_locked, shards held by other orders are passed over (Postgres).
+    """
+    shard = (
+        select(ProductStockShard.shard)
+        .where(
+            ProductStockShard.product_id == product_id,
+            ProductStockShard.stock >= quantity,
+        )
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=skip_locked)
+        .scalar_subquery()
+    )
+    result = session.exec(
+        update(ProductStockShard)
+        .where(
+            ProductStockShard.product_id == product_id,
+            ProductStockShard.shard == shard,
+            ProductStockShard.stock >= quantity,
+        )
+        .values(stock=ProductStockShard.stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _lock_shards(session: Session, product_id: int) -> list[ProductStockShard]:
+    statement = (
+        select(ProductStockShard)
+        .where(ProductStockShard.product_id == product_id)
+        .order_by(ProductStockShard.shard)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return list(session.exec(statement))
+
+
+def reserve_sharded_stock(session: Session, product_id: int, quantity: int) -> bool:
+    """
+    Take `quantity` from the stock shards of a product. A random shard with
+    enough stock that no other order holds is decremented; failing that,
+    one another order holds; failing that, every shard is locked and the
+    quantity is taken across them, fullest first. Returns False when the
+    shards hold less than `quantity` in total.
+    """
+    if _take_from_one_shard(session, product_id, quantity, skip_locked=True):
+        return True
+    if _take_from_one_shard(session, product_id, quantity, skip_locked=False):
+        return True
+    shards = _lock_shards(session, product_id)
+    if not shards:
+        # Sharding was turned off after the product was read
+        raise StockConflict()
+    if sum(shard.stock for shard in shards) < quantity:
+        return False
+    for shard in sorted(shards, key=lambda shard: -shard.stock):
+        taken = min(shard.stock, quantity)
+        shard.stock -= taken
+        quantity -= taken
+        if not quantity:
+            break
+    session.flush()
+    return True
+
+
+def _split_stock(total: int, shards: int) -> list[int]:
+    base, extra = divmod(total, shards)
+    return [base + (index < extra) for index in range(shards)]
+
+
+def _spread_stock(
+    session: Session, product_id: int, shards: list[ProductStockShard], count: int
+) -> int:
+    """
+    Even out a product's stock over `count` shards, reusing the locked
+    `shards` rows; returns the total.
+    """
+    total = sum(shard.stock for shard in shards)
+    for index, (shard, stock) in enumerate(
+        itertools.zip_longest(shards, _split_stock(total, count))
+    ):
+        if stock is None:
+            session.delete(shard)
+        elif shard is None:
+            session.add(
+                ProductStockShard(product_id=product_id, shard=index, stock=stock)
+            )
+        else:
+            shard.stock = stock
+    return total
+
+
+def _lock_product(session: Session, product_id: int) -> Product:
+    product = session.exec(
+        select(Product)
+        .where(Product.id == product_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).first()
+    if product is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with ID {product_id} not found.",
+        )
+    return product
+
+
+def _commit_stock_change(session: Session, product: Product, changed: bool) -> Product:
+    session.commit()
+    if changed:
+        get_product_cache().catalog_changed([product.id])
+    session.refresh(product)
+    return product
+
+
+def shard_product_stock(
+    session: Session, product_id: int, shards: int = STOCK_SHARDS
+) -> Product:
+    """
+    Keep a product's stock in `shards` counters, so concurrent orders for it
+    stop queueing on its row. Its stock is split evenly across them; a
+    product already sharded is re-split over the new count.
+    """
+    if shards < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A product needs at least one stock shard.",
+        )
+    product = _lock_product(session, product_id)
+    rows = _lock_shards(session, product_id)
+    if not product.stock_sharded:
+        rows = [ProductStockShard(product_id=product_id, shard=0, stock=product.stock)]
+        session.add(rows[0])
+    total = _spread_stock(session, product_id, rows, shards)
+    changed = product.stock != total
+    product.stock = total
+    product.stock_sharded = True
+    return _commit_stock_change(session, product, changed)
+
+
+def unshard_product_stock(session: Session, product_id: int) -> Product:
+    """
+    Fold a product's stock shards back into its stock column.
+    """
+    product = _lock_product(session, product_id)
+    if not product.stock_sharded:
+        session.rollback()
+        return product
+    rows = _lock_shards(session, product_id)
+    product.stock = sum(shard.stock for shard in rows)
+    for shard in rows:
+        session.delete(shard)
+    product.stock_sharded = False
+    return _commit_stock_change(session, product, True)
+
+
+def rebalance_stock_shards(session: Session, product_id: int) -> Product:
+    """
+    Even out a sharded product's counters, so a shard emptied by orders
+    does not turn away an order the others could fill, and record their
+    total as the product's stock.
+    """
+    product = _lock_product(session, product_id)
+    rows = _lock_shards(session, product_id)
+    if not product.stock_sharded or not rows:
+        session.rollback()
+        return product
+    total = _spread_stock(session, product_id, rows, len(rows))
+    changed = product.stock != total
+    product.stock = total
+    return _commit_stock_change(session, product, changed)
+
+
+def rebalance_all_stock_shards(session: Session) -> int:
+    """
+    Rebalance every sharded product, one transaction each; returns how many
+    there were.
+    """
+    product_ids = session.exec(
+        select(ProductStockShard.product_id)
+        .distinct()
+        .order_by(ProductStockShard.product_id)
+    ).all()
+    for product_id in product_ids:
+        rebalance_stock_shards(session, product_id)
+    return len(product_ids)
+
+
+def is_write_conflict(exc: OperationalError) -> bool:
+    """
+    Whether a database error is a transient conflict worth retrying.
+    """
+    if getattr(exc.orig, "pgcode", None) in _CONFLICT_SQLSTATES:
+        return True
+    # SQLite reports lock contention as "database is locked" / "table is locked"
+    return "is locked" in str(exc.orig)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Jittered exponential backoff for the given (zero-based) attempt.
+    """
+    delay = min(STOCK_RETRY_BACKOFF_MAX, STOCK_RETRY_BACKOFF * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _retries_exhausted() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Could not reserve stock due to concurrent orders, please retry.",
+    )
+
+
+def run_with_retry(session: Session, operation: Callable[[], T]) -> T:
+    """
+    Run a stock-reserving transaction, retrying write-write conflicts with
+    bounded, jittered exponential backoff.
+    """
+    for attempt in range(STOCK_RETRY_ATTEMPTS):
+        try:
+            return operation()
+        except (StockConflict, OperationalError) as exc:
+            session.rollback()
+            if isinstance(exc, OperationalError) and not is_write_conflict(exc):
+                raise
+        if attempt < STOCK_RETRY_ATTEMPTS - 1:
+            time.sleep(_backoff_delay(attempt))
+
+    raise _retries_exhausted()
+
+
+async def run_with_retry_async(
+    session: AsyncSession, operation: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Async counterpart of run_with_retry; backs off without blocking the loop.
+    """
+    for attempt in range(STOCK_RETRY_ATTEMPTS):
+        try:
+            return await operation()
+        except (StockConflict, OperationalError) as exc:
+            await session.rollback()
+            if isinstance(exc, OperationalError) and not is_write_conflict(exc):
+                raise
+        if attempt < STOCK_RETRY_ATTEMPTS - 1:
+            await asyncio.sleep(_backoff_delay(attempt))
+
+    raise _retries_exhausted()
@@ -0,0 +1,69 @@
+"""
+Turn sharded stock on or off for hot products, or rebalance their shards,
+and print each product's stock afterwards.
+
+Usage:
+    python -m app.shard_stock enable PRODUCT_ID [PRODUCT_ID ...] [--shards 8]
+    python -m app.shard_stock disable PRODUCT_ID [PRODUCT_ID ...]
+    python -m app.shard_stock rebalance [PRODUCT_ID ...]
+"""
+
+import argparse
+import json
+import sys
+
+from app.config import load_environment
+
+
+def main() -> None:
+    load_environment()
+    from fastapi import HTTPException
+    from sqlmodel import Session
+
+    from app.database import get_engine
+    from app.logging_config import configure_logging
+    from app.services.stock_service import (
+        STOCK_SHARDS,
+        rebalance_all_stock_shards,
+        rebalance_stock_shards,
+        shard_product_stock,
+        unshard_product_stock,
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("action", choices=("enable", "disable", "rebalance"))
+    parser.add_argument("product_ids", nargs="*", type=int)
+    parser.add_argument("--shards", type=int, default=STOCK_SHARDS)
+    args = parser.parse_args()
+    if args.action != "rebalance" and not args.product_ids:
+        parser.error(f"{args.action} needs at least one product id")
+
+    configure_logging()
+    results = []
+    with Session(get_engine()) as session:
+        if args.action == "rebalance" and not args.product_ids:
+            count = rebalance_all_stock_shards(session)
+            print(json.dumps({"rebalanced": count}, indent=2))
+            return
+        for product_id in args.product_ids:
+            try:
+                if args.action == "enable":
+                    product = shard_product_stock(session, product_id, args.shards)
+                elif args.action == "disable":
+                    product = unshard_product_stock(session, product_id)
+                else:
+                    product = rebalance_stock_shards(session, product_id)
+            except HTTPException as exc:
+                sys.exit(exc.detail)
+            results.append(
+                {
+                    "product_id": product.id,
+                    "stock": product.stock,
+                    "stock_sharded": product.stock_sharded,
+                }
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Compare requests/sec and p99 latency of the sync and async stacks.
+
+Both apps are driven in-process through httpx's ASGI transport at the same
+client concurrency. "Workers" caps the threadpool the sync handlers run in;
+the async handlers run on the event loop. Both get a connection pool as large
+as the client concurrency so pool checkout is not the bottleneck.
+
+Usage:
+    python -m benchmarks.async_stack [--database-url URL] [--requests 2000]
+        [--concurrency 64] [--workers 8] [--products 100]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import anyio.to_thread
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session, get_session, to_async_url
+from app.limits import get_order_concurrency_limit
+from app.main import create_app
+from app.models import Product
+
+
+def build_app(async_db, database_url, pool_size):
+    """
+    Build an app whose session dependency points at the benchmark database.
+    Order shedding is off: its default cap is sized for the configured pool,
+    not this one, and shed orders would be timed as fast failures.
+    """
+    app = create_app(async_db=async_db)
+    app.dependency_overrides[get_order_concurrency_limit] = lambda: None
+    if async_db:
+        engine = create_async_engine(to_async_url(database_url), pool_size=pool_size)
+
+        async def override():
+            async with AsyncSession(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_async_session] = override
+    else:
+        engine = create_engine(database_url, pool_size=pool_size)
+
+        def override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = override
+    return app
+
+
+async def drive(app, total, concurrency, workers):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = workers
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/products")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def seed(database_url, count):
+    engine = create_engine(database_url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Product(name=f"P{i}", description="", price=1.0, stock=100)
+            for i in range(count)
+        )
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--products", type=int, default=100)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    seed(database_url, args.products)
+
+    print(f"{'stack':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, async_db in (("sync", False), ("async", True)):
+        app = build_app(async_db, database_url, args.concurrency)
+        result = asyncio.run(drive(app, args.requests, args.concurrency, args.workers))
+        print(
+            f"{name:>6} {result['rps']:>10.1f} "
+            f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
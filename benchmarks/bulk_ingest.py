@@ -0,0 +1,63 @@
+"""
+Measure bulk product ingestion throughput (rows/sec) against chunk size.
+
+Rows are fed through the same validation and insert path as
+POST /products/bulk. On a Postgres URL with psycopg2 chunks are loaded with
+COPY; elsewhere with executemany.
+
+Usage:
+    python -m benchmarks.bulk_ingest [--rows 50000]
+        [--chunk-sizes 100 500 1000 5000] [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.services.bulk_service import ingest_products
+
+
+async def product_rows(count):
+    for i in range(count):
+        yield {
+            "name": f"SKU {i}",
+            "description": "Bulk loaded item",
+            "price": 1.0 + i % 100,
+            "stock": i % 50,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument(
+        "--chunk-sizes", type=int, nargs="+", default=[100, 500, 1000, 5000]
+    )
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url)
+
+    print(f"{'chunk size':>10} {'seconds':>10} {'rows/sec':>12}")
+    for chunk_size in args.chunk_sizes:
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            start = time.perf_counter()
+            result = asyncio.run(
+                ingest_products(session, product_rows(args.rows), chunk_size)
+            )
+            elapsed = time.perf_counter() - start
+        assert result.inserted == args.rows, result.errors[:5]
+        print(f"{chunk_size:>10} {elapsed:>10.2f} {args.rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compare a flash sale with and without order load shedding.
+
+A flood of POST /orders (--order-concurrency clients) runs together with a
+few clients browsing GET /products, in-process against a small connection
+pool (--pool-size, no overflow), first with no in-flight limit and then with
+the adaptive one. Buyers retry shed orders after their Retry-After until
+every order is placed. For each run the time to sell out, the number of shed
+attempts and the p50/p99 latency of accepted orders and of catalog reads are
+printed.
+
+Usage:
+    python -m benchmarks.flash_sale [--orders 2000] [--order-concurrency 64]
+        [--readers 4] [--pool-size 5] [--max-pool-wait-ms 50]
+        [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import anyio.to_thread
+import httpx
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, create_engine, select
+
+from app.cache import get_product_cache
+from app.database import get_session
+from app.limits import AdaptiveConcurrencyLimit, get_order_concurrency_limit
+from app.main import create_app
+from app.models import Product
+from app.pool_stats import POOL_STATS, instrumented_pool_class
+from benchmarks.async_stack import seed
+from benchmarks.load_test import percentile
+
+
+def build_app(database_url, pool_size, limit):
+    """
+    App on a small instrumented "primary" pool, so the limit sees its waits.
+    """
+    POOL_STATS.pop("primary", None)
+    engine = create_engine(
+        database_url,
+        poolclass=instrumented_pool_class(QueuePool, "primary"),
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=60,
+    )
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app = create_app(async_db=False)
+    app.dependency_overrides[get_session] = override
+    app.dependency_overrides[get_order_concurrency_limit] = lambda: limit
+    return app, engine
+
+
+def summary(latencies):
+    latencies.sort()
+    if not latencies:
+        return "-"
+    return (
+        f"{percentile(latencies, 0.5) * 1000:>7.1f} / "
+        f"{percentile(latencies, 0.99) * 1000:>7.1f}"
+    )
+
+
+async def flash_sale(app, product_id, args):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(
+        40, args.order_concurrency + args.readers
+    )
+    order_latencies, read_latencies = [], []
+    shed = 0
+    done = asyncio.Event()
+    payload = {"products": [{"product_id": product_id, "quantity": 1}]}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120
+    ) as client:
+        remaining = iter(range(args.orders))
+
+        async def buyer():
+            nonlocal shed
+            for _ in remaining:
+                while True:
+                    start = time.perf_counter()
+                    response = await client.post("/orders", json=payload)
+                    elapsed = time.perf_counter() - start
+                    if response.status_code not in (429, 503):
+                        break
+                    shed += 1
+                    await asyncio.sleep(float(response.headers["Retry-After"]))
+                response.raise_for_status()
+                order_latencies.append(elapsed)
+
+        async def reader():
+            while not done.is_set():
+                get_product_cache().clear()
+                start = time.perf_counter()
+                response = await client.get("/products?limit=20")
+                read_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+        start = time.perf_counter()
+        await asyncio.gather(*(buyer() for _ in range(args.order_concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(*readers)
+
+    return elapsed, shed, order_latencies, read_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--order-concurrency", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-pool-wait-ms", type=float, default=50.0)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    print(
+        f"{'shedding':>9} {'sold out s':>11} {'shed':>6} "
+        f"{'order p50/p99 ms':>18} {'read p50/p99 ms':>18}"
+    )
+    for label, limit in (
+        ("off", None),
+        ("on", AdaptiveConcurrencyLimit(args.pool_size, args.max_pool_wait_ms)),
+    ):
+        seed(database_url, 100)
+        app, engine = build_app(database_url, args.pool_size, limit)
+        with Session(engine) as session:
+            product = session.exec(select(Product).limit(1)).one()
+            product.stock = args.orders
+            session.add(product)
+            session.commit()
+            product_id = product.id
+        elapsed, shed, orders, reads = asyncio.run(flash_sale(app, product_id, args))
+        engine.dispose()
+        print(
+            f"{label:>9} {elapsed:>11.2f} {shed:>6} "
+            f"{summary(orders):>18} {summary(reads):>18}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare order throughput on a single hot product with its stock in one row
+and split across shards.
+
+For each --concurrency level, that many threads place one-item orders for
+the same product through create_order for --duration seconds, first with
+the product's stock in its own row and then with it spread over --shards
+counters. Orders/sec and the orders that gave up after conflict retries
+(409) are printed per run. SQLite serializes every write, so sharding only
+pays off on a server database: pass a Postgres URL with --database-url (its
+tables are dropped and recreated).
+
+Usage:
+    python -m benchmarks.hot_sku [--concurrency 1,4,16,64] [--duration 5]
+        [--shards 8] [--database-url URL]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Product
+from app.schemas import OrderCreate, OrderItem
+from app.services.order_service import create_order
+from app.services.stock_service import shard_product_stock
+
+
+def seed(engine, shards):
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        product = Product(name="Hot", description="", price=1.0, stock=10_000_000)
+        session.add(product)
+        session.commit()
+        if shards:
+            shard_product_stock(session, product.id, shards)
+        return product.id
+
+
+def hammer(engine, product_id, concurrency, duration):
+    order = OrderCreate(products=[OrderItem(product_id=product_id, quantity=1)])
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    counts = {"ok": 0, "conflicts": 0}
+
+    def buyer():
+        while time.perf_counter() < deadline:
+            with Session(engine) as session:
+                try:
+                    create_order(session, order)
+                    outcome = "ok"
+                except HTTPException:
+                    outcome = "conflicts"
+            with lock:
+                counts[outcome] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(buyer)
+    return counts["ok"] / (time.perf_counter() - start), counts["conflicts"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url, pool_size=max(levels), max_overflow=0)
+
+    print(
+        f"{'threads':>8} {'row orders/s':>13} {'409s':>6} "
+        f"{'sharded orders/s':>17} {'409s':>6} {'speedup':>8}"
+    )
+    for concurrency in levels:
+        results = []
+        for shards in (0, args.shards):
+            product_id = seed(engine, shards)
+            results.append(hammer(engine, product_id, concurrency, args.duration))
+        (row_rate, row_conflicts), (sharded_rate, sharded_conflicts) = results
+        print(
+            f"{concurrency:>8} {row_rate:>13.1f} {row_conflicts:>6} "
+            f"{sharded_rate:>17.1f} {sharded_conflicts:>6} "
+            f"{sharded_rate / row_rate if row_rate else 0:>7.2f}x"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
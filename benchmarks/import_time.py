@@ -0,0 +1,107 @@
+"""
+Profile the cold start of the app with `python -X importtime`.
+
+Two phases are measured in a fresh interpreter: importing app.main, which
+should load little more than FastAPI, and building the app with create_app(),
+which imports the settings, middleware, routers, models and services. For
+each phase the cumulative import time is printed with the slowest top-level
+imports, and the run fails when startup (both phases together) exceeds
+--budget-ms (STARTUP_IMPORT_BUDGET_MS, which tests/unit/test_startup_unit.py
+enforces too). -X importtime adds its own overhead, so compare numbers from
+this tool with each other rather than with wall-clock startup.
+
+Usage:
+    python -m benchmarks.import_time [--top 15] [--repeat 3] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Startup import budget in ms: about 1.4x the ~1.1 s measured in the web
+# container, so a regression of a third or more fails. Set it for machines
+# that are much faster or slower.
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1600"))
+
+# Separates the phases in the -X importtime output
+MARKER = "-- create_app --"
+
+PROFILE_CODE = (
+    "import sys\n"
+    "import app.main\n"
+    f"sys.stderr.write({MARKER!r} + '\\n')\n"
+    "app.main.create_app()\n"
+)
+
+
+def parse_importtime(lines):
+    """
+    Top-level imports as (module, cumulative microseconds), in the order they
+    finished. Nested imports are already included in their parent's time.
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # One leading space marks a top-level import; nested ones are indented
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+def profile(code=PROFILE_CODE):
+    """
+    Run `code` in a fresh interpreter with -X importtime and return the
+    top-level imports of each phase: before and after MARKER.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.splitlines()
+    split = lines.index(MARKER) if MARKER in lines else len(lines)
+    before = parse_importtime(lines[:split])
+    # Interpreter startup (site, encodings) finishes before app.main starts
+    first = next((i for i, (name, _) in enumerate(before) if name.startswith("app")), 0)
+    app_index = next(i for i, (name, _) in enumerate(before) if name == "app.main")
+    return before[first : app_index + 1], parse_importtime(lines[split + 1 :])
+
+
+def total_ms(imports):
+    return sum(cumulative for _, cumulative in imports) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    runs = [profile() for _ in range(args.repeat)]
+    import_ms = statistics.median(total_ms(run[0]) for run in runs)
+    create_ms = statistics.median(total_ms(run[1]) for run in runs)
+
+    # Slowest imports of the last run, so bytecode caches are warm
+    for title, imports in zip(("import app.main", "create_app()"), runs[-1]):
+        print(f"{title}: {total_ms(imports):.1f} ms")
+        for name, cumulative in sorted(imports, key=lambda item: -item[1])[: args.top]:
+            print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+    startup_ms = import_ms + create_ms
+    print(
+        f"median import {import_ms:.1f} ms + create_app {create_ms:.1f} ms "
+        f"= {startup_ms:.1f} ms (budget {args.budget_ms:.1f} ms)"
+    )
+    if startup_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
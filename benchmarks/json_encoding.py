@@ -0,0 +1,102 @@
+"""
+Compare CPU time per 10k products of the old and new list/export encoding.
+
+"entities + ProductRead" is the previous path: full ORM entities validated
+into ProductRead with from_attributes, passed through jsonable_encoder and
+encoded with the standard library, as FastAPI does for a response_model.
+"rows + json" selects plain column tuples and encodes them with the standard
+library; "rows + fast" is the shipped path (app.serialization.dumps, orjson
+when installed). Query time is included, so the numbers are what one page
+of that size costs the worker.
+
+Usage:
+    python -m benchmarks.json_encoding [--products 10000] [--repeat 10]
+        [--database-url URL]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlmodel import Session, create_engine, select
+
+from app import serialization
+from app.models import Product
+from app.schemas import ProductFilter, ProductRead
+from app.services.export_service import EXPORT_COLUMNS
+from benchmarks.product_pagination import seed
+
+PRODUCT_LIST = TypeAdapter(list[ProductRead])
+
+
+def entities_with_validation(session):
+    products = session.exec(select(Product).order_by(Product.id)).all()
+    validated = PRODUCT_LIST.validate_python(products, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def rows_with_json(session):
+    columns = [getattr(Product, name) for name in ProductFilter().field_names()]
+    rows = session.exec(select(*columns).order_by(Product.id)).mappings()
+    return json.dumps([dict(row) for row in rows]).encode()
+
+
+def rows_with_fast_encoder(session):
+    columns = [getattr(Product, name) for name in ProductFilter().field_names()]
+    rows = session.exec(select(*columns).order_by(Product.id)).mappings()
+    return serialization.dumps([dict(row) for row in rows])
+
+
+def export_ndjson(encode):
+    def run(session):
+        columns = [getattr(Product, name) for name in EXPORT_COLUMNS]
+        rows = session.exec(select(*columns).order_by(Product.id))
+        return b"".join(encode(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+
+    return run
+
+
+def cpu_ms(engine, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.process_time()
+            fn(session)
+            timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url)
+    seed(engine, args.products)
+
+    encoder = "orjson" if serialization.orjson is not None else "json (fallback)"
+    cases = [
+        ("list: entities + ProductRead", entities_with_validation),
+        ("list: rows + json", rows_with_json),
+        (f"list: rows + {encoder}", rows_with_fast_encoder),
+        ("export: rows + json", export_ndjson(lambda row: json.dumps(row).encode())),
+        (f"export: rows + {encoder}", export_ndjson(serialization.dumps)),
+    ]
+    scale = 10_000 / args.products
+    print(f"{'path':<36} {'CPU ms / 10k products':>22}")
+    for name, fn in cases:
+        print(f"{name:<36} {cpu_ms(engine, fn, args.repeat) * scale:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Load-test GET /products and POST /orders and report machine-readable results.
+
+A catalog of the given size is seeded into a fresh SQLite file (or the given
+database). Each scenario is then driven at every requested concurrency,
+either in-process through httpx's ASGI transport, through a real uvicorn
+server on a local port, or both. For every run the JSON report has the
+throughput, p50/p95/p99 latency, error count and SQL statements per request,
+taken from the Server-Timing header.
+
+With --compare the run is checked against a stored baseline report and the
+command exits non-zero when throughput drops or p95 latency grows by more
+than --tolerance, when a scenario runs more SQL statements per request, or
+when it fails more requests (by count or rate) than the baseline did. Failed
+requests are often fast, so a run that fails many would otherwise pass as
+an improvement.
+
+Usage:
+    python -m benchmarks.load_test [--products 10000] [--requests 1000]
+        [--concurrency 1 8 32] [--transport asgi uvicorn] [--async-db]
+        [--database-url URL] [--output results.json]
+        [--compare baseline.json] [--tolerance 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import anyio.to_thread
+import httpx
+import uvicorn
+from sqlalchemy import update
+from sqlmodel import Session, create_engine, select
+
+from app.cache import get_product_cache
+from app.models import Product
+from benchmarks.async_stack import build_app
+from benchmarks.product_pagination import seed
+
+_STATEMENTS = re.compile(r'desc="(\d+) queries"')
+# Extra statements per request, on average, tolerated by --compare
+STATEMENT_SLACK = 0.5
+
+
+def scenarios(product_ids):
+    """
+    Request factories by scenario name; each returns (method, url, json).
+    """
+    return {
+        "list_products": lambda: ("GET", "/products?limit=100", None),
+        "list_products_in_stock": lambda: (
+            "GET",
+            "/products?limit=100&in_stock=true",
+            None,
+        ),
+        "get_product": lambda: ("GET", f"/products/{random.choice(product_ids)}", None),
+        "create_order": lambda: (
+            "POST",
+            "/orders",
+            {
+                "products": [
+                    {"product_id": product_id, "quantity": 1}
+                    for product_id in random.sample(product_ids, 3)
+                ]
+            },
+        ),
+    }
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def drive(client, make_request, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statements = [], []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        method, url, body = make_request()
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+        match = _STATEMENTS.search(response.headers.get("Server-Timing", ""))
+        if match:
+            statements.append(int(match.group(1)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "statements_per_request": (
+            round(sum(statements) / len(statements), 2) if statements else None
+        ),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """
+    Serve the app with uvicorn on a local port from a background thread.
+    """
+
+    def __init__(self, app):
+        self.port = free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(
+                app,
+                host="127.0.0.1",
+                port=self.port,
+                log_level="warning",
+                # seed() already created the schema and sessions are overridden
+                lifespan="off",
+            )
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def run_transport(transport, client_options, args, product_ids):
+    # Sync handlers served in-process run on this loop's threadpool
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, max(args.concurrency))
+    results = []
+    for name, make_request in scenarios(product_ids).items():
+        for concurrency in args.concurrency:
+            get_product_cache().clear()
+            async with httpx.AsyncClient(**client_options) as client:
+                result = await drive(client, make_request, args.requests, concurrency)
+            result.update(scenario=name, transport=transport, concurrency=concurrency)
+            results.append(result)
+            print(
+                f"{name:>24} {transport:>8} c={concurrency:<4} "
+                f"{result['throughput_rps']:>9.1f} req/s "
+                f"p95 {result['p95_ms']:>8.2f} ms "
+                f"sql/req {result['statements_per_request']}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def run(args, database_url):
+    engine = create_engine(database_url)
+    seed(engine, args.products)
+    with Session(engine) as session:
+        product_ids = session.exec(
+            select(Product.id).where(Product.stock > 0).limit(10_000)
+        ).all()
+        # Give the ordered products enough stock for every order to succeed
+        session.exec(
+            update(Product).where(Product.id.in_(product_ids)).values(stock=1_000_000)
+        )
+        session.commit()
+    engine.dispose()
+
+    app = build_app(args.async_db, database_url, max(args.concurrency))
+    results = []
+    if "asgi" in args.transport:
+        client_options = {
+            "transport": httpx.ASGITransport(app=app),
+            "base_url": "http://bench",
+        }
+        results += asyncio.run(run_transport("asgi", client_options, args, product_ids))
+    if "uvicorn" in args.transport:
+        with BackgroundServer(app) as base_url:
+            client_options = {
+                "base_url": base_url,
+                "limits": httpx.Limits(max_connections=max(args.concurrency)),
+                "timeout": 60,
+            }
+            results += asyncio.run(
+                run_transport("uvicorn", client_options, args, product_ids)
+            )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return the regressions of `results` against a baseline report.
+    """
+    previous = {
+        (r["scenario"], r["transport"], r["concurrency"]): r
+        for r in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        key = (result["scenario"], result["transport"], result["concurrency"])
+        base = previous.get(key)
+        if base is None:
+            continue
+        label = "{} {} c={}".format(*key)
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {result['throughput_rps']} req/s "
+                f"< baseline {base['throughput_rps']}"
+            )
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {result['p95_ms']} ms > baseline {base['p95_ms']}"
+            )
+        errors, base_errors = result["errors"], base.get("errors", 0)
+        if (
+            errors > base_errors
+            or errors / result["requests"] > base_errors / base["requests"]
+        ):
+            regressions.append(
+                f"{label}: {errors}/{result['requests']} requests failed "
+                f"> baseline {base_errors}/{base['requests']}"
+            )
+        # Cache hits make the average fractional; half a statement is an N+1
+        if (result["statements_per_request"] or 0) > (
+            base["statements_per_request"] or 0
+        ) + STATEMENT_SLACK:
+            regressions.append(
+                f"{label}: {result['statements_per_request']} statements/request "
+                f"> baseline {base['statements_per_request']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--transport",
+        nargs="+",
+        choices=["asgi", "uvicorn"],
+        default=["asgi", "uvicorn"],
+    )
+    parser.add_argument("--async-db", action="store_true")
+    parser.add_argument("--database-url")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to check against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    report = {
+        "meta": {
+            "products": args.products,
+            "requests": args.requests,
+            "async_db": args.async_db,
+            "database": create_engine(database_url).dialect.name,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": run(args, database_url),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(report["results"], json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure database round trips and latency of create_order against cart size.
+
+Usage:
+    python -m benchmarks.order_round_trips [--sizes 1 10 50 100 500] [--repeat 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Product
+from app.schemas import OrderCreate, OrderItem
+from app.services.order_service import create_order
+
+
+def build_engine():
+    """
+    Create an isolated in-memory SQLite engine with the schema in place.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def run(sizes, repeat):
+    engine = build_engine()
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    with Session(engine) as session:
+        products = [
+            Product(name=f"P{i}", description="", price=1.0, stock=10**9)
+            for i in range(max(sizes))
+        ]
+        session.add_all(products)
+        session.commit()
+        product_ids = [product.id for product in products]
+
+    print(f"{'cart size':>10} {'round trips':>12} {'p50 ms':>10} {'max ms':>10}")
+    for size in sizes:
+        order_data = OrderCreate(
+            products=[
+                OrderItem(product_id=pid, quantity=1) for pid in product_ids[:size]
+            ]
+        )
+        timings = []
+        for _ in range(repeat):
+            with Session(engine) as session:
+                statements.clear()
+                start = time.perf_counter()
+                create_order(session, order_data)
+                timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{size:>10} {len(statements):>12} "
+            f"{statistics.median(timings):>10.2f} {max(timings):>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
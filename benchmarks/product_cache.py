@@ -0,0 +1,72 @@
+"""
+Compare GET /products latency with the product cache cold and warm.
+
+Cold requests clear the cache first, so every page is read from the
+database; warm requests are served from the in-process LRU.
+
+Usage:
+    python -m benchmarks.product_cache [--products 10000]
+        [--limits 100 1000] [--repeat 50] [--database-url URL]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine
+
+from app.cache import get_product_cache
+from app.database import get_session
+from app.main import create_app
+from benchmarks.product_pagination import seed
+
+
+def time_requests(client, params, repeat, clear):
+    cache = get_product_cache()
+    timings = []
+    for _ in range(repeat):
+        if clear:
+            cache.clear()
+        start = time.perf_counter()
+        client.get("/products", params=params).raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url)
+    seed(engine, args.products)
+
+    app = create_app()
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override
+    client = TestClient(app)
+
+    print(f"{'limit':>6} {'cold ms':>10} {'warm ms':>10} {'speedup':>8}")
+    for limit in args.limits:
+        params = {"limit": limit, "in_stock": True}
+        cold = time_requests(client, params, args.repeat, clear=True)
+        warm = time_requests(client, params, args.repeat, clear=False)
+        print(f"{limit:>6} {cold:>10.2f} {warm:>10.2f} {cold / warm:>7.1f}x")
+    print(get_product_cache().stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Show that GET /products page latency stays flat as the catalog grows.
+
+For each catalog size the table is seeded into a fresh SQLite file (or the
+given database) and three pages are timed through the ASGI app: the first
+page, a page deep in the catalog (keyset cursor near the end), an in-stock
+page (partial index on id) and a narrow price band (ix_product_price_id).
+
+Usage:
+    python -m benchmarks.product_pagination [--sizes 1000 10000 100000 1000000]
+        [--database-url URL] [--limit 100] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.database import get_session
+from app.main import create_app
+from app.models import Product
+
+SEED_CHUNK = 10_000
+
+
+def seed(engine, count):
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(count)
+    with engine.begin() as connection:
+        for start in range(0, count, SEED_CHUNK):
+            rows = [
+                {
+                    "name": f"Product {i}",
+                    "description": "Benchmark item",
+                    "price": round(rng.uniform(1, 500), 2),
+                    "stock": rng.randint(0, 50),
+                }
+                for i in range(start, min(start + SEED_CHUNK, count))
+            ]
+            connection.execute(insert(Product), rows)
+        # Refresh planner statistics, as autovacuum would on Postgres
+        connection.execute(text("ANALYZE"))
+
+
+def time_page(client, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/products", params=params)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--database-url")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url)
+    app = create_app()
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override
+    client = TestClient(app)
+
+    print(
+        f"{'rows':>10} {'first ms':>10} {'deep ms':>10} "
+        f"{'in stock ms':>12} {'price ms':>10}"
+    )
+    for size in args.sizes:
+        seed(engine, size)
+        first = time_page(client, {"limit": args.limit}, args.repeat)
+        deep = time_page(
+            client,
+            {"limit": args.limit, "cursor": max(size - 2 * args.limit, 0)},
+            args.repeat,
+        )
+        in_stock = time_page(
+            client, {"limit": args.limit, "in_stock": True}, args.repeat
+        )
+        price = time_page(
+            client,
+            {"limit": args.limit, "min_price": 100, "max_price": 101},
+            args.repeat,
+        )
+        print(
+            f"{size:>10} {first:>10.2f} {deep:>10.2f} "
+            f"{in_stock:>12.2f} {price:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Show GET /products/search latency as the catalog grows.
+
+For each catalog size the table is seeded into a fresh SQLite file (or the
+given database) with names and descriptions drawn from a fixed vocabulary,
+so every word matches about the same share of the catalog. Three searches
+are timed with a different random word each time: one word, two words, and
+the fifth page of one word. Query medians and p95s (the search service
+against the database) are printed with the end-to-end median through the
+ASGI app, and the run fails when any query p95 exceeds --budget-ms.
+Ranking cost follows the number of matches per word, which --vocabulary
+controls (about 11 * rows / vocabulary).
+
+Usage:
+    python -m benchmarks.product_search [--sizes 10000 100000 1000000]
+        [--database-url URL] [--vocabulary 5000] [--repeat 50] [--budget-ms 5]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.database import get_session
+from app.main import create_app
+from app.models import Product
+from app.schemas import ProductSearch
+from app.services.search_service import search_products
+
+SEED_CHUNK = 10_000
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "pe", "zu", "gra", "bel"]
+
+
+def vocabulary(size):
+    """
+    `size` distinct pronounceable words, the same on every run.
+    """
+    words = (
+        "".join(parts)
+        for length in itertools.count(2)
+        for parts in itertools.product(SYLLABLES, repeat=length)
+    )
+    return list(itertools.islice(words, size))
+
+
+def seed(engine, count, words):
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(count)
+    with engine.begin() as connection:
+        for start in range(0, count, SEED_CHUNK):
+            rows = [
+                {
+                    "name": " ".join(rng.choices(words, k=3)),
+                    "description": " ".join(rng.choices(words, k=8)),
+                    "price": round(rng.uniform(1, 500), 2),
+                    "stock": rng.randint(0, 50),
+                }
+                for _ in range(start, min(start + SEED_CHUNK, count))
+            ]
+            connection.execute(insert(Product), rows)
+        # Refresh planner statistics, as autovacuum would on Postgres
+        connection.execute(text("ANALYZE"))
+
+
+def time_query(engine, make_params, repeat):
+    timings = []
+    with Session(engine) as session:
+        for _ in range(repeat):
+            search = ProductSearch(**make_params())
+            start = time.perf_counter()
+            search_products(session, search)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+
+def time_request(client, make_params, repeat):
+    timings = []
+    for _ in range(repeat):
+        params = make_params()
+        start = time.perf_counter()
+        response = client.get("/products/search", params=params)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--database-url")
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench.db"
+    )
+    engine = create_engine(database_url)
+    app = create_app()
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override
+    client = TestClient(app)
+    words = vocabulary(args.vocabulary)
+    rng = random.Random(0)
+    searches = {
+        "one word": lambda: {"q": rng.choice(words), "limit": args.limit},
+        "two words": lambda: {"q": " ".join(rng.sample(words, 2))},
+        "page 5": lambda: {
+            "q": rng.choice(words),
+            "limit": args.limit,
+            "cursor": 4 * args.limit,
+        },
+    }
+
+    print(
+        f"{'rows':>10} "
+        + " ".join(f"{name + ' p50/p95 ms':>24}" for name in searches)
+        + f" {'http p50 ms':>12}"
+    )
+    worst = 0.0
+    for size in args.sizes:
+        seed(engine, size, words)
+        cells = []
+        for make_params in searches.values():
+            median, p95 = time_query(engine, make_params, args.repeat)
+            worst = max(worst, p95)
+            cells.append(f"{median:>11.2f} / {p95:>8.2f}")
+        http = time_request(client, searches["one word"], args.repeat)
+        print(f"{size:>10} " + " ".join(f"{c:>24}" for c in cells) + f" {http:>12.2f}")
+
+    print(f"worst query p95 {worst:.2f} ms (budget {args.budget_ms:.2f} ms)")
+    if worst > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
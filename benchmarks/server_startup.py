@@ -0,0 +1,124 @@
+"""
+Measure how long the production server (python -m app.server) takes to
+start serving and to shut down, for several worker counts.
+
+Each run starts the server against a fresh SQLite file (or the given
+database) and reports the parent's preload and schema timings from its
+"Starting workers" log line, the time until GET /products first answers,
+and the time from SIGTERM until the server has exited.
+
+Usage:
+    python -m benchmarks.server_startup [--workers 1 2 4] [--database-url URL]
+        [--repeat 3] [--port 8765]
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+READY_TIMEOUT = 60
+
+
+def start_server(workers, database_url, port):
+    env = dict(
+        os.environ,
+        WEB_WORKERS=str(workers),
+        PORT=str(port),
+        HOST="127.0.0.1",
+        DATABASE_URL=database_url,
+        LOG_FORMAT="json",
+        TESTING="0",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.server"],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def wait_ready(port):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/products").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("server did not become ready")
+
+
+def startup_log(stderr_lines):
+    for line in stderr_lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("message") == "Starting workers":
+            return record
+    return {}
+
+
+def run_once(workers, database_url, port):
+    start = time.perf_counter()
+    process = start_server(workers, database_url, port)
+    try:
+        wait_ready(port)
+        ready_ms = (time.perf_counter() - start) * 1000
+    finally:
+        stop = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        _, stderr = process.communicate(timeout=READY_TIMEOUT)
+        stop_ms = (time.perf_counter() - stop) * 1000
+    record = startup_log(stderr.splitlines())
+    return {
+        "preload_ms": record.get("preload_ms", float("nan")),
+        "schema_ms": record.get("schema_ms", float("nan")),
+        "ready_ms": ready_ms,
+        "stop_ms": stop_ms,
+        "exit_code": process.returncode,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--database-url")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(
+        f"{'workers':>8} {'preload ms':>11} {'schema ms':>10} "
+        f"{'ready ms':>9} {'stop ms':>8} {'exit':>5}"
+    )
+    for workers in args.workers:
+        runs = []
+        for _ in range(args.repeat):
+            database_url = args.database_url or "sqlite:///" + os.path.join(
+                tempfile.mkdtemp(), "bench.db"
+            )
+            runs.append(run_once(workers, database_url, args.port))
+        median = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("preload_ms", "schema_ms", "ready_ms", "stop_ms")
+        }
+        exit_codes = {run["exit_code"] for run in runs}
+        print(
+            f"{workers:>8} {median['preload_ms']:>11.1f} {median['schema_ms']:>10.1f} "
+            f"{median['ready_ms']:>9.1f} {median['stop_ms']:>8.1f} "
+            f"{','.join(map(str, sorted(exit_codes))):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
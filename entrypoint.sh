@@ -1,7 +1,10 @@
 #!/bin/sh
 
-# Apply database migrations
-alembic upgrade head
+# Apply database migrations, unless another container runs them
+# (docker-compose runs them once, in the migrate service)
+if [ "${RUN_MIGRATIONS:-1}" = "1" ]; then
+    alembic upgrade head
+fi
 
 # Start Uvicorn server
 exec "$@"
@@ -3,12 +3,16 @@ import os
 os.environ["TESTING"] = "1"
 
 import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.testclient import TestClient
 
 import app.models  # Ensure models are imported
-from app.main import app
-from app.database import get_session
+from app.cache import get_product_cache
+from app.main import app, create_app
+from app.database import get_async_session, get_session, to_async_url
 
 # Reuse the same shared in-memory DB
 TEST_DATABASE_URL = "sqlite:///file::memory:?cache=shared"
@@ -19,12 +23,26 @@ test_engine = create_engine(
     echo=False,
 )
 
+# Same database through the async driver; NullPool because every TestClient
+# runs the app on its own event loop
+async_test_engine = create_async_engine(
+    to_async_url(TEST_DATABASE_URL),
+    connect_args={"check_same_thread": False, "uri": True},
+    poolclass=NullPool,
+    echo=False,
+)
+
 
 def override_get_session():
     with Session(test_engine) as session:
         yield session
 
 
+async def override_get_async_session():
+    async with AsyncSession(async_test_engine) as session:
+        yield session
+
+
 @pytest.fixture(scope="function", autouse=True)
 def fresh_db():
     """
@@ -33,6 +51,7 @@ def fresh_db():
     # Drop + re-create tables
     SQLModel.metadata.drop_all(test_engine)
     SQLModel.metadata.create_all(test_engine)
+    get_product_cache().clear()
     yield
     # (Optional) drop again if you want to ensure absolutely clean for next test
     # SQLModel.metadata.drop_all(test_engine)
@@ -45,6 +64,16 @@ def client():
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def async_client():
+    """
+    Client for the app built with the async engine and handlers.
+    """
+    async_app = create_app(async_db=True)
+    async_app.dependency_overrides[get_async_session] = override_get_async_session
+    yield TestClient(async_app)
+
+
 @pytest.fixture
 def db_session():
     """
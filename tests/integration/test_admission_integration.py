@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import limits
+from app.limits import (
+    AdaptiveConcurrencyLimit,
+    MemoryTokenBuckets,
+    get_order_concurrency_limit,
+    get_order_rate_limiter,
+)
+from app.metrics import METRICS
+from app.models import Product
+from benchmarks.async_stack import build_app
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+def _order_payload(client) -> dict:
+    product = {"name": "Hot", "description": "", "price": 1.0, "stock": 100}
+    product_id = client.post("/products", json=product).json()["id"]
+    return {"products": [{"product_id": product_id, "quantity": 1}]}
+
+
+def test_orders_over_client_rate_get_429(client, monkeypatch):
+    """
+    Each client spends its own burst; the next order is refused with
+    Retry-After, without touching another client's bucket.
+    """
+    monkeypatch.setattr(limits, "RATE_LIMIT_KEY_HEADER", "X-Api-Key")
+    buckets = MemoryTokenBuckets(rate=0.1, burst=2)
+    client.app.dependency_overrides[get_order_rate_limiter] = lambda: buckets
+    payload = _order_payload(client)
+    alice = {"X-Api-Key": "alice"}
+
+    statuses = [client.post("/orders", json=payload, headers=alice).status_code]
+    statuses.append(client.post("/orders", json=payload, headers=alice).status_code)
+    refused = client.post("/orders", json=payload, headers=alice)
+    assert statuses == [201, 201]
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
+
+    other = client.post("/orders", json=payload, headers={"X-Api-Key": "bob"})
+    assert other.status_code == 201
+    assert METRICS.rejected == {("/orders", "rate_limited"): 1}
+
+
+def test_blocking_buckets_are_taken_off_the_event_loop(async_client):
+    """
+    A bucket that calls Redis is taken in a worker thread, so a slow Redis
+    does not stall the event loop.
+    """
+
+    class BlockingBuckets(MemoryTokenBuckets):
+        blocking = True
+
+        def take(self, key):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().take(key)
+
+    on_loop = []
+    buckets = BlockingBuckets(rate=10.0, burst=10)
+    async_client.app.dependency_overrides[get_order_rate_limiter] = lambda: buckets
+    payload = _order_payload(async_client)
+    assert async_client.post("/orders", json=payload).status_code == 201
+    assert on_loop == [False]
+
+
+def test_in_flight_limit_is_off_by_default():
+    assert limits.ORDER_MAX_IN_FLIGHT == 0
+    get_order_concurrency_limit.cache_clear()
+    assert get_order_concurrency_limit() is None
+
+
+def test_orders_over_in_flight_limit_are_shed(client):
+    """
+    With every in-flight slot taken, new orders get 503 until one frees up,
+    and the shed count and limit appear in /metrics.
+    """
+    limit = AdaptiveConcurrencyLimit(max_limit=1, max_pool_wait_ms=0)
+    client.app.dependency_overrides[get_order_concurrency_limit] = lambda: limit
+    payload = _order_payload(client)
+
+    assert limit.try_acquire()
+    shed = client.post("/orders", json=payload)
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+
+    limit.release()
+    assert client.post("/orders", json=payload).status_code == 201
+    assert limit.in_flight == 0
+
+    metrics = client.get("/metrics").text
+    assert 'http_requests_rejected_total{route="/orders",reason="overloaded"} 1' in (
+        metrics
+    )
+    assert "order_concurrency_limit 1" in metrics
+
+
+def test_benchmark_app_does_not_shed_orders_at_its_concurrency(tmp_path):
+    """
+    The load-test app must time orders, not 503s: with the default settings
+    it accepts every order at the benchmark's highest concurrency.
+    """
+    concurrency = 32
+    database_url = f"sqlite:///{tmp_path / 'bench.db'}"
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        product = Product(name="Hot", description="", price=1.0, stock=1000)
+        session.add(product)
+        session.commit()
+        payload = {"products": [{"product_id": product.id, "quantity": 1}]}
+    engine.dispose()
+    app = build_app(False, database_url, concurrency)
+
+    async def flood():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            return await asyncio.gather(
+                *(client.post("/orders", json=payload) for _ in range(concurrency * 2))
+            )
+
+    statuses = [response.status_code for response in asyncio.run(flood())]
+    assert 503 not in statuses
+    assert statuses.count(201) == concurrency * 2
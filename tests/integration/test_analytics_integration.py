@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Session
+
+from app.services.analytics_service import (
+    compact_sales,
+    rebuild_sales_rollups,
+    sales_totals,
+)
+from tests.conftest import test_engine
+from tests.unit.test_utils import count_statements
+
+
+def _create_products(client, *stocks: int) -> list[int]:
+    ids = []
+    for i, stock in enumerate(stocks):
+        payload = {"name": f"P{i}", "description": "", "price": 2.0, "stock": stock}
+        ids.append(client.post("/products", json=payload).json()["id"])
+    return ids
+
+
+def _order(client, quantities: dict[int, int]) -> None:
+    items = [{"product_id": pid, "quantity": qty} for pid, qty in quantities.items()]
+    assert client.post("/orders", json={"products": items}).status_code == 201
+
+
+def _compact() -> int:
+    with Session(test_engine) as session:
+        return compact_sales(session)
+
+
+def test_top_sellers_and_revenue_from_rollups(client):
+    """
+    Orders appear in the analytics once compacted, and only once.
+    """
+    first, second = _create_products(client, 50, 50)
+    _order(client, {first: 1, second: 4})
+    _order(client, {second: 2})
+
+    assert client.get("/analytics/top-sellers").json() == []
+    assert _compact() == 2
+    assert _compact() == 0
+
+    with count_statements(test_engine) as statements:
+        response = client.get("/analytics/top-sellers", params={"limit": 1})
+    assert len(statements) == 1
+    assert response.json() == [
+        {"product_id": second, "name": "P1", "units_sold": 6, "revenue": 12.0}
+    ]
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert client.get("/analytics/revenue").json() == [
+        {"start": today, "orders": 2, "units_sold": 7, "revenue": 14.0}
+    ]
+    month = client.get("/analytics/revenue", params={"bucket": "month"}).json()
+    assert month[0]["start"] == today[:8] + "01"
+
+
+def test_revenue_rejects_unbounded_ranges(client):
+    """
+    Reversed or overlong date ranges are rejected.
+    """
+    params = {"start": "2026-02-01", "end": "2026-01-01"}
+    assert client.get("/analytics/revenue", params=params).status_code == 400
+    params = {"start": "2020-01-01", "end": "2026-01-01"}
+    assert client.get("/analytics/revenue", params=params).status_code == 400
+
+
+def test_low_stock_lists_emptiest_first(client):
+    """
+    Products at or below the threshold are listed by stock with their sales.
+    """
+    low, empty, _ = _create_products(client, 5, 1, 100)
+    _order(client, {empty: 1})
+    _compact()
+
+    response = client.get("/analytics/low-stock", params={"threshold": 5})
+    assert [
+        (p["product_id"], p["stock"], p["units_sold"]) for p in response.json()
+    ] == [
+        (empty, 0, 1),
+        (low, 5, 0),
+    ]
+
+
+def test_rebuild_matches_incremental_rollups(client):
+    """
+    Recomputing the rollups from scratch reproduces the incremental totals.
+    """
+    first, second = _create_products(client, 50, 50)
+    _order(client, {first: 3})
+    _compact()
+    _order(client, {first: 1, second: 2})
+    _compact()
+
+    with Session(test_engine) as session:
+        result = rebuild_sales_rollups(session)
+        assert result["before"] == result["after"]
+        assert sales_totals(session) == {
+            "orders": 2,
+            "units_sold": 6,
+            "revenue": 12.0,
+            "days": 1,
+        }
+
+
+def test_analytics_async_routes(async_client):
+    """
+    The async stack serves the same analytics.
+    """
+    (product,) = _create_products(async_client, 3)
+    _order(async_client, {product: 2})
+    _compact()
+
+    top = async_client.get("/analytics/top-sellers", params={"sort": "revenue"})
+    assert top.json()[0]["revenue"] == 4.0
+    assert async_client.get("/analytics/revenue").json()[0]["orders"] == 1
+    assert async_client.get("/analytics/low-stock").json()[0]["stock"] == 1
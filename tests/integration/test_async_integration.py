@@ -0,0 +1,86 @@
+def test_list_products_empty_async(async_client):
+    """
+    The async stack returns an empty list when no products exist.
+    """
+    response = async_client.get("/products")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_create_product_and_order_async(async_client):
+    """
+    Create a product and order it through the async handlers.
+    """
+    product_payload = {
+        "name": "Async Product",
+        "description": "Served by the async stack",
+        "price": 15.0,
+        "stock": 3,
+    }
+    prod_response = async_client.post("/products", json=product_payload)
+    assert prod_response.status_code == 201
+    product = prod_response.json()
+
+    order_payload = {"products": [{"product_id": product["id"], "quantity": 2}]}
+    order_response = async_client.post("/orders", json=order_payload)
+    assert order_response.status_code == 201
+    created_order = order_response.json()
+    assert created_order["status"] == "completed"
+    assert created_order["total_price"] == 30.0
+    assert [p["id"] for p in created_order["products"]] == [product["id"]]
+
+    product_list = async_client.get("/products").json()
+    assert product_list[0]["stock"] == 1
+
+
+def test_create_order_insufficient_stock_async(async_client):
+    """
+    Stock validation errors surface unchanged through the async handlers.
+    """
+    product_payload = {
+        "name": "Low Stock",
+        "description": "Barely enough",
+        "price": 5.0,
+        "stock": 1,
+    }
+    product = async_client.post("/products", json=product_payload).json()
+
+    order_payload = {"products": [{"product_id": product["id"], "quantity": 2}]}
+    order_response = async_client.post("/orders", json=order_payload)
+    assert order_response.status_code == 400
+    assert "Insufficient stock for product" in order_response.json()["detail"]
+
+
+def test_create_product_negative_price_async(async_client):
+    """
+    The async create path applies the same price validation.
+    """
+    payload = {"name": "Bad", "description": "", "price": -1.0, "stock": 1}
+    response = async_client.post("/products", json=payload)
+    assert response.status_code == 400
+    assert "Price cannot be negative" in response.json()["detail"]
+
+
+def test_read_orders_async(async_client):
+    """
+    Order reads eager-load their lines on the async stack too.
+    """
+    payload = {"name": "Async", "description": "", "price": 2.0, "stock": 5}
+    product = async_client.post("/products", json=payload).json()
+    order_payload = {"products": [{"product_id": product["id"], "quantity": 3}]}
+    order = async_client.post("/orders", json=order_payload).json()
+
+    response = async_client.get(f"/orders/{order['id']}")
+    assert response.status_code == 200
+    assert response.json()["items"][0]["quantity"] == 3
+    assert async_client.get("/orders").json() == [response.json()]
+
+
+def test_search_products_async(async_client):
+    """
+    The async stack searches through the same full-text index.
+    """
+    payload = {"name": "Copper kettle", "description": "", "price": 2.0, "stock": 5}
+    product = async_client.post("/products", json=payload).json()
+    response = async_client.get("/products/search", params={"q": "kettles"})
+    assert [p["id"] for p in response.json()] == [product["id"]]
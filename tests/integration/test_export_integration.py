@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.services import export_service
+
+
+@pytest.fixture
+def catalog(client, monkeypatch):
+    """
+    Three products, exported in small batches to exercise the cursor.
+    """
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 2)
+    ids = []
+    for i in range(3):
+        payload = {
+            "name": f"Item {i}",
+            "description": "Exported, with a comma",
+            "price": 2.5 + i,
+            "stock": i,
+        }
+        ids.append(client.post("/products", json=payload).json()["id"])
+    return ids
+
+
+def test_export_ndjson(client, catalog):
+    """
+    Every product is streamed as one JSON object per line.
+    """
+    response = client.get("/products/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == catalog
+    assert rows[0] == {
+        "id": catalog[0],
+        "name": "Item 0",
+        "description": "Exported, with a comma",
+        "price": 2.5,
+        "stock": 0,
+    }
+
+
+def test_export_csv(client, catalog):
+    """
+    The CSV export has a header row followed by one row per product.
+    """
+    response = client.get("/products/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "name", "description", "price", "stock"]
+    assert [int(row[0]) for row in rows[1:]] == catalog
+    assert rows[1][2] == "Exported, with a comma"
+
+
+def test_export_resumes_after_id(client, catalog):
+    """
+    Passing the last exported id resumes the export from the next product.
+    """
+    response = client.get("/products/export", params={"after": catalog[0]})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == catalog[1:]
+
+
+def test_export_async(async_client):
+    """
+    The async stack streams the same export.
+    """
+    payload = {"name": "Async", "description": "", "price": 1.0, "stock": 1}
+    product = async_client.post("/products", json=payload).json()
+
+    response = async_client.get("/products/export")
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == [product]
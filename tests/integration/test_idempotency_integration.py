@@ -0,0 +1,229 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.models import IdempotencyKey, Order, Product
+from app.schemas import OrderCreate
+from app.services import idempotency_service, order_service
+from app.services.idempotency_service import purge_expired_keys
+from tests.conftest import test_engine
+
+
+def _create_product(client, stock=5):
+    response = client.post(
+        "/products",
+        json={
+            "name": "Keyed",
+            "description": "Retry me",
+            "price": 10.0,
+            "stock": stock,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _order_count():
+    with Session(test_engine) as session:
+        return session.exec(select(func.count()).select_from(Order)).one()
+
+
+@pytest.mark.parametrize("client_fixture", ["client", "async_client"])
+def test_retry_with_same_key_replays_response(request, client_fixture):
+    """
+    A retried POST /orders with the same key returns the first response
+    without placing a second order.
+    """
+    client = request.getfixturevalue(client_fixture)
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 2}]}
+    headers = {"Idempotency-Key": "order-1"}
+
+    first = client.post("/orders", json=payload, headers=headers)
+    second = client.post("/orders", json=payload, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _order_count() == 1
+    assert client.get(f"/products/{product['id']}").json()["stock"] == 3
+
+
+def test_key_reused_for_different_body_is_rejected(client):
+    product = _create_product(client)
+    headers = {"Idempotency-Key": "order-2"}
+    client.post(
+        "/orders",
+        json={"products": [{"product_id": product["id"], "quantity": 1}]},
+        headers=headers,
+    )
+
+    response = client.post(
+        "/orders",
+        json={"products": [{"product_id": product["id"], "quantity": 2}]},
+        headers=headers,
+    )
+    assert response.status_code == 422
+    assert _order_count() == 1
+
+
+def test_client_error_is_replayed(client):
+    """
+    A final 4xx is stored, so a retry gets the same error even after stock
+    becomes available.
+    """
+    product = _create_product(client, stock=1)
+    payload = {"products": [{"product_id": product["id"], "quantity": 2}]}
+    headers = {"Idempotency-Key": "order-3"}
+
+    first = client.post("/orders", json=payload, headers=headers)
+    assert first.status_code == 400
+
+    with Session(test_engine) as session:
+        restocked = session.get(Product, product["id"])
+        restocked.stock = 10
+        session.add(restocked)
+        session.commit()
+    second = client.post("/orders", json=payload, headers=headers)
+    assert second.status_code == 400
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_in_flight_key_returns_conflict(client, monkeypatch):
+    """
+    A duplicate that arrives while the first request has not finished waits,
+    then gives up with 409 rather than placing the order twice.
+    """
+    monkeypatch.setattr(idempotency_service, "IDEMPOTENCY_WAIT", 0.1)
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    with Session(test_engine) as session:
+        hash_ = idempotency_service.request_fingerprint(
+            OrderCreate.model_validate(payload)
+        )
+        assert idempotency_service.claim_key(session, "order-4", hash_) is None
+
+    response = client.post(
+        "/orders", json=payload, headers={"Idempotency-Key": "order-4"}
+    )
+    assert response.status_code == 409
+    assert _order_count() == 0
+
+
+def test_abandoned_claim_is_taken_over_after_lease(client, monkeypatch):
+    """
+    A claim whose request crashed before storing a response stops blocking
+    the key once its lease runs out.
+    """
+    monkeypatch.setattr(idempotency_service, "IDEMPOTENCY_WAIT", 0.1)
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    headers = {"Idempotency-Key": "order-crashed"}
+    with Session(test_engine) as session:
+        hash_ = idempotency_service.request_fingerprint(
+            OrderCreate.model_validate(payload)
+        )
+        assert idempotency_service.claim_key(session, "order-crashed", hash_) is None
+        record = session.get(IdempotencyKey, "order-crashed")
+        record.claimed_at = datetime.now(timezone.utc) - timedelta(
+            seconds=idempotency_service.IDEMPOTENCY_LEASE + 1
+        )
+        session.add(record)
+        session.commit()
+
+    response = client.post("/orders", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert _order_count() == 1
+    replay = client.post("/orders", json=payload, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert _order_count() == 1
+
+
+def test_response_commits_with_the_order(client, monkeypatch):
+    """
+    The response is stored in the order's transaction, so a failure after the
+    order commits cannot leave a claim that a retry would run again.
+    """
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    headers = {"Idempotency-Key": "order-committed"}
+
+    def crash():
+        raise RuntimeError("worker died after commit")
+
+    monkeypatch.setattr(order_service, "get_product_cache", crash)
+    with pytest.raises(RuntimeError):
+        client.post("/orders", json=payload, headers=headers)
+    monkeypatch.undo()
+
+    replay = client.post("/orders", json=payload, headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert _order_count() == 1
+
+
+def test_claim_taken_over_rolls_back_the_order(client, monkeypatch):
+    """
+    A request that outlived its lease and lost the claim to a retry does not
+    commit a second order.
+    """
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    claim_key = idempotency_service.claim_key
+
+    def claim_then_lose(session, key, request_hash, claimed_at=None):
+        record = claim_key(session, key, request_hash, claimed_at)
+        with Session(test_engine) as other:
+            taken = other.get(IdempotencyKey, key)
+            taken.claimed_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+            other.add(taken)
+            other.commit()
+        return record
+
+    monkeypatch.setattr(idempotency_service, "claim_key", claim_then_lose)
+    response = client.post(
+        "/orders", json=payload, headers={"Idempotency-Key": "order-lost"}
+    )
+    assert response.status_code == 409
+    assert _order_count() == 0
+    with Session(test_engine) as session:
+        assert session.get(IdempotencyKey, "order-lost").status_code is None
+
+
+def test_expired_key_can_be_reused(client):
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    headers = {"Idempotency-Key": "order-5"}
+    client.post("/orders", json=payload, headers=headers)
+    with Session(test_engine) as session:
+        record = session.get(IdempotencyKey, "order-5")
+        record.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        session.add(record)
+        session.commit()
+
+    response = client.post("/orders", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert _order_count() == 2
+
+
+def test_purge_expired_keys_in_batches(db_session):
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        db_session.add(
+            IdempotencyKey(
+                key=f"old-{i}", request_hash="x", expires_at=now - timedelta(hours=1)
+            )
+        )
+    db_session.add(
+        IdempotencyKey(
+            key="live", request_hash="x", expires_at=now + timedelta(hours=1)
+        )
+    )
+    db_session.commit()
+
+    assert purge_expired_keys(db_session, batch_size=2) == 5
+    assert db_session.exec(select(IdempotencyKey.key)).all() == ["live"]
@@ -0,0 +1,12 @@
+from app.database import get_engine
+
+
+def test_read_pool_stats_endpoint(client):
+    """
+    The internal endpoint exposes the primary engine's pool statistics once
+    the engine has been created.
+    """
+    get_engine()
+    response = client.get("/internal/pool")
+    assert response.status_code == 200
+    assert response.json()["primary"]["pool_size"] >= 0
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+
+from app.metrics import METRICS
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+def _statement_count(response):
+    match = re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"])
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize("client_fixture", ["client", "async_client"])
+def test_server_timing_reports_statements(request, client_fixture):
+    """
+    Statements run by sync handlers in the threadpool and by async handlers
+    on the async engine are both attributed to the request.
+    """
+    client = request.getfixturevalue(client_fixture)
+    response = client.post(
+        "/products",
+        json={"name": "Timed", "description": "", "price": 1.0, "stock": 1},
+    )
+    assert response.status_code == 201
+    assert _statement_count(response) >= 1
+    assert "app;dur=" in response.headers["Server-Timing"]
+
+
+def test_metrics_endpoint_reports_route_templates(client):
+    product = client.post(
+        "/products",
+        json={"name": "Scraped", "description": "", "price": 1.0, "stock": 1},
+    ).json()
+    client.get(f"/products/{product['id']}")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/products/{product_id}",status="200"} 1'
+    ) in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert f"/products/{product['id']}" not in body
+    assert 'http_request_sql_statements_total{method="POST",route="/products"}' in body
+    assert "db_pool_checked_out" in body
@@ -0,0 +1,134 @@
+import pytest
+from sqlmodel import select
+
+from app.models import OrderQueueEntry
+from app.services import order_queue_service
+from app.services.order_queue_service import drain_order_queue, process_order_batch
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def queued_orders(monkeypatch):
+    monkeypatch.setattr(order_queue_service, "ORDER_QUEUE", True)
+
+
+def _create_product(client, stock=10):
+    response = client.post(
+        "/products",
+        json={"name": "Queued", "description": "Later", "price": 5.0, "stock": stock},
+    )
+    return response.json()
+
+
+@pytest.mark.parametrize("client_fixture", ["client", "async_client"])
+def test_queued_order_is_accepted_then_completed(
+    request, client_fixture, queued_orders
+):
+    """
+    The order is answered with 202 as pending, with its stock already
+    reserved, and a worker batch completes it.
+    """
+    client = request.getfixturevalue(client_fixture)
+    product = _create_product(client)
+
+    response = client.post(
+        "/orders", json={"products": [{"product_id": product["id"], "quantity": 3}]}
+    )
+    assert response.status_code == 202
+    order = response.json()
+    assert order["status"] == "pending"
+    assert response.headers["Location"] == f"/orders/{order['id']}/status"
+    assert client.get(f"/products/{product['id']}").json()["stock"] == 7
+
+    status = client.get(response.headers["Location"]).json()
+    assert status == {"id": order["id"], "status": "pending", "queued_ahead": 0}
+
+    assert drain_order_queue(test_engine) == 1
+    status = client.get(response.headers["Location"]).json()
+    assert status == {"id": order["id"], "status": "completed", "queued_ahead": None}
+    assert client.get(f"/orders/{order['id']}").json()["status"] == "completed"
+
+
+@pytest.mark.parametrize("client_fixture", ["client", "async_client"])
+def test_idempotent_queued_order_and_replay_carry_location(
+    request, client_fixture, queued_orders
+):
+    """
+    An order sent with an Idempotency-Key gets the status URL too, and so
+    does every replay of it.
+    """
+    client = request.getfixturevalue(client_fixture)
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    headers = {"Idempotency-Key": "queued-order-1"}
+
+    first = client.post("/orders", json=payload, headers=headers)
+    replay = client.post("/orders", json=payload, headers=headers)
+
+    location = f"/orders/{first.json()['id']}/status"
+    assert first.status_code == replay.status_code == 202
+    assert first.headers["Location"] == replay.headers["Location"] == location
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert client.get(location).json()["status"] == "pending"
+
+
+def test_worker_finalizes_in_batches(client, db_session, queued_orders):
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    order_ids = [client.post("/orders", json=payload).json()["id"] for _ in range(3)]
+    assert client.get(f"/orders/{order_ids[2]}/status").json()["queued_ahead"] == 2
+
+    assert process_order_batch(db_session, batch_size=2) == 2
+    assert db_session.exec(select(OrderQueueEntry.order_id)).all() == [order_ids[2]]
+    assert process_order_batch(db_session, batch_size=2) == 1
+    assert process_order_batch(db_session, batch_size=2) == 0
+
+    statuses = {client.get(f"/orders/{i}/status").json()["status"] for i in order_ids}
+    assert statuses == {"completed"}
+
+
+def test_rejected_order_is_not_queued(client, db_session, queued_orders):
+    product = _create_product(client, stock=1)
+    response = client.post(
+        "/orders", json={"products": [{"product_id": product["id"], "quantity": 2}]}
+    )
+    assert response.status_code == 400
+    assert db_session.exec(select(OrderQueueEntry)).all() == []
+
+
+def test_orders_complete_immediately_without_queue(client):
+    product = _create_product(client)
+    response = client.post(
+        "/orders", json={"products": [{"product_id": product["id"], "quantity": 1}]}
+    )
+    assert response.status_code == 201
+    assert "Location" not in response.headers
+    assert client.get(f"/orders/{response.json()['id']}/status").json() == {
+        "id": response.json()["id"],
+        "status": "completed",
+        "queued_ahead": None,
+    }
+
+
+def test_order_status_not_found(client):
+    assert client.get("/orders/999/status").status_code == 404
+
+
+def test_drain_stops_between_batches(client, queued_orders):
+    """
+    A worker asked to stop finishes the batch in progress and leaves the rest
+    of the queue for the next run.
+    """
+    product = _create_product(client)
+    payload = {"products": [{"product_id": product["id"], "quantity": 1}]}
+    for _ in range(3):
+        assert client.post("/orders", json=payload).status_code == 202
+
+    batches = []
+
+    def stop_after_one():
+        batches.append(None)
+        return len(batches) > 1
+
+    assert drain_order_queue(test_engine, batch_size=1, stopping=stop_after_one) == 1
+    assert drain_order_queue(test_engine, batch_size=1) == 2
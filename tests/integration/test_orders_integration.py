@@ -1,3 +1,11 @@
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import Product
+from tests.conftest import test_engine
+from tests.unit.test_utils import count_statements
+
+
 def test_create_order_integration(client):
     """
     Create a product, then create an order for that product.
@@ -49,3 +57,102 @@ def test_create_order_insufficient_stock_integration(client):
     assert order_response.status_code == 400
     error = order_response.json()
     assert "Insufficient stock for product" in error["detail"]
+
+
+def _place_order(client, line_count):
+    """
+    Create `line_count` products and order two of each.
+    """
+    items = []
+    for i in range(line_count):
+        payload = {"name": f"P{i}", "description": "", "price": 1.0, "stock": 5}
+        product = client.post("/products", json=payload).json()
+        items.append({"product_id": product["id"], "quantity": 2})
+    response = client.post("/orders", json={"products": items})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_order_response_includes_line_quantities(client):
+    """
+    Order responses carry each line's quantity alongside the product.
+    """
+    order = _place_order(client, 2)
+    assert [item["quantity"] for item in order["items"]] == [2, 2]
+    assert order["items"][0]["product"]["name"] == "P0"
+    assert [p["id"] for p in order["products"]] == [
+        item["product_id"] for item in order["items"]
+    ]
+
+
+def test_read_order_by_id(client):
+    """
+    GET /orders/{id} returns the stored order, and 404 for unknown ids.
+    """
+    order = _place_order(client, 1)
+    response = client.get(f"/orders/{order['id']}")
+    assert response.status_code == 200
+    assert response.json() == order
+
+    assert client.get("/orders/999").status_code == 404
+
+
+def test_read_order_statement_count_is_constant(client):
+    """
+    Reading an order costs the same number of statements however many
+    lines it has.
+    """
+    small = _place_order(client, 1)
+    large = _place_order(client, 6)
+
+    counts = []
+    for order in (small, large):
+        with count_statements(test_engine) as statements:
+            assert client.get(f"/orders/{order['id']}").status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_order_history_keeps_purchase_time_snapshot(client):
+    """
+    Order lines keep the product's name and price as they were when the
+    order was placed, and reading them does not touch the product table.
+    """
+    order = _place_order(client, 2)
+    product_id = order["items"][0]["product_id"]
+    with Session(test_engine) as session:
+        session.exec(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(name="Renamed", price=9.5)
+        )
+        session.commit()
+
+    with count_statements(test_engine) as statements:
+        response = client.get(f"/orders/{order['id']}")
+    assert response.json() == order
+    line = response.json()["items"][0]
+    assert (line["product_name"], line["unit_price"]) == ("P0", 1.0)
+    assert line["line_total"] == 2.0
+    assert not any("FROM product " in statement for statement in statements)
+
+
+def test_list_orders_paginated(client):
+    """
+    Orders are listed page by page, at a constant statement count per page.
+    """
+    ids = [_place_order(client, 3)["id"] for _ in range(3)]
+
+    with count_statements(test_engine) as statements:
+        response = client.get("/orders", params={"limit": 2})
+    assert len(statements) == 2
+    assert [o["id"] for o in response.json()] == ids[:2]
+    assert all(len(o["items"]) == 3 for o in response.json())
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/orders", params={"limit": 2, "cursor": cursor})
+    assert [o["id"] for o in response.json()] == ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/orders", params={"status": "pending"})
+    assert response.json() == []
@@ -1,3 +1,13 @@
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import Product
+from app.services import search_service
+from app.services.bulk_service import insert_product_rows
+from tests.conftest import test_engine
+from tests.unit.test_utils import count_statements
+
+
 def test_list_products_empty(client):
     """
     When no products exist, /products should return an empty list.
@@ -45,3 +55,297 @@ def test_create_product_integration_negative_price(client):
     response = client.post("/products", json=payload)
     assert response.status_code == 400
     assert "Price cannot be negative" in response.json()["detail"]
+
+
+def _create_products(client, prices_and_stock):
+    ids = []
+    for i, (price, stock) in enumerate(prices_and_stock):
+        payload = {
+            "name": f"Product {i}",
+            "description": "Catalog item",
+            "price": price,
+            "stock": stock,
+        }
+        ids.append(client.post("/products", json=payload).json()["id"])
+    return ids
+
+
+def test_list_products_keyset_pagination(client):
+    """
+    Walk the catalog page by page using the X-Next-Cursor header.
+    """
+    ids = _create_products(client, [(1.0, 1)] * 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/products", params=params)
+        assert response.status_code == 200
+        seen.extend(p["id"] for p in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == ids
+
+
+def test_list_products_filters(client):
+    """
+    Filter the catalog by price range and stock availability.
+    """
+    cheap, mid, pricey, sold_out = _create_products(
+        client, [(5.0, 1), (15.0, 1), (50.0, 1), (15.0, 0)]
+    )
+
+    response = client.get("/products", params={"min_price": 10, "max_price": 20})
+    assert [p["id"] for p in response.json()] == [mid, sold_out]
+
+    response = client.get("/products", params={"in_stock": True})
+    assert [p["id"] for p in response.json()] == [cheap, mid, pricey]
+
+    response = client.get("/products", params={"in_stock": False})
+    assert [p["id"] for p in response.json()] == [sold_out]
+
+
+def test_list_products_sparse_fields(client):
+    """
+    Only the requested fields (plus the id cursor) are returned.
+    """
+    _create_products(client, [(5.0, 1)])
+
+    response = client.get("/products", params={"fields": "name,price"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "name": "Product 0", "price": 5.0}]
+
+    response = client.get("/products", params={"fields": "name,secret"})
+    assert response.status_code == 422
+
+
+def test_bulk_create_products_json(client):
+    """
+    Valid rows of a JSON array are inserted; invalid ones are reported.
+    """
+    payload = [
+        {"name": "A", "description": "ok", "price": 1.0, "stock": 1},
+        {"name": "B", "description": "bad price", "price": -1.0, "stock": 1},
+        {"name": "C", "description": "missing stock", "price": 1.0},
+        {"name": "D", "description": "ok", "price": 2.0, "stock": 0},
+    ]
+    response = client.post("/products/bulk", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    assert "Price cannot be negative" in result["errors"][0]["detail"]
+    assert "stock" in result["errors"][1]["detail"]
+
+    names = [p["name"] for p in client.get("/products").json()]
+    assert names == ["A", "D"]
+
+
+def test_bulk_create_products_rejects_out_of_range_rows(client):
+    """
+    Values the columns cannot hold reject their row, not the upload.
+    """
+    payload = [
+        {"name": "A", "description": "ok", "price": 1.0, "stock": 1},
+        {"name": "B", "description": "too many", "price": 1.0, "stock": 10**20},
+        {"name": "C", "description": "ok", "price": 2.0, "stock": 2},
+    ]
+    response = client.post("/products/bulk", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 2
+    assert [error["index"] for error in result["errors"]] == [1]
+    assert "stock" in result["errors"][0]["detail"]
+
+
+def test_bulk_insert_retries_rows_the_driver_rejects(db_session):
+    """
+    A row that reaches the driver and fails there (here an integer sqlite3
+    cannot bind) is reported on its own and the rest of the chunk lands.
+    """
+    rows = [
+        (0, {"name": "A", "description": "", "price": 1.0, "stock": 1}),
+        (1, {"name": "B", "description": "", "price": 1.0, "stock": 10**20}),
+        (2, {"name": "C", "description": "", "price": 1.0, "stock": 2}),
+    ]
+    errors = []
+
+    assert insert_product_rows(db_session, rows, errors) == 2
+    assert [error.index for error in errors] == [1]
+    assert "too large" in errors[0].detail
+
+
+def test_bulk_create_products_ndjson(client):
+    """
+    NDJSON bodies are ingested line by line, skipping malformed lines.
+    """
+    body = (
+        '{"name": "A", "description": "", "price": 1.0, "stock": 1}\n'
+        "not json\n"
+        '{"name": "B", "description": "", "price": 3.0, "stock": 2}'
+    )
+    response = client.post(
+        "/products/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 2
+    assert result["errors"][0]["index"] == 1
+    assert "Invalid JSON" in result["errors"][0]["detail"]
+
+
+def test_bulk_create_products_rejects_non_array(client):
+    """
+    A JSON body that is not an array is rejected outright.
+    """
+    response = client.post("/products/bulk", json={"name": "A"})
+    assert response.status_code == 400
+
+
+def test_read_product_by_id(client):
+    """
+    A single product is served by id, and unknown ids return 404.
+    """
+    [product_id] = _create_products(client, [(4.0, 2)])
+
+    response = client.get(f"/products/{product_id}")
+    assert response.status_code == 200
+    assert response.json()["price"] == 4.0
+
+    response = client.get("/products/999")
+    assert response.status_code == 404
+
+
+def test_product_cache_serves_repeat_reads(client):
+    """
+    Repeated reads hit the cache until an order changes the stock.
+    """
+    [product_id] = _create_products(client, [(4.0, 2)])
+    client.get(f"/products/{product_id}")
+    client.get(f"/products/{product_id}")
+    assert client.get("/internal/cache").json()["hits"] == 1
+
+    order_payload = {"products": [{"product_id": product_id, "quantity": 1}]}
+    client.post("/orders", json=order_payload)
+    assert client.get(f"/products/{product_id}").json()["stock"] == 1
+
+
+def test_list_products_conditional_get(client):
+    """
+    A matching If-None-Match is answered with 304 without querying products,
+    and the ETag changes once the catalog does.
+    """
+    _create_products(client, [(4.0, 2)])
+    response = client.get("/products")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, no-cache"
+
+    with count_statements(test_engine) as statements:
+        response = client.get("/products", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert statements == []
+
+    _create_products(client, [(5.0, 1)])
+    response = client.get("/products", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_list_products_openapi_schema_unchanged(client):
+    """
+    The fast list path bypasses response_model validation but still
+    documents the page as an array of ProductRead.
+    """
+    schema = client.get("/openapi.json").json()
+    content = schema["paths"]["/products"]["get"]["responses"]["200"]["content"]
+    assert content["application/json"]["schema"] == {
+        "type": "array",
+        "items": {"$ref": "#/components/schemas/ProductRead"},
+        "title": "Response Read Products Products Get",
+    }
+
+
+def test_large_product_page_is_gzipped(client):
+    """
+    Pages above the compression threshold are gzipped; small ones are not.
+    """
+    for i in range(50):
+        client.post(
+            "/products",
+            json={"name": f"P{i}", "description": "x" * 20, "price": 1.0, "stock": 1},
+        )
+
+    response = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 50
+
+    small = client.get("/products?limit=1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def _create_named(client, name: str, description: str = "") -> int:
+    payload = {"name": name, "description": description, "price": 1.0, "stock": 1}
+    return client.post("/products", json=payload).json()["id"]
+
+
+def test_search_products_ranked_and_paginated(client):
+    """
+    Every word must match; name matches rank above description matches, and
+    results page by position.
+    """
+    in_description = _create_named(client, "Kettle", "A red steel teapot")
+    in_name = _create_named(client, "Red Teapot", "Ceramic")
+    _create_named(client, "Blue Teapot", "Ceramic")
+
+    response = client.get("/products/search", params={"q": "red teapots"})
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == [in_name, in_description]
+
+    response = client.get("/products/search", params={"q": "red teapot", "limit": 1})
+    assert [p["id"] for p in response.json()] == [in_name]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/products/search", params={"q": "red teapot", "limit": 1, "cursor": cursor}
+    )
+    assert [p["id"] for p in response.json()] == [in_description]
+
+
+def test_search_window_keeps_best_matches(client, monkeypatch):
+    """
+    With more matches than the window, the best match is kept even when it
+    comes after the first window's worth of rows.
+    """
+    monkeypatch.setattr(search_service, "SEARCH_RANK_WINDOW", 3)
+    weak = [_create_named(client, f"Kettle {i}", "lamp spare part") for i in range(5)]
+    best = _create_named(client, "Lamp", "lamp")
+
+    found = client.get("/products/search", params={"q": "lamp"}).json()
+    assert len(found) == 3
+    assert found[0]["id"] == best
+    assert {p["id"] for p in found[1:]} <= set(weak)
+
+
+def test_search_index_follows_updates_and_ignores_syntax(client):
+    """
+    Renamed products are found by their new name only, and query operators
+    in user input are treated as plain words.
+    """
+    product_id = _create_named(client, "Old name")
+    with Session(test_engine) as session:
+        session.exec(
+            update(Product).where(Product.id == product_id).values(name="Lantern")
+        )
+        session.commit()
+
+    assert client.get("/products/search", params={"q": "old"}).json() == []
+    found = client.get("/products/search", params={"q": '"lantern*'}).json()
+    assert [p["id"] for p in found] == [product_id]
+    assert client.get("/products/search", params={"q": "?!"}).json() == []
+    assert client.get("/products/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,127 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import replicas
+from app.cache import get_product_cache
+from app.database import get_session
+from app.main import create_app
+from app.models import Product
+from app.replicas import ReplicaSet, get_replica_set
+
+
+def _database(path, product_name: str) -> str:
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Product(name=product_name, description="", price=1.0, stock=1))
+        session.commit()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    """
+    Two SQLite files standing in for the primary and one replica, holding
+    different products so each response shows where it was read.
+    """
+    primary = create_engine(_database(tmp_path / "primary.db", "On primary"))
+    replica_url = _database(tmp_path / "replica.db", "On replica")
+    monkeypatch.setattr(replicas, "DATABASE_REPLICA_URLS", [replica_url])
+    replica_set = ReplicaSet([replica_url])
+
+    def primary_session():
+        with Session(primary) as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[get_session] = primary_session
+    app.dependency_overrides[get_replica_set] = lambda: replica_set
+    yield TestClient(app, raise_server_exceptions=False), replica_set
+    primary.dispose()
+
+
+def _names(response) -> list[str]:
+    get_product_cache().clear()
+    return [product["name"] for product in response.json()]
+
+
+def test_reads_go_to_replica_unless_primary_requested(primary_and_replica):
+    """
+    GET endpoints read the replica; X-Read-Primary sends a read to the
+    primary.
+    """
+    client, _ = primary_and_replica
+    assert _names(client.get("/products")) == ["On replica"]
+    response = client.get("/products", headers={"X-Read-Primary": "1"})
+    assert _names(response) == ["On primary"]
+
+
+def test_replica_reads_are_not_cached(primary_and_replica):
+    """
+    Rows read from a replica may lag the primary, so only primary reads fill
+    the product cache.
+    """
+    client, _ = primary_and_replica
+    cache = get_product_cache()
+    cache.clear()
+    assert client.get("/products").json()[0]["name"] == "On replica"
+    assert client.get("/products/1").json()["name"] == "On replica"
+    assert cache.get_product(1) is None
+
+    primary = {"X-Read-Primary": "1"}
+    assert client.get("/products/1", headers=primary).json()["name"] == "On primary"
+    assert client.get("/products/1").json()["name"] == "On primary"
+    assert _names(client.get("/products", headers=primary)) == ["On primary"]
+
+
+def test_client_reads_its_writes_from_primary(primary_and_replica):
+    """
+    A write sets the read-primary cookie, so the writer's next reads see the
+    row it just committed.
+    """
+    client, _ = primary_and_replica
+    payload = {"name": "Just added", "description": "", "price": 2.0, "stock": 1}
+    response = client.post("/products", json=payload)
+    assert response.status_code == 201
+    assert "read_primary=1" in response.headers["set-cookie"]
+    assert _names(client.get("/products")) == ["On primary", "Just added"]
+
+    client.cookies.clear()
+    assert _names(client.get("/products")) == ["On replica"]
+
+
+def test_unhealthy_replica_falls_back_to_primary(primary_and_replica, tmp_path):
+    """
+    A replica that cannot be reached is taken out of rotation after the
+    failed request and reads go to the primary until it recovers.
+    """
+    client, replica_set = primary_and_replica
+    [replica] = replica_set.replicas
+    replica.engine = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+
+    assert client.get("/products").status_code == 500
+    assert not replica.healthy
+    assert _names(client.get("/products")) == ["On primary"]
+
+    replica.engine = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    replica_set.check()
+    assert replica.healthy
+    assert _names(client.get("/products")) == ["On replica"]
+
+
+def test_replicas_are_balanced_round_robin(tmp_path):
+    """
+    Healthy replicas take turns; one marked down is skipped.
+    """
+    replica_set = ReplicaSet(
+        [f"sqlite:///{tmp_path}/one.db", f"sqlite:///{tmp_path}/two.db"]
+    )
+    one, two = replica_set.replicas
+    assert [replica_set.choose() for _ in range(4)] == [one, two, one, two]
+    one.mark_down("test")
+    assert [replica_set.choose() for _ in range(2)] == [two, two]
+    two.mark_down("test")
+    assert replica_set.choose() is None
@@ -0,0 +1,51 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_production_server_serves_and_stops_on_sigterm(tmp_path):
+    """
+    The pre-fork server creates the schema once, serves from its workers
+    and exits cleanly on SIGTERM.
+    """
+    port = _free_port()
+    env = dict(
+        os.environ,
+        TESTING="0",
+        WEB_WORKERS="2",
+        HOST="127.0.0.1",
+        PORT=str(port),
+        DATABASE_URL=f"sqlite:///{tmp_path / 'server.db'}",
+        SALES_ROLLUP_INTERVAL="0",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server"], env=env, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/products")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "server did not start"
+                time.sleep(0.05)
+        assert response.status_code == 200
+    finally:
+        process.send_signal(signal.SIGTERM)
+        _, stderr = process.communicate(timeout=30)
+
+    assert process.returncode == 0
+    assert stderr.count('"message": "Starting workers"') == 1
+    assert '"workers": 2' in stderr
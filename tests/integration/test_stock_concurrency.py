@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Product, ProductOrderLink
+from app.schemas import OrderCreate, OrderItem
+from app.services.order_service import create_order
+from app.services.stock_service import rebalance_stock_shards, shard_product_stock
+from tests.conftest import test_engine
+
+THREADS = 16
+ORDERS_PER_THREAD = 10
+INITIAL_STOCK = 40
+
+
+def _engines():
+    yield pytest.param(test_engine, id="sqlite")
+    postgres_url = os.getenv("TEST_POSTGRES_URL")
+    yield pytest.param(
+        create_engine(postgres_url, pool_size=THREADS) if postgres_url else None,
+        id="postgres",
+        marks=pytest.mark.skipif(
+            not postgres_url, reason="TEST_POSTGRES_URL is not set"
+        ),
+    )
+
+
+@pytest.mark.parametrize("sharded", [False, True], ids=["row", "sharded"])
+@pytest.mark.parametrize("engine", list(_engines()))
+def test_concurrent_orders_never_oversell(engine, sharded):
+    """
+    Hammer a single product from many threads and check that the stock sold
+    matches the stock removed and never drops below zero, whether the stock
+    is one row or split across shards.
+    """
+    if engine is not test_engine:
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        product = Product(name="Hot", description="", price=1.0, stock=INITIAL_STOCK)
+        session.add(product)
+        session.commit()
+        product_id = product.id
+        if sharded:
+            shard_product_stock(session, product_id, shards=4)
+
+    def place_orders():
+        outcomes = []
+        for _ in range(ORDERS_PER_THREAD):
+            order_data = OrderCreate(
+                products=[OrderItem(product_id=product_id, quantity=1)]
+            )
+            with Session(engine) as session:
+                try:
+                    create_order(session, order_data)
+                    outcomes.append("ok")
+                except HTTPException as exc:
+                    outcomes.append(exc.status_code)
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        outcomes = [
+            o
+            for result in pool.map(lambda _: place_orders(), range(THREADS))
+            for o in result
+        ]
+
+    with Session(engine) as session:
+        if sharded:
+            stock = rebalance_stock_shards(session, product_id).stock
+        else:
+            stock = session.get(Product, product_id).stock
+        sold = sum(link.quantity for link in session.exec(select(ProductOrderLink)))
+
+    assert set(outcomes) <= {"ok", 400, 409}
+    assert stock >= 0
+    assert sold == outcomes.count("ok") == INITIAL_STOCK - stock
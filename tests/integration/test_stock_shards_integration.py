@@ -0,0 +1,101 @@
+from sqlmodel import Session, select
+
+from app.models import Product, ProductOrderLink, ProductStockShard
+from app.services.stock_service import (
+    rebalance_all_stock_shards,
+    shard_product_stock,
+    unshard_product_stock,
+)
+from tests.conftest import test_engine
+
+
+def _sharded_product(stock, shards):
+    with Session(test_engine) as session:
+        product = Product(name="Hot", description="", price=2.0, stock=stock)
+        session.add(product)
+        session.commit()
+        return shard_product_stock(session, product.id, shards).id
+
+
+def _shard_stocks(product_id):
+    with Session(test_engine) as session:
+        return list(
+            session.exec(
+                select(ProductStockShard.stock)
+                .where(ProductStockShard.product_id == product_id)
+                .order_by(ProductStockShard.shard)
+            )
+        )
+
+
+def _order(client, product_id, quantity):
+    return client.post(
+        "/orders", json={"products": [{"product_id": product_id, "quantity": quantity}]}
+    )
+
+
+def test_enabling_shards_splits_stock_evenly():
+    product_id = _sharded_product(stock=10, shards=4)
+
+    assert _shard_stocks(product_id) == [3, 3, 2, 2]
+    with Session(test_engine) as session:
+        product = session.get(Product, product_id)
+        assert product.stock_sharded and product.stock == 10
+
+
+def test_order_takes_stock_from_one_shard(client):
+    product_id = _sharded_product(stock=8, shards=4)
+
+    response = _order(client, product_id, 2)
+
+    assert response.status_code == 201
+    assert response.json()["total_price"] == 4.0
+    assert sorted(_shard_stocks(product_id)) == [0, 2, 2, 2]
+
+
+def test_order_larger_than_any_shard_spans_shards(client):
+    product_id = _sharded_product(stock=8, shards=4)
+
+    response = _order(client, product_id, 7)
+
+    assert response.status_code == 201
+    assert sum(_shard_stocks(product_id)) == 1
+
+
+def test_order_beyond_sharded_stock_is_rejected(client):
+    product_id = _sharded_product(stock=5, shards=2)
+
+    response = _order(client, product_id, 6)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient stock for product Hot."
+    assert _shard_stocks(product_id) == [3, 2]
+    with Session(test_engine) as session:
+        assert session.exec(select(ProductOrderLink)).all() == []
+
+
+def test_rebalance_evens_shards_and_publishes_total(client):
+    product_id = _sharded_product(stock=12, shards=3)
+    for _ in range(5):
+        assert _order(client, product_id, 1).status_code == 201
+    # Orders leave the product row alone until the rebalancer runs
+    assert client.get(f"/products/{product_id}").json()["stock"] == 12
+
+    with Session(test_engine) as session:
+        assert rebalance_all_stock_shards(session) == 1
+
+    assert _shard_stocks(product_id) == [3, 2, 2]
+    assert client.get(f"/products/{product_id}").json()["stock"] == 7
+
+
+def test_disabling_shards_folds_stock_back(client):
+    product_id = _sharded_product(stock=6, shards=3)
+    assert _order(client, product_id, 2).status_code == 201
+
+    with Session(test_engine) as session:
+        product = unshard_product_stock(session, product_id)
+
+    assert not product.stock_sharded and product.stock == 4
+    assert _shard_stocks(product_id) == []
+    assert _order(client, product_id, 4).status_code == 201
+    assert client.get(f"/products/{product_id}").json()["stock"] == 0
@@ -0,0 +1,167 @@
+import fnmatch
+import threading
+import time
+
+from app.cache import LRUCacheBackend, ProductCache, RedisCacheBackend
+from app.schemas import ProductFilter
+
+
+class LocalRedis:
+    """
+    Minimal in-process stand-in for the redis-py client methods the cache uses.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, px=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        expires_at = time.monotonic() + px / 1000 if px else None
+        self.data[key] = (value.encode(), expires_at)
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+    def eval(self, script, numkeys, key, counter, value, expected, px):
+        """
+        Runs the cache's only script: set `key` if `counter` equals `expected`.
+        """
+        if int(self.get(counter) or 0) != expected:
+            return 0
+        self.set(key, value, px=px)
+        return 1
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+def test_lru_backend_evicts_least_recently_used():
+    """
+    Once full, the least recently read entry is evicted first.
+    """
+    backend = LRUCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    assert backend.get("a") == 1
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.evictions == 1
+
+
+def test_lru_backend_expires_entries():
+    """
+    Entries are not served past their TTL.
+    """
+    backend = LRUCacheBackend()
+    backend.set("a", 1, ttl=0)
+    assert backend.get("a") is None
+
+
+def test_product_cache_pages_invalidated_by_catalog_change():
+    """
+    Any catalog change makes previously cached pages unreachable.
+    """
+    cache = ProductCache(LRUCacheBackend())
+    filters = ProductFilter(limit=10)
+    cache.set_page(filters, 0, [{"id": 1}])
+    assert cache.get_page(filters, cache.catalog_version()) == [{"id": 1}]
+
+    cache.catalog_changed()
+    assert cache.get_page(filters, cache.catalog_version()) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_rows_read_before_a_write_are_not_cached_as_current():
+    """
+    A page or product read while a write lands is stored under the version
+    the reader started with, so the next reader misses instead of getting
+    stale rows.
+    """
+    cache = ProductCache(LRUCacheBackend())
+    filters = ProductFilter(limit=10)
+    version = cache.catalog_version()
+    # The write commits and bumps the version while the reader is querying
+    cache.catalog_changed([7])
+    cache.set_page(filters, version, [{"id": 7, "stock": 3}])
+    cache.set_product(7, version, {"id": 7, "stock": 3})
+
+    assert cache.get_page(filters, cache.catalog_version()) is None
+    assert cache.get_product(7) is None
+
+
+def test_set_if_counter_stores_only_at_the_expected_value():
+    """
+    The counter check and the store are one step under the backend's lock.
+    """
+    backend = LRUCacheBackend()
+    assert backend.set_if_counter("a", 1, 60, "version", 0)
+    backend.incr("version")
+    assert not backend.set_if_counter("b", 2, 60, "version", 0)
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+
+
+def test_hit_and_miss_counters_are_exact_under_threads():
+    cache = ProductCache(LRUCacheBackend())
+    cache.set_product(1, 0, {"id": 1})
+
+    def read():
+        for _ in range(1000):
+            cache.get_product(1)
+            cache.get_product(2)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (8000, 8000)
+
+
+def test_product_cache_with_redis_backend():
+    """
+    The Redis backend round-trips values as JSON and deletes changed products.
+    """
+    client = LocalRedis()
+    cache = ProductCache(RedisCacheBackend(client))
+    cache.set_product(7, 0, {"id": 7, "stock": 3})
+    assert cache.get_product(7) == {"id": 7, "stock": 3}
+
+    assert cache.catalog_changed([7]) == 1
+    assert cache.get_product(7) is None
+    assert cache.catalog_version() == 1
+    cache.set_product(7, 0, {"id": 7, "stock": 2})
+    assert cache.get_product(7) is None
+
+    cache.clear()
+    assert client.data == {}
+
+
+def test_catalog_etag_changes_with_catalog():
+    """
+    The ETag is stable between reads and changes on every catalog write.
+    """
+    cache = ProductCache(RedisCacheBackend(LocalRedis()))
+    etag = cache.catalog_etag()
+    assert etag.startswith('W/"')
+    assert cache.catalog_etag() == etag
+
+    cache.catalog_changed()
+    assert cache.catalog_etag() != etag
@@ -0,0 +1,84 @@
+import asyncio
+import gzip
+
+from app.metrics import RequestMetrics
+from app.middleware import CompressionMiddleware, _accepted_encodings
+
+
+def _streaming_app(chunks, content_type=b"application/x-ndjson"):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+async def _run(middleware, accept_encoding="gzip", path="/products/export"):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, None, send)
+    return sent
+
+
+def test_streaming_body_is_compressed_chunk_by_chunk():
+    """
+    Every chunk is flushed as it arrives, so the client can decode the
+    stream progressively instead of waiting for the whole body.
+    """
+    chunks = [b'{"id": %d}\n' % i * 50 for i in range(3)]
+    metrics = RequestMetrics()
+    sent = asyncio.run(
+        _run(CompressionMiddleware(_streaming_app(chunks), metrics=metrics))
+    )
+
+    start, *bodies = sent
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) == len(chunks) + 1
+    assert all(body["body"] for body in bodies[:-1])
+
+    decoder = gzip.zlib.decompressobj(16 + gzip.zlib.MAX_WBITS)
+    assert decoder.decompress(bodies[0]["body"]) == chunks[0]
+    assert gzip.decompress(b"".join(b["body"] for b in bodies)) == b"".join(chunks)
+
+    [(key, ratio)] = metrics.compression_ratio.items()
+    assert key[2] == "gzip"
+    assert 0 < ratio.sum < 1
+
+
+def test_excluded_paths_and_identity_are_not_compressed():
+    chunks = [b"x" * 5000]
+    middleware = CompressionMiddleware(_streaming_app(chunks, b"text/html"))
+    for kwargs in ({"path": "/static/index.html"}, {"accept_encoding": "identity"}):
+        start, *_ = asyncio.run(_run(middleware, **kwargs))
+        assert b"content-encoding" not in dict(start["headers"])
+
+
+def test_accepted_encodings_skip_zero_quality():
+    assert _accepted_encodings("gzip;q=0, br;q=0.5, Deflate") == {"br", "deflate"}
+
+
+def test_malformed_quality_counts_as_not_accepted():
+    assert _accepted_encodings("gzip;q=x, br;q=, deflate;q=1") == {"deflate"}
+    middleware = CompressionMiddleware(_streaming_app([b"x" * 5000], b"text/html"))
+    start, *_ = asyncio.run(_run(middleware, accept_encoding="gzip;q=x"))
+    assert start["status"] == 200
+    assert b"content-encoding" not in dict(start["headers"])
@@ -0,0 +1,79 @@
+from sqlmodel import SQLModel
+
+from app import database
+from app.config import database_url
+from app.pool_stats import POOL_STATS, PoolStats
+
+
+def test_init_db_skipped_when_create_all_disabled(monkeypatch):
+    """
+    With DB_CREATE_ALL off, startup leaves the schema to migrations and runs
+    no DDL or existence checks.
+    """
+    calls = []
+    monkeypatch.setattr(database, "DB_CREATE_ALL", False)
+    monkeypatch.setattr(SQLModel.metadata, "create_all", calls.append)
+    assert database.init_db() is False
+    assert calls == []
+
+
+def test_hot_path_indexes_declared():
+    """
+    Indexes created by the migrations are declared on the models too, so
+    create_all and autogenerate agree with them.
+    """
+    indexes = {
+        index.name
+        for table in SQLModel.metadata.tables.values()
+        for index in table.indexes
+    }
+    assert {
+        "ix_productorderlink_product_id",
+        "ix_order_status_id",
+        "ix_product_price_id",
+        "ix_product_in_stock_id",
+    } <= indexes
+
+
+def test_init_db_runs_once_per_process(monkeypatch):
+    """
+    Once the schema is set up, later calls (such as the lifespan of workers
+    forked by the production server) skip it.
+    """
+    calls = []
+    monkeypatch.setattr(database, "DB_CREATE_ALL", True)
+    monkeypatch.setattr(database, "_schema_initialized", False)
+    monkeypatch.setattr(SQLModel.metadata, "create_all", calls.append)
+    assert database.init_db() is True
+    assert database.init_db() is False
+    assert calls == [database.get_engine()]
+
+
+def test_database_url_prefers_database_url_over_postgres_parts(monkeypatch):
+    """
+    The app and Alembic resolve the same URL: DATABASE_URL when set, else
+    one built from POSTGRES_*.
+    """
+    monkeypatch.setenv("POSTGRES_USER", "shop")
+    monkeypatch.setenv("POSTGRES_PASSWORD", "secret")
+    monkeypatch.setenv("POSTGRES_HOST", "db")
+    monkeypatch.setenv("POSTGRES_PORT", "5433")
+    monkeypatch.setenv("POSTGRES_DB", "orders")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    assert database_url() == "postgresql://shop:secret@db:5433/orders"
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///shop.db")
+    assert database_url() == "sqlite:///shop.db"
+
+
+def test_statement_timeout_only_passed_to_postgres(monkeypatch):
+    """
+    The psycopg `options` connect argument is Postgres-only; SQLite would
+    refuse it.
+    """
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    monkeypatch.setitem(POOL_STATS, "timeout_test", PoolStats("timeout_test"))
+    postgres = database.engine_options("timeout_test", "postgresql://u:p@db/shop")
+    assert postgres["connect_args"] == {"options": "-c statement_timeout=5000"}
+    sqlite = database.engine_options("timeout_test", "sqlite://")
+    assert "connect_args" not in sqlite
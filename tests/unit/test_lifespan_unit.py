@@ -0,0 +1,88 @@
+import asyncio
+
+from fastapi import FastAPI
+from sqlalchemy.exc import OperationalError
+
+from app import lifespan
+
+
+def _operational_error():
+    return OperationalError("DELETE FROM idempotencykey", {}, Exception("gone"))
+
+
+def test_idempotency_gc_survives_a_failed_sweep(monkeypatch):
+    """
+    A transient database error is logged and the sweeper keeps running.
+    """
+    calls = []
+
+    def purge():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _operational_error()
+        return 0
+
+    monkeypatch.setattr(lifespan, "_purge_idempotency_keys", purge)
+    monkeypatch.setattr(lifespan, "IDEMPOTENCY_GC_INTERVAL", 0)
+
+    async def run():
+        task = asyncio.create_task(lifespan._idempotency_gc())
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return await asyncio.gather(task, return_exceptions=True)
+
+    [result] = asyncio.run(run())
+    assert isinstance(result, asyncio.CancelledError)
+
+
+def test_shutdown_disposes_engines_after_a_task_died(monkeypatch):
+    """
+    A background task that already failed does not abort shutdown.
+    """
+    disposed = []
+
+    async def dead_task():
+        raise _operational_error()
+
+    async def dispose(name):
+        disposed.append(name)
+
+    monkeypatch.setenv("TESTING", "0")
+    monkeypatch.setattr(lifespan, "init_db", lambda: False)
+    monkeypatch.setattr(lifespan, "_idempotency_gc", dead_task)
+    monkeypatch.setattr(lifespan, "SALES_ROLLUP_INTERVAL", 0)
+    monkeypatch.setattr(lifespan, "STOCK_REBALANCE_INTERVAL", 0)
+    monkeypatch.setattr(lifespan, "queue_enabled", lambda: False)
+    monkeypatch.setattr(lifespan, "dispose_engines", lambda: dispose("engines"))
+    monkeypatch.setattr(lifespan, "dispose_replicas", lambda: dispose("replicas"))
+
+    async def run():
+        async with lifespan.lifespan(FastAPI()):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert disposed == ["engines", "replicas"]
+
+
+def test_replica_health_checks_survive_a_failed_check(monkeypatch):
+    calls = []
+
+    class Replicas:
+        def check(self):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("resolver down")
+
+    monkeypatch.setattr(lifespan, "get_replica_set", Replicas)
+    monkeypatch.setattr(lifespan, "REPLICA_HEALTH_INTERVAL", 0)
+
+    async def run():
+        task = asyncio.create_task(lifespan._replica_health_checks())
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return await asyncio.gather(task, return_exceptions=True)
+
+    [result] = asyncio.run(run())
+    assert isinstance(result, asyncio.CancelledError)
@@ -0,0 +1,69 @@
+import pytest
+
+from app.limits import AdaptiveConcurrencyLimit, MemoryTokenBuckets
+from app.pool_stats import POOL_STATS, PoolStats
+
+
+def test_token_bucket_refuses_past_burst_and_refills(monkeypatch):
+    """
+    A client may spend its burst at once; then it waits 1 / rate per order.
+    """
+    now = [100.0]
+    monkeypatch.setattr("app.limits.time.monotonic", lambda: now[0])
+    buckets = MemoryTokenBuckets(rate=2.0, burst=2)
+
+    assert [buckets.take("a"), buckets.take("a")] == [0.0, 0.0]
+    assert buckets.take("a") == pytest.approx(0.5)
+    assert buckets.take("b") == 0.0
+
+    now[0] += 0.5
+    assert buckets.take("a") == 0.0
+
+
+def test_token_bucket_forgets_least_recent_clients():
+    buckets = MemoryTokenBuckets(rate=1.0, burst=1, max_clients=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key)
+    assert list(buckets._buckets) == ["b", "c"]
+
+
+@pytest.fixture
+def pool_stats():
+    POOL_STATS.pop("test", None)
+    stats = POOL_STATS["test"] = PoolStats("test")
+    yield stats
+    POOL_STATS.pop("test", None)
+
+
+def test_concurrency_limit_shrinks_under_pool_waits_and_recovers(
+    pool_stats, monkeypatch
+):
+    """
+    Slow pool checkouts cut the limit by a quarter at most once a second;
+    fast ones let it grow back to the maximum.
+    """
+    now = [100.0]
+    monkeypatch.setattr("app.limits.time.monotonic", lambda: now[0])
+    limit = AdaptiveConcurrencyLimit(8, max_pool_wait_ms=50, pools=("test",))
+
+    pool_stats.recent_wait_ms = 200
+    for _ in range(3):
+        assert limit.try_acquire()
+        limit.release()
+    assert int(limit.limit) == 6
+
+    now[0] += 1
+    limit.try_acquire()
+    limit.release()
+    assert int(limit.limit) == 4
+
+    taken = [limit.try_acquire() for _ in range(5)]
+    assert taken == [True] * 4 + [False]
+    for _ in range(4):
+        limit.release()
+
+    pool_stats.recent_wait_ms = 1
+    for _ in range(100):
+        limit.try_acquire()
+        limit.release()
+    assert limit.limit == 8
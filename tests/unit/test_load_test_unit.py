@@ -0,0 +1,34 @@
+from benchmarks.load_test import compare
+
+
+def _report(**fields):
+    result = {
+        "scenario": "create_order",
+        "transport": "asgi",
+        "concurrency": 32,
+        "requests": 300,
+        "errors": 0,
+        "throughput_rps": 100.0,
+        "p95_ms": 50.0,
+        "statements_per_request": 4,
+    }
+    result.update(fields)
+    return result
+
+
+def test_compare_flags_failed_requests_even_when_faster():
+    """
+    Requests that fail fast must not pass as a speed-up.
+    """
+    baseline = {"results": [_report()]}
+    faster_but_failing = _report(errors=212, throughput_rps=400.0, p95_ms=10.0)
+
+    [regression] = compare([faster_but_failing], baseline, tolerance=0.2)
+
+    assert "212/300 requests failed > baseline 0/300" in regression
+
+
+def test_compare_accepts_matching_error_rate():
+    baseline = {"results": [_report(errors=3)]}
+
+    assert compare([_report(errors=3)], baseline, tolerance=0.2) == []
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, text
+
+from app.metrics import (
+    Histogram,
+    QueryStats,
+    RequestMetrics,
+    install_sql_hooks,
+    render_prometheus,
+    start_query_stats,
+    stop_query_stats,
+)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 5, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("1", 1), ("10", 2), ("+Inf", 3)]
+    assert histogram.count == 3
+    assert histogram.sum == 55.5
+
+
+def test_statements_are_counted_only_inside_a_request():
+    install_sql_hooks()
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        stats, token = start_query_stats()
+        try:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        finally:
+            stop_query_stats(token)
+        conn.execute(text("SELECT 3"))
+    assert stats.statements == 2
+    assert stats.db_seconds > 0
+    assert stats.server_timing(0.01).startswith("db;dur=")
+
+
+def test_render_prometheus_text_format():
+    metrics = RequestMetrics()
+    metrics.request_started()
+    stats = QueryStats()
+    stats.statements = 3
+    metrics.request_finished("GET", "/products/{product_id}", 200, 0.02, 512, stats)
+
+    body = render_prometheus(metrics)
+    assert "http_requests_in_flight 0" in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",'
+        'route="/products/{product_id}",status="200",le="0.025"} 1'
+    ) in body
+    assert (
+        'http_request_sql_statements_total{method="GET",'
+        'route="/products/{product_id}"} 3'
+    ) in body
+    assert 'http_response_size_bytes_count{method="GET",' in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
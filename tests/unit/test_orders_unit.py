@@ -3,10 +3,17 @@
 import pytest
 from fastapi import HTTPException
 from pydantic import ValidationError
+from sqlmodel import select
 
 from app.services.order_service import create_order
-from app.models import Order
-from tests.unit.test_utils import create_order_data
+from app.models import Order, Product, ProductOrderLink
+from app.schemas import OrderCreate, OrderItem
+from tests.conftest import test_engine
+from tests.unit.test_utils import (
+    count_statements,
+    create_order_data,
+    get_first_product_id,
+)
 
 
 def test_create_order_success(prepopulated_db_session):
@@ -78,3 +85,55 @@ def test_create_order_invalid_product(db_session):
 
     assert exc_info.value.status_code == 404
     assert "Product with ID 999 not found." in exc_info.value.detail
+
+
+def test_create_order_failure_leaves_no_order(prepopulated_db_session):
+    """
+    Test that a rejected order does not leave a pending Order row behind.
+    """
+    order_data = create_order_data(prepopulated_db_session, quantity=10)
+    with pytest.raises(HTTPException):
+        create_order(prepopulated_db_session, order_data)
+
+    assert prepopulated_db_session.exec(select(Order)).all() == []
+
+
+def test_create_order_merges_duplicate_items(prepopulated_db_session):
+    """
+    Test that repeated product ids are merged into a single order line.
+    """
+    product_id = get_first_product_id(prepopulated_db_session)
+    order_data = OrderCreate(
+        products=[
+            OrderItem(product_id=product_id, quantity=1),
+            OrderItem(product_id=product_id, quantity=2),
+        ]
+    )
+    order = create_order(prepopulated_db_session, order_data)
+
+    link = prepopulated_db_session.exec(select(ProductOrderLink)).one()
+    assert link.order_id == order.id
+    assert link.quantity == 3
+    assert prepopulated_db_session.get(Product, product_id).stock == 2
+
+
+def test_create_order_statement_count_is_constant(db_session):
+    """
+    Test that the number of statements does not grow with the cart size.
+    """
+    products = [
+        Product(name=f"P{i}", description="", price=1.0, stock=10) for i in range(20)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    ids = [product.id for product in products]
+
+    def place(product_ids):
+        order_data = OrderCreate(
+            products=[OrderItem(product_id=pid, quantity=1) for pid in product_ids]
+        )
+        with count_statements(test_engine) as statements:
+            create_order(db_session, order_data)
+        return statements
+
+    assert len(place(ids[:2])) == len(place(ids))
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.pool_stats import POOL_STATS, instrumented_pool_class
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """
+    A file-backed SQLite engine with a one-connection instrumented pool.
+    """
+    POOL_STATS.pop("test", None)
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool, "test"),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.01,
+    )
+    yield engine
+    engine.dispose()
+    POOL_STATS.pop("test", None)
+
+
+def test_pool_stats_count_checkouts_and_overflow(pooled_engine):
+    """
+    The second concurrent checkout overflows the single pooled connection.
+    """
+    with pooled_engine.connect(), pooled_engine.connect():
+        snapshot = POOL_STATS["test"].snapshot()
+        assert snapshot["checked_out"] == 2
+        assert snapshot["overflow"] == 1
+
+    snapshot = POOL_STATS["test"].snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["overflow_hits"] == 1
+    assert snapshot["connections_opened"] == 2
+    # The overflow connection is closed on checkin
+    assert snapshot["connections_closed"] == 1
+    assert snapshot["wait_ms"]["count"] == 2
+    assert snapshot["wait_ms"]["buckets"]["+Inf"] == 2
+
+
+def test_pool_stats_count_timeouts(pooled_engine):
+    """
+    A checkout that cannot be served within pool_timeout is recorded.
+    """
+    with pooled_engine.connect(), pooled_engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            pooled_engine.connect()
+
+    assert POOL_STATS["test"].snapshot()["timeouts"] == 1
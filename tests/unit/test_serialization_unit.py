@@ -0,0 +1,25 @@
+import json
+
+from app import serialization
+from app.serialization import FastJSONResponse, dumps
+
+ROWS = [{"id": 1, "name": "Café", "price": 9.99, "stock": 0, "description": None}]
+
+
+def test_dumps_matches_standard_json():
+    assert json.loads(dumps(ROWS)) == ROWS
+
+
+def test_dumps_falls_back_without_orjson(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    encoded = dumps(ROWS)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == ROWS
+    assert b": " not in encoded
+
+
+def test_fast_json_response_renders_bytes():
+    response = FastJSONResponse(ROWS, headers={"X-Next-Cursor": "1"})
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == ROWS
+    assert response.headers["X-Next-Cursor"] == "1"
@@ -0,0 +1,46 @@
+from app import database, logging_config, main, server
+
+
+def test_server_settings_are_read_after_env_file(monkeypatch):
+    """
+    Settings that only the .env file provides reach the server: they are
+    read after load_environment(), not when app.server is imported.
+    """
+    env_file = {
+        "WEB_WORKERS": "3",
+        "HOST": "127.0.0.2",
+        "PORT": "8123",
+        "GRACEFUL_TIMEOUT": "7",
+        "BACKLOG": "64",
+    }
+    for name in env_file:
+        monkeypatch.delenv(name, raising=False)
+
+    def load_environment():
+        for name, value in env_file.items():
+            monkeypatch.setenv(name, value)
+
+    started = {}
+
+    class Supervisor:
+        def __init__(self, app, sock, *args):
+            started["supervisor"] = args
+
+        def run(self):
+            pass
+
+    class Engine:
+        def dispose(self):
+            pass
+
+    monkeypatch.setattr(server, "load_environment", load_environment)
+    monkeypatch.setattr(server, "_bind", lambda *args: started.update(bind=args))
+    monkeypatch.setattr(server, "Supervisor", Supervisor)
+    monkeypatch.setattr(main, "get_app", lambda: None)
+    monkeypatch.setattr(database, "init_db", lambda: False)
+    monkeypatch.setattr(database, "get_engine", Engine)
+    monkeypatch.setattr(logging_config, "configure_logging", lambda: None)
+
+    server.main()
+
+    assert started == {"bind": ("127.0.0.2", 8123, 64), "supervisor": (3, 7, 64)}
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+from benchmarks.import_time import STARTUP_IMPORT_BUDGET_MS, profile, total_ms
+
+
+def test_importing_main_defers_database_and_routers():
+    """
+    Importing app.main reads no .env and loads no database code, models or
+    routers; they are imported when the app is created.
+    """
+    code = "import sys, app.main; print(' '.join(sorted(sys.modules)))"
+    modules = set(
+        subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+    )
+    assert {"app.main", "app.config"} <= modules
+    deferred = {"dotenv", "sqlalchemy", "sqlmodel", "app.database", "app.models"}
+    assert not deferred & modules
+    assert not any(module.startswith("app.routers") for module in modules)
+
+
+def test_create_app_loads_the_deferred_modules():
+    """
+    The imports skipped by `import app.main` happen in create_app().
+    """
+    import_phase, create_phase = profile()
+    imported = {name for name, _ in import_phase}
+    created = {name for name, _ in create_phase}
+    assert {"app.database", "app.lifespan", "app.routers.products"} <= created
+    assert not {"app.database", "app.lifespan"} & imported
+
+
+def test_startup_import_time_within_budget():
+    """
+    Fails when cold-start imports regress past STARTUP_IMPORT_BUDGET_MS;
+    run `make importtime` to see which imports grew. The best of three runs
+    is compared, so one slow run on a busy machine does not fail it.
+    """
+    startup_ms = min(
+        total_ms(import_phase) + total_ms(create_phase)
+        for import_phase, create_phase in (profile() for _ in range(3))
+    )
+    assert startup_ms <= STARTUP_IMPORT_BUDGET_MS
@@ -1,6 +1,8 @@
 # tests/test_utils.py
 
-from typing import Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from sqlalchemy import Engine, event
 from sqlmodel import Session, select
 from app.schemas import OrderCreate, OrderItem, ProductCreate
 from app.models import Product
@@ -31,3 +33,20 @@ def create_product_data(
     Creates a ProductCreate instance with the specified parameters.
     """
     return ProductCreate(name=name, description=description, price=price, stock=stock)
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[List[str]]:
+    """
+    Records every SQL statement executed on the engine within the block.
+    """
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)